@@ -0,0 +1,377 @@
+"""
+The module with the batch engine of the game
+
+A batch plays many stages at the same time, frame by frame. Every game is
+a World (see ModuleWorld) whose arrays are views of the arrays of the
+batch, stacked game by game, so that the moves of the n-th enemy of every
+game, the moves of every player, the bullets and the ends of the games are
+computed for all the games at once. Only the bots and the player play
+game by game
+
+The games are the same as with ModuleGame, except that:
+    there is no budget of CPU time (see ModuleGame.TimeBudget)
+    a player keeping a state between its moves sees the games in turn
+
+numpy is needed
+"""
+
+
+from os import path, makedirs
+from time import perf_counter_ns
+from argparse import ArgumentParser, Namespace
+from typing import Dict, List, Literal
+import numpy as np
+from numpy.typing import NDArray
+from TankLib import TankAction, StageData, StageView
+from ModuleReplay import remove_index, write_index
+from ModuleWorld import World, Sweep, Path, VECTORS, collide, stack_paths, sweep_paths
+import ModuleGame
+import ModuleBot
+import ModuleGenerator
+
+
+PATH: str = path.dirname(path.abspath(__file__))
+BATCH_SIZE: int = 256
+# Position of the walls and targets added to fill the arrays, far from every map
+FAR: int = -10**9
+
+
+class GameLog:
+    """
+    The class for the log of a game of a batch, kept in memory until the end
+    of the game, with the methods of ModuleGame.FrameLog used by print_log
+    """
+
+    def __init__(self: "GameLog") -> None:
+        self.buffer: List[str] = []
+        self.position: int = 0
+        self.offsets: List[int] = []
+
+    def write(self: "GameLog", text: str) -> None:
+        """
+        Add text to the log
+        """
+        self.buffer.append(text)
+        self.position += len(text)
+
+    def start_frame(self: "GameLog") -> None:
+        """
+        Mark the start of a frame for the frame index
+        """
+        self.offsets.append(self.position)
+
+    def end_frame(self: "GameLog") -> None:
+        """
+        Mark the end of a frame, the log is only written at the end
+        """
+
+    def save(self: "GameLog", log_file: str) -> None:
+        """
+        Write the log in log_file, and its frame index
+        """
+        remove_index(log_file)
+        with open(log_file, "w", encoding="iso8859", newline="\n") as file:
+            file.write("".join(self.buffer))
+        write_index(log_file, self.offsets, self.position)
+
+
+class Batch:
+    """
+    The class for games played at the same time
+
+    pos, size, alive: the arrays of the worlds, stacked (game, row)
+    listed: if the tank is in the enemies of its world, for the tanks only
+    levels: the level of the bots of each game
+    states: the moves of the bots of each game (see ModuleBot.set_state)
+    walls_views, player_views: the first views of each game for the bots
+    and for the player (see StageData.view)
+    """
+
+    def __init__(self: "Batch", stages: List[StageData], levels: List[int]) -> None:
+        for stage in stages:
+            if (stage.bullet_size, stage.bullet_speed, stage.tank_speed, stage.max_frame) != \
+               (stages[0].bullet_size, stages[0].bullet_speed, stages[0].tank_speed, stages[0].max_frame):
+                raise ValueError("The stages of a batch must have the same constants")
+
+        self.worlds: List[World] = [World(stage) for stage in stages]
+        self.walls_views: List[StageView] = [stage.view() for stage in stages]
+        self.player_views: List[StageView] = [stage.view() for stage in stages]
+        self.levels: List[int] = levels
+        self.states: List[tuple[List[Literal["UP", "DOWN", "LEFT", "RIGHT"]], List[int]]] = [([], []) for _ in stages]
+        self.bullet_size: int = stages[0].bullet_size
+        self.tank_speed: int = stages[0].tank_speed
+        self.max_frame: int = stages[0].max_frame
+        self.steps: NDArray = np.arange(1, self.tank_speed + 1)
+
+        nb_games: int = len(stages)
+        nb_rows: int = max(len(world.pos) for world in self.worlds)
+        nb_tanks: int = max(len(world.names) for world in self.worlds)
+        nb_walls: int = max(len(world.wall_pos) for world in self.worlds)
+
+        self.width: NDArray = np.array([stage.width for stage in stages])
+        self.height: NDArray = np.array([stage.height for stage in stages])
+        self.wall_pos: NDArray = np.full((nb_games, nb_walls, 2), FAR, dtype=np.int64)
+        self.wall_size: NDArray = np.zeros((nb_games, nb_walls, 2), dtype=np.int64)
+        self.pos: NDArray = np.zeros((nb_games, nb_rows, 2), dtype=np.int64)
+        self.size: NDArray = np.zeros((nb_games, nb_rows, 1), dtype=np.int64)
+        self.alive: NDArray = np.zeros((nb_games, nb_tanks), dtype=bool)
+        self.listed: NDArray = np.zeros((nb_games, nb_tanks), dtype=bool)
+
+        for game, world in enumerate(self.worlds):
+            self.wall_pos[game, :len(world.wall_pos)] = world.wall_pos
+            self.wall_size[game, :len(world.wall_pos)] = world.wall_size
+            self.pos[game, :len(world.pos)] = world.pos
+            self.size[game, :len(world.pos)] = world.size
+            self.alive[game, :len(world.names)] = world.alive
+            # The world now reads and writes the arrays of the batch
+            world.pos = self.pos[game, :len(world.pos)]
+            world.size = self.size[game, :len(world.pos)]
+            world.alive = self.alive[game, :len(world.names)]
+
+    def make_moves(self: "Batch", moves: List[tuple[int, int, TankAction]]) -> None:
+        """
+        Make the moves of tanks of different games, like World.make_move
+
+        moves: (game, row of the tank, action)
+        """
+        moves = [a for a in moves if a[2].direction in VECTORS]
+        if not moves:
+            return
+
+        games: NDArray = np.array([a[0] for a in moves])
+        rows: NDArray = np.array([a[1] for a in moves])
+        vectors: NDArray = np.array([VECTORS[a[2].direction] for a in moves])
+        size: NDArray = self.size[games, rows]
+        xs: NDArray = self.pos[games, rows, :1] + self.steps * vectors[:, :1]
+        ys: NDArray = self.pos[games, rows, 1:] + self.steps * vectors[:, 1:]
+        nb_tanks: int = self.alive.shape[1]
+
+        others: NDArray = self.listed[games] & self.alive[games]
+        others[np.arange(len(moves)), rows] = False
+        others[:, 0] = rows != 0
+
+        blocked: NDArray = (xs - size < 0) | (xs + size > self.width[games, None]) | \
+            (ys - size < 0) | (ys + size > self.height[games, None])
+        blocked |= collide(xs, ys, size[:, :, None], self.wall_pos[games], self.wall_size[games]).any(axis=1)
+        blocked |= (collide(xs, ys, size[:, :, None], self.pos[games, :nb_tanks], self.size[games, :nb_tanks]) &
+                    others[:, :, None]).any(axis=1)
+
+        distances: NDArray = np.where(blocked.any(axis=1), blocked.argmax(axis=1), self.tank_speed)
+        self.pos[games, rows] += distances[:, None] * vectors
+
+    def play_actions(self: "Batch", actions: List[tuple[int, int, TankAction]]) -> None:
+        """
+        Make the moves then the shoots of tanks of different games
+
+        actions: (game, row of the tank, action)
+        """
+        self.make_moves(actions)
+        for game, row, action in actions:
+            self.worlds[game].make_shoot(action.shoot, action.shoot_direction, row)
+
+    def actualize_tanks(self: "Batch", games: List[int]) -> None:
+        """
+        Actualize the tanks of the games, like World.actualize_tanks,
+        the n-th enemy of every game moving at the same time
+        """
+        views: Dict[int, StageView] = {game: self.worlds[game].view(self.walls_views[game]) for game in games}
+        actions: List[tuple[int, int, TankAction]]
+        world: World
+
+        for ind in range(max(len(self.worlds[game].enemies) for game in games)):
+            actions = []
+            for game in games:
+                world = self.worlds[game]
+                if ind < len(world.enemies) and world.alive[world.enemies[ind]]:
+                    ModuleBot.set_state(self.states[game])
+                    actions.append((game, world.enemies[ind], ModuleBot.bot_move(views[game], views[game].enemies[ind], self.levels[game])))
+
+            self.play_actions(actions)
+            for game, row, _ in actions:
+                views[game] = views[game].with_enemy(ind, self.worlds[game].tank_view(row))
+
+        self.play_actions([(game, 0, ModuleGame.timed_move(self.worlds[game].view(self.player_views[game])))
+                           for game in games if self.alive[game, 0]])
+
+    def sweep(self: "Batch", phases: Dict[int, tuple[List[int], List[int], List[int]]]) -> Dict[int, Sweep]:
+        """
+        Sweep the bullets of the phases of different games at once, like World.sweep
+
+        phases: the phase of each game, from World.get_phase
+        """
+        paths: List[Path] = []
+        positions: List[List[int]] = []
+        owners: List[int] = []
+        bounds: Dict[int, tuple[int, int]] = {}
+        world: World
+
+        for game, phase in phases.items():
+            world = self.worlds[game]
+            bounds[game] = (len(paths), len(paths) + len(phase[1]))
+            paths += [world.get_path(world.directions[row]) for row in phase[1]]
+            positions += world.pos[phase[1]].tolist()
+            owners += [game] * len(phase[1])
+
+        games: NDArray = np.array(owners)
+        nb_targets: int = max(len(phase[2]) for phase in phases.values())
+        target_pos: NDArray = np.full((len(paths), nb_targets, 2), FAR, dtype=np.int64)
+        target_size: NDArray = np.zeros((len(paths), nb_targets, 1), dtype=np.int64)
+        for game, (start, end) in bounds.items():
+            target_pos[start:end, :len(phases[game][2])] = self.pos[game, phases[game][2]]
+            target_size[start:end, :len(phases[game][2])] = self.size[game, phases[game][2]]
+
+        xs: NDArray
+        ys: NDArray
+        nb_steps: NDArray
+        last: List[tuple[float, float]]
+        xs, ys, nb_steps, last = stack_paths(paths, positions)
+        first: NDArray
+        steps: NDArray
+        first, steps = sweep_paths(xs, ys, nb_steps, self.bullet_size, self.width[games, None], self.height[games, None],
+                                   (self.wall_pos[games], self.wall_size[games]), (target_pos, target_size))
+
+        return {game: (nb_steps[start:end], first[start:end], steps[start:end, :len(phases[game][2])], last[start:end])
+                for game, (start, end) in bounds.items()}
+
+    def actualize_bullets(self: "Batch", games: List[int], specials: Dict[int, List[str]]) -> None:
+        """
+        Actualize the bullets of the games, like World.actualize_bullets
+        """
+        phases: Dict[int, tuple[List[int], List[int], List[int]]]
+        sweeps: Dict[int, Sweep]
+
+        for is_player in (True, False):
+            phases = {game: self.worlds[game].get_phase(is_player) for game in games}
+            phases = {game: phase for game, phase in phases.items() if phase[1]}
+            if phases:
+                sweeps = self.sweep(phases)
+                for game, phase in phases.items():
+                    self.worlds[game].move_phase(is_player, phase, sweeps[game], specials[game])
+
+    def check_end(self: "Batch", games: List[int]) -> NDArray:
+        """
+        Check if the games are finished, like World.check_end
+        """
+        indexes: NDArray = np.array(games)
+        frames: NDArray = np.array([self.worlds[game].current_frame for game in games])
+        return ~self.alive[indexes, 0] | ~(self.alive[indexes] & self.listed[indexes]).any(axis=1) | (frames > self.max_frame)
+
+    def play(self: "Batch", log_files: List[str] | None = None) -> List[str]:
+        """
+        Play every game until the end and return the results,
+        the log of each game is written to log_files when it ends
+        """
+        logs: List[GameLog | None] = [GameLog() for _ in self.worlds] if log_files is not None else [None] * len(self.worlds)
+        results: List[str] = ["GAME OVER"] * len(self.worlds)
+        specials: Dict[int, List[str]]
+        games: List[int] = list(range(len(self.worlds)))
+        finished: NDArray
+        world: World
+        log: GameLog | None
+
+        for game, log in enumerate(logs):
+            if log is not None:
+                ModuleGame.print_header(self.worlds[game].stage, log)
+
+        while games:
+            for game in games:
+                self.worlds[game].remove_dead()
+                self.listed[game] = False
+                self.listed[game, self.worlds[game].enemies] = True
+
+            specials = {game: [] for game in games}
+            self.actualize_tanks(games)
+            self.actualize_bullets(games, specials)
+
+            for game in games:
+                world = self.worlds[game]
+                log = logs[game]
+                if log is not None:
+                    ModuleGame.print_log(world.view(self.walls_views[game]), log, specials[game])
+                world.current_frame += 1
+
+            finished = self.check_end(games)
+            for game in np.array(games)[finished].tolist():
+                world = self.worlds[game]
+                if world.current_frame > world.max_frame:
+                    results[game] = "TIE"
+                elif world.alive[0]:
+                    results[game] = "WINNER"
+
+                log = logs[game]
+                if log is not None and log_files is not None:
+                    log.write(f"Result: {results[game]}\n")
+                    log.save(log_files[game])
+                    logs[game] = None
+
+            games = [game for game, end in zip(games, finished.tolist()) if not end]
+
+        return results
+
+
+def run_batch(stage_files: List[str], log_files: List[str] | None = None) -> List[str]:
+    """
+    Play the stages in one batch and return their results,
+    the logs are written to log_files if given
+    """
+    stages: List[StageData] = []
+    levels: List[int] = []
+
+    for stage_file in stage_files:
+        stages.append(ModuleGame.get_stage_data(stage_file))
+        levels.append(ModuleGame.BOT)
+
+    state: tuple[List, List[int]] = ModuleBot.get_state()
+    try:
+        return Batch(stages, levels).play(log_files)
+    finally:
+        ModuleBot.set_state(state)
+
+
+def main(stage_files: List[str], log_dir: str | None = None, batch_size: int = BATCH_SIZE) -> Dict[str, str]:
+    """
+    Play the stages by batches of batch_size games and return the result of each stage file
+
+    log_dir: the folder of the logs, named after the stage files (default: no log)
+    """
+    results: Dict[str, str] = {}
+    files: List[str]
+
+    if log_dir is not None:
+        makedirs(log_dir, exist_ok=True)
+
+    for start in range(0, len(stage_files), batch_size):
+        files = stage_files[start:start + batch_size]
+        results.update(zip(files, run_batch(files, None if log_dir is None else
+                                            [f"{log_dir}/{path.splitext(path.basename(a))[0]}.log" for a in files])))
+
+    return results
+
+
+if __name__ == "__main__":
+    PARSER: ArgumentParser = ArgumentParser()
+    PARSER.add_argument("--count", type=int, default=0, help="Number of new stages to generate and play (default: the stages of the stages folder)")
+    PARSER.add_argument("--seed", type=int, default=0, help="With --count, the seed of the first stage, the next stages get the next seeds")
+    PARSER.add_argument("--size", type=int, default=BATCH_SIZE, help="Number of games played at the same time")
+    PARSER.add_argument("--logs", type=bool, default=False, help="If True, write the log of every game")
+    ARGS: Namespace = PARSER.parse_known_args()[0]
+
+    FOLDER: str = f"{PATH}/logs/batch"
+    STAGE_FILES: List[str] = [f"{PATH}/stages/stage_{a}.in" for a in range(1, 101)]
+    makedirs(FOLDER, exist_ok=True)
+
+    if ARGS.count:
+        makedirs(f"{FOLDER}/stages", exist_ok=True)
+        STAGE_FILES = [f"{FOLDER}/stages/stage_{a}.in" for a in range(1, ARGS.count + 1)]
+        for IND, STAGE_FILE in enumerate(STAGE_FILES):
+            ModuleGenerator.generate_stage(IND % 100 + 1, ARGS.seed + IND, STAGE_FILE)
+
+    START: int = perf_counter_ns()
+    RESULTS: Dict[str, str] = main(STAGE_FILES, FOLDER if ARGS.logs else None, ARGS.size)
+    print(f"Time: {round((perf_counter_ns() - START) * 10**-9, 3)} seconds for {len(RESULTS)} stages")
+
+    with open(f"{FOLDER}/all.log", "w", encoding="iso8859") as FILE:
+        for STAGE_FILE, RESULT in RESULTS.items():
+            FILE.write(f"{path.basename(STAGE_FILE)}: {RESULT}\n")
+        for NAME in ("WINNER", "TIE", "GAME OVER"):
+            FILE.write(f"{NAME}: {list(RESULTS.values()).count(NAME)}\n")
@@ -4,9 +4,8 @@ The module for the participant
 
 
 from typing import List, Literal
-from random import choice, randint
-from math import sqrt
-from TankLib import Bullet, Tank, TankAction, StageData
+from TankLib import TankView, TankAction, StageView
+from ModuleSight import is_in_sight, get_tank_collision
 
 
 # TODO : Change bots for lvl 9 and 10 (same as lvl 8) and improve others
@@ -14,7 +13,31 @@ LAST_MOVE: List[Literal["UP", "DOWN", "LEFT", "RIGHT"]] = []
 COUNTER: List[int] = []
 
 
-def choose_rand_direction(tank: Tank, stage: StageData) -> Literal["UP", "DOWN", "LEFT", "RIGHT"]:
+def reset() -> None:
+    """
+    The function to forget the moves of the bots of the last stage
+    """
+    LAST_MOVE.clear()
+    COUNTER.clear()
+
+
+def get_state() -> tuple[List[Literal["UP", "DOWN", "LEFT", "RIGHT"]], List[int]]:
+    """
+    The function to get the moves of the bots of the current stage
+    """
+    return LAST_MOVE, COUNTER
+
+
+def set_state(state: tuple[List[Literal["UP", "DOWN", "LEFT", "RIGHT"]], List[int]]) -> None:
+    """
+    The function to switch to the moves of the bots of another stage,
+    for stages played at the same time
+    """
+    global LAST_MOVE, COUNTER
+    LAST_MOVE, COUNTER = state
+
+
+def choose_rand_direction(tank: TankView, stage: StageView) -> Literal["UP", "DOWN", "LEFT", "RIGHT"]:
     """
     The function for the direction
     """
@@ -26,13 +49,13 @@ def choose_rand_direction(tank: Tank, stage: StageData) -> Literal["UP", "DOWN",
 
     COUNTER[ind] += 1
     if COUNTER[ind] == 20:
-        LAST_MOVE[ind] = choice(["UP", "DOWN", "LEFT", "RIGHT"])
+        LAST_MOVE[ind] = stage.rng.choice(["UP", "DOWN", "LEFT", "RIGHT"])
         COUNTER[ind] = 0
 
     return LAST_MOVE[ind]
 
 
-def get_fastest(tank: Tank, stage: StageData) -> Literal["UP", "DOWN", "LEFT", "RIGHT"]:
+def get_fastest(tank: TankView, stage: StageView) -> Literal["UP", "DOWN", "LEFT", "RIGHT"]:
     """
     The function to get the fastest way to go to player
     """
@@ -49,78 +72,23 @@ def get_fastest(tank: Tank, stage: StageData) -> Literal["UP", "DOWN", "LEFT", "
     return "UP"
 
 
-def get_walls_colide(bullet: Bullet, final: tuple[int, int], stage: StageData) -> bool:
-    """
-    Return if the bullet colide with a wall
-    """
-    x: float = bullet.pos_x
-    y: float = bullet.pos_y
-
-    divider: float = sqrt(bullet.direction[0]**2 + bullet.direction[1]**2)
-    unit_vector: tuple[float, float] = (bullet.direction[0] / divider, bullet.direction[1] / divider)
-
-    checker_x: bool = final[0] > x if unit_vector[0] > 0 else final[0] < x
-    checker_y: bool = final[1] > y if unit_vector[1] > 0 else final[1] < y
-
-    while checker_x or checker_y:
-        if any(a_wall.is_in_wall(x, y, bullet.size, bullet.size) for a_wall in stage.walls):
-            return True
-
-        if x < 0 or x > stage.width or y < 0 or y > stage.height:
-            return True
-
-        x += unit_vector[0]
-        y += unit_vector[1]
-
-        checker_x = final[0] > x if unit_vector[0] > 0 else final[0] < x
-        checker_y = final[1] > y if unit_vector[1] > 0 else final[1] < y
-
-    return False
-
-
-def choose_shooting_direction(tank: Tank, stage: StageData) -> tuple[int, int]:
+def choose_shooting_direction(tank: TankView, stage: StageView) -> tuple[int, int]:
     """
     The function for the shooting direction
     """
     direction: tuple[int, int] = (stage.player.pos_x - tank.pos_x, stage.player.pos_y - tank.pos_y)
 
-    test: bool = get_walls_colide(Bullet(tank.pos_x, tank.pos_y, direction, stage.bullet_size), (stage.player.pos_x, stage.player.pos_y), stage)
-
-    if not test:
+    if is_in_sight(stage, (tank.pos_x, tank.pos_y), (stage.player.pos_x, stage.player.pos_y)):
         return direction
 
     return (0, 0)
 
 
-def get_tank_collision(bullet: Bullet, tank: Tank, stage: StageData) -> bool:
-    """
-    Return if the bullet colide with the tank
-    """
-    x: float = bullet.pos_x
-    y: float = bullet.pos_y
-
-    divider: float = sqrt(bullet.direction[0]**2 + bullet.direction[1]**2)
-    unit_vector: tuple[float, float] = (bullet.direction[0] / divider, bullet.direction[1] / divider)
-
-    while True:
-        if any(a_wall.is_in_wall(x, y, bullet.size, bullet.size) for a_wall in stage.walls):
-            return False
-
-        if x < 0 or x > stage.width or y < 0 or y > stage.height:
-            return False
-
-        if tank.is_in_tank(x, y, bullet.size, bullet.size):
-            return True
-
-        x += unit_vector[0]
-        y += unit_vector[1]
-
-
-def destroy_player_bullet(tank: Tank, stage: StageData) -> tuple[int, int]:
+def destroy_player_bullet(tank: TankView, stage: StageView) -> tuple[int, int]:
     """
     The function to destroy the player's bullet that are near the tank
     """
-    player: Tank = stage.player
+    player: TankView = stage.player
     shoot_direction: tuple[int, int] = (0, 0)
 
     direction: tuple[int, int]
@@ -139,7 +107,7 @@ def destroy_player_bullet(tank: Tank, stage: StageData) -> tuple[int, int]:
     return shoot_direction
 
 
-def bot_move_1(stage: StageData, tank: Tank) -> TankAction:
+def bot_move_1(stage: StageView, tank: TankView) -> TankAction:
     """
     Level 1 Bot
     """
@@ -147,11 +115,11 @@ def bot_move_1(stage: StageData, tank: Tank) -> TankAction:
     action.direction = choose_rand_direction(tank, stage)
     action.shoot = len(tank.bullets) < tank.max_bullets
     if action.shoot:
-        action.shoot_direction = (choice([randint(-10, -1), randint(1, 10)]), choice([randint(-10, -1), randint(1, 10)]))
+        action.shoot_direction = (stage.rng.choice([stage.rng.randint(-10, -1), stage.rng.randint(1, 10)]), stage.rng.choice([stage.rng.randint(-10, -1), stage.rng.randint(1, 10)]))
     return action
 
 
-def bot_move_2(stage: StageData, tank: Tank) -> TankAction:
+def bot_move_2(stage: StageView, tank: TankView) -> TankAction:
     """
     Level 2 Bot
     """
@@ -159,11 +127,11 @@ def bot_move_2(stage: StageData, tank: Tank) -> TankAction:
     action.direction = get_fastest(tank, stage)
     action.shoot = len(tank.bullets) < tank.max_bullets
     if action.shoot:
-        action.shoot_direction = (choice([randint(-10, -1), randint(1, 10)]), choice([randint(-10, -1), randint(1, 10)]))
+        action.shoot_direction = (stage.rng.choice([stage.rng.randint(-10, -1), stage.rng.randint(1, 10)]), stage.rng.choice([stage.rng.randint(-10, -1), stage.rng.randint(1, 10)]))
     return action
 
 
-def bot_move_3(stage: StageData, tank: Tank) -> TankAction:
+def bot_move_3(stage: StageView, tank: TankView) -> TankAction:
     """
     Level 3 Bot
     """
@@ -177,7 +145,7 @@ def bot_move_3(stage: StageData, tank: Tank) -> TankAction:
     return action
 
 
-def bot_move_4(stage: StageData, tank: Tank) -> TankAction:
+def bot_move_4(stage: StageView, tank: TankView) -> TankAction:
     """
     Level 4 Bot
     """
@@ -191,7 +159,7 @@ def bot_move_4(stage: StageData, tank: Tank) -> TankAction:
     return action
 
 
-def bot_move_5(stage: StageData, tank: Tank) -> TankAction:
+def bot_move_5(stage: StageView, tank: TankView) -> TankAction:
     """
     Level 5 Bot
     """
@@ -207,7 +175,7 @@ def bot_move_5(stage: StageData, tank: Tank) -> TankAction:
     return action
 
 
-def bot_move_6(stage: StageData, tank: Tank) -> TankAction:
+def bot_move_6(stage: StageView, tank: TankView) -> TankAction:
     """
     Level 6 Bot
     """
@@ -223,7 +191,7 @@ def bot_move_6(stage: StageData, tank: Tank) -> TankAction:
     return action
 
 
-def bot_move_7(stage: StageData, tank: Tank) -> TankAction:
+def bot_move_7(stage: StageView, tank: TankView) -> TankAction:
     """
     Level 7 Bot
     """
@@ -243,7 +211,7 @@ def bot_move_7(stage: StageData, tank: Tank) -> TankAction:
     return action
 
 
-def bot_move_8(stage: StageData, tank: Tank) -> TankAction:
+def bot_move_8(stage: StageView, tank: TankView) -> TankAction:
     """
     Level 8 Bot
     """
@@ -263,7 +231,7 @@ def bot_move_8(stage: StageData, tank: Tank) -> TankAction:
     return action
 
 
-def bot_move_9(stage: StageData, tank: Tank) -> TankAction:
+def bot_move_9(stage: StageView, tank: TankView) -> TankAction:
     """
     Level 9 Bot
     """
@@ -283,7 +251,7 @@ def bot_move_9(stage: StageData, tank: Tank) -> TankAction:
     return action
 
 
-def bot_move_10(stage: StageData, tank: Tank) -> TankAction:
+def bot_move_10(stage: StageView, tank: TankView) -> TankAction:
     """
     Level 10 Bot
     """
@@ -303,7 +271,7 @@ def bot_move_10(stage: StageData, tank: Tank) -> TankAction:
     return action
 
 
-def bot_move(stage: StageData, tank: Tank, bot: int) -> TankAction:
+def bot_move(stage: StageView, tank: TankView, bot: int) -> TankAction:
     """
     The function for the movement
     Need to return a tuple who specify action to do for player's tank
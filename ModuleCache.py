@@ -0,0 +1,182 @@
+"""
+The module with the cache of the results of the stages
+
+A stage is run again only if its key changed, the key being a hash of:
+    the version of the engine (ModuleGame.ENGINE_VERSION) and the engine
+    chosen (objects or the arrays of ModuleWorld),
+    the stage file (with its seed and the level of the bots),
+    the source of the library, of the maps of the walls, of the logs and
+    replays, of the array engine, of the bots (with the lines of sight
+    and the rays) and of the player with every module it imports, out of
+    the standard library and the installed packages
+
+The cache is a JSON file in the logs folder, with per stage the key,
+the result and the size and modification time of the log, so that a
+log changed or removed since is never served
+"""
+
+
+import sys
+from os import path, replace, stat, stat_result
+from hashlib import sha256
+from json import load, dump, JSONDecodeError
+from dataclasses import dataclass, asdict
+from sysconfig import get_paths
+from types import ModuleType
+from typing import Dict, List
+import TankLib
+import ModuleGame
+import ModuleWallMap
+import ModuleReplay
+import ModuleBot
+import ModuleSight
+import ModuleRay
+
+
+PATH: str = path.dirname(path.abspath(__file__))
+# Not imported, it needs numpy
+WORLD_FILE: str = f"{PATH}/ModuleWorld.py"
+CACHE_FILE: str = f"{PATH}/logs/cache.json"
+CACHED_RESULTS: tuple[str, ...] = ("WINNER", "TIE", "GAME OVER")
+
+
+@dataclass
+class CacheEntry:
+    """
+    The class for the cached result of a stage
+
+    replay: if True, the binary replay was written too
+    """
+    key: str = ""
+    result: str = ""
+    log_size: int = 0
+    log_mtime: int = 0
+    replay: bool = False
+
+
+def hash_file(file: str) -> bytes:
+    """
+    Get the hash of the content of a file
+    """
+    with open(file, "rb") as f:
+        return sha256(f.read()).digest()
+
+
+def get_imported_files(module: ModuleType) -> List[str]:
+    """
+    Get the sorted source files of module and of every module it imports,
+    directly or through its imports, by "import" or "from ... import"
+
+    The modules of the standard library and of the installed packages
+    are left out
+    """
+    excluded: tuple[str, ...] = tuple(path.realpath(get_paths()[a]) for a in ("stdlib", "platstdlib", "purelib", "platlib"))
+    files: List[str] = []
+    seen: set[str] = set()
+    modules: List[ModuleType] = [module]
+    current: ModuleType
+    file: str | None
+    name: object
+
+    while modules:
+        current = modules.pop()
+        file = getattr(current, "__file__", None)
+        if current.__name__ in seen or file is None or path.realpath(file).startswith(excluded):
+            continue
+        seen.add(current.__name__)
+        files.append(file)
+
+        for value in vars(current).values():
+            name = getattr(value, "__module__", None)
+            if isinstance(value, ModuleType):
+                modules.append(value)
+            elif isinstance(name, str) and name in sys.modules:
+                modules.append(sys.modules[name])
+    return sorted(files)
+
+
+def get_code_hash(world: bool = False) -> bytes:
+    """
+    Get the hash of the engine version, of the engine chosen and of the
+    source of every module the games depend on (see get_imported_files
+    for the player)
+
+    world: if True, the stages are played by the array engine of ModuleWorld
+    """
+    return sha256(f"engine {ModuleGame.ENGINE_VERSION} world {world}".encode() +
+                  b"".join(hash_file(a) for a in (TankLib.__file__, ModuleGame.__file__, ModuleWallMap.__file__,
+                                                  ModuleReplay.__file__, WORLD_FILE, ModuleBot.__file__,
+                                                  ModuleSight.__file__, ModuleRay.__file__,
+                                                  *get_imported_files(ModuleGame.ModulePlayer)))).digest()
+
+
+def get_stage_key(stage_file: str, code_hash: bytes) -> str:
+    """
+    Get the key of a stage, code_hash being given by get_code_hash
+    """
+    return sha256(code_hash + hash_file(stage_file)).hexdigest()
+
+
+class ResultCache:
+    """
+    The class for the cache of the results of the stages
+    """
+
+    def __init__(self: "ResultCache", cache_file: str = CACHE_FILE, log_dir: str = f"{PATH}/logs") -> None:
+        self.cache_file: str = cache_file
+        self.log_dir: str = log_dir
+        self.entries: Dict[int, CacheEntry] = {}
+
+        try:
+            with open(cache_file, "r", encoding="utf-8") as file:
+                self.entries = {int(a): CacheEntry(**b) for a, b in load(file).items()}
+        except (OSError, JSONDecodeError, TypeError, ValueError):
+            self.entries = {}
+
+    def get(self: "ResultCache", stage_nb: int, key: str, replay: bool) -> str | None:
+        """
+        Get the result of a stage if its key and its log did not change
+        """
+        entry: CacheEntry | None = self.entries.get(stage_nb)
+        log_file: str = f"{self.log_dir}/stage_{stage_nb}.log"
+        log_stat: stat_result
+
+        if entry is None or entry.key != key or (replay and not entry.replay):
+            return None
+        if replay and not path.isfile(f"{self.log_dir}/stage_{stage_nb}.replay"):
+            return None
+
+        try:
+            log_stat = stat(log_file)
+        except OSError:
+            return None
+
+        if log_stat.st_size != entry.log_size or log_stat.st_mtime_ns != entry.log_mtime:
+            return None
+        return entry.result
+
+    def put(self: "ResultCache", stage_nb: int, key: str, result: str, replay: bool) -> None:
+        """
+        Store the result of a stage that was just run,
+        results depending on the time (TIME OUT) or errors are not stored
+        """
+        if result not in CACHED_RESULTS:
+            self.entries.pop(stage_nb, None)
+            return
+
+        try:
+            log_stat: stat_result = stat(f"{self.log_dir}/stage_{stage_nb}.log")
+        except OSError:
+            self.entries.pop(stage_nb, None)
+            return
+
+        self.entries[stage_nb] = CacheEntry(key, result, log_stat.st_size, log_stat.st_mtime_ns, replay)
+
+    def save(self: "ResultCache") -> None:
+        """
+        Write the cache, through a temporary file so that it is never half written
+        """
+        temp_file: str = f"{self.cache_file}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as file:
+            dump({str(a): asdict(b) for a, b in sorted(self.entries.items())}, file, indent=1)
+        replace(temp_file, self.cache_file)
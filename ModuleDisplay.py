@@ -6,10 +6,13 @@ The module for the display of the game
 import tkinter as tk
 from os import path
 from functools import partial
-from time import sleep
-from typing import List, Dict, Any
+from math import ceil
+from time import perf_counter
+from typing import List, Dict, Iterator, Set
 from re import Match, Pattern
 from re import compile as cmp
+from ModuleReplay import Frame, ReplayHeader, LogReader, ReplayReader, open_stage
+from ModuleRender import render_thumbnail
 
 
 WINNER_MSG: str = "WINNER"
@@ -17,6 +20,17 @@ GAME_OVER_MSG: str = "GAME OVER"
 TIE_MSG: str = "TIE"
 TIME_OUT_MSG: str = "TIME OUT"
 ERROR_MSG: str = "Error occured"
+# Seconds between two frames of a game at normal speed
+FRAME_TIME: float = 0.1
+SPEEDS: List[float] = [0.25, 0.5, 1, 2, 4, 8, 16]
+# Frames of the longest games, until the end of a replay is read
+MAX_FRAME: int = 1000
+# Frames skipped by the arrow keys
+SEEK_STEP: int = 10
+# The kinds of items of the frames, from the bottom to the top of the canvas
+ITEM_KINDS: List[str] = ["player", "enemy", "player_bullet", "enemy_bullet"]
+# The cells of the thumbnails of the overview, 10 by row in the game canvas
+THUMB_CELL: tuple[int, int] = (80, 65)
 
 WINDOW: tk.Tk = tk.Tk()
 WINDOW.title("Battle City")
@@ -46,15 +60,38 @@ LGD_ERROR.place(x=920, y=690, anchor="sw")
 
 EXIT: tk.Button = tk.Button(WINDOW, text="Quit", command=WINDOW.destroy)
 EXIT.place(x=1190, y=690, anchor="se")
+OVERVIEW: tk.Button = tk.Button(WINDOW, text="Overview", command=lambda: show_overview())
+OVERVIEW.place(x=1145, y=690, anchor="se")
 
 GAME: tk.Canvas = tk.Canvas(WINDOW, width=800, height=650, bg="white")
 GAME.place(x=25, y=25, anchor="nw")
 
+SEEK: tk.Scale = tk.Scale(WINDOW, from_=0, to=MAX_FRAME, orient="horizontal", length=340)
+SEEK.place(x=850, y=520, anchor="nw")
+SEEK.bind("<ButtonRelease-1>", lambda event: seek_playback(int(SEEK.get())))
+PAUSE: tk.Button = tk.Button(WINDOW, text="Pause", width=5, command=lambda: pause_playback())
+PAUSE.place(x=850, y=575, anchor="nw")
+SLOWER: tk.Button = tk.Button(WINDOW, text="Slower", width=5, command=lambda: change_speed(-1))
+SLOWER.place(x=920, y=575, anchor="nw")
+FASTER: tk.Button = tk.Button(WINDOW, text="Faster", width=5, command=lambda: change_speed(1))
+FASTER.place(x=990, y=575, anchor="nw")
+SPEED: tk.Label = tk.Label(WINDOW, text="x1", bg="black", fg="white")
+SPEED.place(x=1065, y=580, anchor="nw")
+
+WINDOW.bind("<space>", lambda event: pause_playback())
+WINDOW.bind("<Left>", lambda event: seek_playback(PLAYBACK.index - SEEK_STEP if PLAYBACK else 0))
+WINDOW.bind("<Right>", lambda event: seek_playback(PLAYBACK.index + SEEK_STEP if PLAYBACK else 0))
+
 BUTTONS: List[tk.Button] = []
 ACTUAL_STAGE: int = 0
 TANK_SIZE: int = 0
 BULLET_SIZE: int = 0
 FONT: str = "Arial 10"
+PLAYBACK: "Playback | None" = None
+# The results of the stages by number, and the thumbnails loaded in the overview
+STAGE_RESULTS: List[str] = []
+THUMBNAILS: List[tk.PhotoImage] = []
+OVERVIEW_JOB: str | None = None
 
 PATH: str = path.dirname(path.abspath(__file__))
 
@@ -76,7 +113,8 @@ def reset_globals() -> None:
     global WINNER_MSG, GAME_OVER_MSG, TIE_MSG, TIME_OUT_MSG, ERROR_MSG, \
         WINDOW, CANVAS, RES_WIN, RES_OVER, RES_TIE, LGD_WIN, LGD_OVER, \
         LGD_TIE, LGD_TIME_OUT, LGD_ERROR, EXIT, BUTTONS, GAME, ACTUAL_STAGE, \
-        TANK_SIZE, BULLET_SIZE, FONT
+        TANK_SIZE, BULLET_SIZE, FONT, SEEK, PAUSE, SLOWER, FASTER, SPEED, PLAYBACK, \
+        OVERVIEW, STAGE_RESULTS, THUMBNAILS, OVERVIEW_JOB
 
     WINNER_MSG = "WINNER"
     GAME_OVER_MSG = "GAME OVER"
@@ -86,7 +124,11 @@ def reset_globals() -> None:
 
     obj: tk.Misc
 
-    for obj in [WINDOW, CANVAS, RES_WIN, RES_OVER, RES_TIE, LGD_WIN, LGD_OVER, LGD_TIE, LGD_TIME_OUT, LGD_ERROR, EXIT, GAME]:
+    if PLAYBACK is not None:
+        PLAYBACK.stop()
+
+    for obj in [WINDOW, CANVAS, RES_WIN, RES_OVER, RES_TIE, LGD_WIN, LGD_OVER, LGD_TIE, LGD_TIME_OUT, LGD_ERROR, EXIT, GAME,
+                SEEK, PAUSE, SLOWER, FASTER, SPEED, OVERVIEW]:
         destroy_object(obj)
 
     for button in BUTTONS:
@@ -120,179 +162,445 @@ def reset_globals() -> None:
 
     EXIT = tk.Button(WINDOW, text="Quit", command=WINDOW.destroy)
     EXIT.place(x=1190, y=690, anchor="se")
+    OVERVIEW = tk.Button(WINDOW, text="Overview", command=lambda: show_overview())
+    OVERVIEW.place(x=1145, y=690, anchor="se")
 
     GAME = tk.Canvas(WINDOW, width=800, height=650, bg="white")
     GAME.place(x=25, y=25, anchor="nw")
 
+    SEEK = tk.Scale(WINDOW, from_=0, to=MAX_FRAME, orient="horizontal", length=340)
+    SEEK.place(x=850, y=520, anchor="nw")
+    SEEK.bind("<ButtonRelease-1>", lambda event: seek_playback(int(SEEK.get())))
+    PAUSE = tk.Button(WINDOW, text="Pause", width=5, command=lambda: pause_playback())
+    PAUSE.place(x=850, y=575, anchor="nw")
+    SLOWER = tk.Button(WINDOW, text="Slower", width=5, command=lambda: change_speed(-1))
+    SLOWER.place(x=920, y=575, anchor="nw")
+    FASTER = tk.Button(WINDOW, text="Faster", width=5, command=lambda: change_speed(1))
+    FASTER.place(x=990, y=575, anchor="nw")
+    SPEED = tk.Label(WINDOW, text="x1", bg="black", fg="white")
+    SPEED.place(x=1065, y=580, anchor="nw")
+
+    WINDOW.bind("<space>", lambda event: pause_playback())
+    WINDOW.bind("<Left>", lambda event: seek_playback(PLAYBACK.index - SEEK_STEP if PLAYBACK else 0))
+    WINDOW.bind("<Right>", lambda event: seek_playback(PLAYBACK.index + SEEK_STEP if PLAYBACK else 0))
+
     BUTTONS = []
     ACTUAL_STAGE = 0
     TANK_SIZE = 0
     BULLET_SIZE = 0
     FONT = "Arial 10"
+    PLAYBACK = None
+    STAGE_RESULTS = []
+    THUMBNAILS = []
+    OVERVIEW_JOB = None
 
 
-def parse_stage_result(stage: int, result: str) -> List[str]:
+def open_stage_result(stage: int, result: str) -> LogReader | ReplayReader | None:
     """
-    Parse the stage result log's file to get the coordinates of the walls,
-    dimensions and every mooves
-    """
-    global TANK_SIZE, BULLET_SIZE
+    Open the binary replay of the stage, or its log's file, and draw the walls,
+    dimensions and result from its header
 
+    Return None if the stage has no frames to display
+    """
     if result not in [TIE_MSG, GAME_OVER_MSG, WINNER_MSG] or \
-       not path.isfile(f"{PATH}/logs/stage_{stage}.log"):
-        if ACTUAL_STAGE == stage:
-            error_msg: str
-            if result == TIME_OUT_MSG:
-                error_msg = TIME_OUT_MSG + ", ask an admin"
-            else:
-                error_msg = f"\n\n{ERROR_MSG}\nAsk an admin for logs\n\nAnd don't forget to give the stage number\nAnd your team name"
-            GAME.config(width=775, height=625)
-            GAME.create_text(10, 30, text="Result: Error: " + error_msg, fill="purple", font=FONT, anchor="nw")
-        return []
+       not path.isfile(f"{PATH}/logs/stage_{stage}.log") and not path.isfile(f"{PATH}/logs/stage_{stage}.replay"):
+        error_msg: str
+        if result.startswith(TIME_OUT_MSG):
+            error_msg = result + ", ask an admin"
+        else:
+            error_msg = f"\n\n{ERROR_MSG}\nAsk an admin for logs\n\nAnd don't forget to give the stage number\nAnd your team name"
+        GAME.config(width=775, height=625)
+        GAME.create_text(10, 30, text="Result: Error: " + error_msg, fill="purple", font=FONT, anchor="nw")
+        return None
 
-    with open(f"{PATH}/logs/stage_{stage}.log", "r", encoding="iso8859") as file:
-        text: str = file.read()
+    reader: LogReader | ReplayReader = open_stage(f"{PATH}/logs", stage)
+    draw_header(reader.header, result)
+    return reader
 
-    dim: Match[str] | None = cmp(r"Dimension: (?P<width>\d+) (?P<height>\d+)").search(text)
 
-    tank_size: Match[str] | None = cmp(r"TankSize: (?P<size>\d+)").search(text)
-    bullet_size: Match[str] | None = cmp(r"BulletSize: (?P<size>\d+)").search(text)
+def draw_header(header: ReplayHeader, result: str) -> None:
+    """
+    Draw the walls, dimensions and result of the stage
+    """
+    global TANK_SIZE, BULLET_SIZE
 
-    if tank_size and ACTUAL_STAGE == stage:
-        TANK_SIZE = int(tank_size.group("size"))
-    if bullet_size and ACTUAL_STAGE == stage:
-        BULLET_SIZE = int(bullet_size.group("size"))
+    TANK_SIZE = header.tank_size
+    BULLET_SIZE = header.bullet_size
 
-    if dim and ACTUAL_STAGE == stage:
-        GAME.config(width=int(dim.group("width")), height=int(dim.group("height")))
-    elif ACTUAL_STAGE == stage:
+    if header.width and header.height:
+        GAME.config(width=header.width, height=header.height)
+    else:
         GAME.config(width=775, height=625)
 
-    walls: List[Match[str]] = list(cmp(r"Wall: (?P<x>\d+) (?P<y>\d+) (?P<size_x>\d+) (?P<size_y>\d+)").finditer(text))
+    for wall in header.walls:
+        GAME.create_rectangle(wall[0] - wall[2], wall[1] - wall[3],
+                              wall[0] + wall[2], wall[1] + wall[3],
+                              fill="green")
 
-    for wall in walls:
-        if ACTUAL_STAGE == stage:
-            GAME.create_rectangle(int(wall.group("x")) - int(wall.group("size_x")),
-                                  int(wall.group("y")) - int(wall.group("size_y")),
-                                  int(wall.group("x")) + int(wall.group("size_x")),
-                                  int(wall.group("y")) + int(wall.group("size_y")),
-                                  fill="green")
+    GAME.create_text(10, 30, text=f"Result: {result}", fill="purple", font=FONT, anchor="nw")
 
-    if ACTUAL_STAGE == stage:
-        GAME.create_text(10, 30, text=f"Result: {result}", fill="purple", font=FONT, anchor="nw")
-
-    return text.split("\n")
 
+class FrameItems:
+    """
+    The class for the items of the canvas drawing the frames, kept from
+    one frame to the next: they are moved with GAME.coords, and hidden
+    instead of deleted when their tank dies or there are fewer bullets
 
-def parse_mooves(frames: List[Dict], lines: List[str]) -> None:
+    The tanks are found by name, the bullets of the player and of the
+    enemies by their rank in the frame. The items of a kind stay below
+    the items of the next kinds, like when they were drawn in this order
     """
-    Parse every mooves of the stage and put them in frames
+
+    def __init__(self: "FrameItems") -> None:
+        self.time: int = GAME.create_text(10, 10, text="", fill="purple", font=FONT, anchor="nw")
+        self.player: int = self.create("player", "blue")
+        self.enemies: Dict[str, int] = {}
+        self.bullets: Dict[str, List[int]] = {"player_bullet": [], "enemy_bullet": []}
+        self.shown: Dict[str, int] = {"player_bullet": 0, "enemy_bullet": 0}
+        self.hidden: Set[int] = set()
+        self.coords: Dict[int, tuple[int, int]] = {}
+
+    def create(self: "FrameItems", kind: str, color: str) -> int:
+        """
+        Create an item of kind, below the items of the next kinds
+        """
+        item: int = GAME.create_rectangle(0, 0, 0, 0, fill=color, tags=kind)
+
+        for other in ITEM_KINDS[ITEM_KINDS.index(kind) + 1:]:
+            if GAME.find_withtag(other):
+                GAME.tag_lower(item, other)
+                break
+        return item
+
+    def move(self: "FrameItems", item: int, pos: tuple[int, int], size: int) -> None:
+        """
+        Move the item to pos and show it
+        """
+        if self.coords.get(item) != pos:
+            GAME.coords(item, pos[0] - size, pos[1] - size, pos[0] + size, pos[1] + size)
+            self.coords[item] = pos
+        if item in self.hidden:
+            GAME.itemconfigure(item, state="normal")
+            self.hidden.remove(item)
+
+    def hide(self: "FrameItems", item: int) -> None:
+        """
+        Hide the item
+        """
+        if item not in self.hidden:
+            GAME.itemconfigure(item, state="hidden")
+            self.hidden.add(item)
+
+    def draw_bullets(self: "FrameItems", kind: str, bullets: List[tuple[int, int]], color: str) -> None:
+        """
+        Draw the bullets of kind, with the first items of its pool
+        """
+        pool: List[int] = self.bullets[kind]
+
+        while len(pool) < len(bullets):
+            pool.append(self.create(kind, color))
+        for item, bullet in zip(pool, bullets):
+            self.move(item, bullet, BULLET_SIZE)
+        for item in pool[len(bullets):self.shown[kind]]:
+            self.hide(item)
+        self.shown[kind] = len(bullets)
+
+    def draw(self: "FrameItems", frame: Frame) -> None:
+        """
+        Draw the tanks and bullets of the frame instead of the last one
+        """
+        GAME.itemconfigure(self.time, text=f"Time: {frame.frame/10}s")
+
+        self.move(self.player, frame.player, TANK_SIZE)
+
+        alive: Set[str] = set()
+        for name, pos_x, pos_y in frame.enemies:
+            if name not in self.enemies:
+                self.enemies[name] = self.create("enemy", "red")
+            self.move(self.enemies[name], (pos_x, pos_y), TANK_SIZE)
+            alive.add(name)
+        for name, item in self.enemies.items():
+            if name not in alive:
+                self.hide(item)
+
+        self.draw_bullets("player_bullet", frame.player_bullets, "blue")
+        self.draw_bullets("enemy_bullet", frame.enemy_bullets, "red")
+
+
+class Playback:
     """
-    i: int = 0
+    The class for the playback of a stage, scheduled with WINDOW.after
+    so that the window never stops answering
 
-    while i < len(lines):
-        line: str = lines[i]
+    Every frame is due at its own time from the start of the playback:
+    when drawing falls behind, the late frames are read but not drawn
+    instead of slowing the game down
 
-        if line.startswith("Frame:"):
-            frame_dict: Dict[str, Any] = {}
-            frame_dict["frame"] = int(line.split()[1])
-            frame_dict["player"] = []
-            frame_dict["enemies"] = []
-            frame_dict["player_bullet"] = []
-            frame_dict["enemy_bullet"] = []
+    index: the index of the last frame read (and drawn), -1 before the first
+    start: the time of the frame 0 on the clock, moved on every pause,
+    seek and change of speed
+    """
 
-            i += 1
-            try:
-                line = lines[i]
-            except IndexError:
-                break
+    def __init__(self: "Playback", stage: int, reader: LogReader | ReplayReader, speed: float = 1) -> None:
+        self.stage: int = stage
+        self.reader: LogReader | ReplayReader = reader
+        self.frames: Iterator[Frame] = iter(reader)
+        self.index: int = -1
+        self.ended: bool = False
+        self.paused: bool = False
+        self.speed: float = speed
+        self.start: float = perf_counter()
+        self.job: str | None = None
+        self.items: FrameItems | None = None
+
+    def get_due(self: "Playback", index: int) -> float:
+        """
+        Return the time on the clock of the frame index
+        """
+        return self.start + index * FRAME_TIME / self.speed
+
+    def read_until(self: "Playback", index: int) -> Frame | None:
+        """
+        Read the frames until the frame index or the end of the game,
+        and return the last one read (None if none was read)
+        """
+        frame: Frame | None = None
+        read: Frame | None
+
+        while self.index < index and not self.ended:
+            read = next(self.frames, None)
+            if read is None:
+                self.ended = True
+                SEEK.config(to=max(self.index, 0))
+            else:
+                frame = read
+                self.index += 1
+
+        return frame
+
+    def show(self: "Playback", frame: Frame) -> None:
+        """
+        Draw the frame instead of the last one
+        """
+        if self.items is None:
+            self.items = FrameItems()
+        self.items.draw(frame)
+        SEEK.set(self.index)
+
+    def tick(self: "Playback") -> None:
+        """
+        Draw the frame due now and schedule the next one
+        """
+        self.job = None
+        frame: Frame | None = self.read_until(int((perf_counter() - self.start) * self.speed / FRAME_TIME))
+
+        if frame is not None:
+            self.show(frame)
+        if self.ended:
+            self.paused = True
+            PAUSE.config(text="Play")
+        else:
+            self.schedule()
+
+    def schedule(self: "Playback") -> None:
+        """
+        Schedule the next frame at its time
+        """
+        delay: float = self.get_due(self.index + 1) - perf_counter()
+        self.job = WINDOW.after(max(0, ceil(delay * 1000)), self.tick)
+
+    def cancel(self: "Playback") -> None:
+        """
+        Cancel the next frame
+        """
+        if self.job is not None:
+            WINDOW.after_cancel(self.job)
+            self.job = None
+
+    def restart_clock(self: "Playback") -> None:
+        """
+        Put the clock on the last frame read and schedule the next one
+        if the playback is not paused
+        """
+        self.cancel()
+        self.start = perf_counter() - max(self.index, 0) * FRAME_TIME / self.speed
+        if not self.paused:
+            self.schedule()
+
+    def pause(self: "Playback") -> None:
+        """
+        Pause or play again, from the start at the end of the game
+        """
+        if self.paused and self.ended:
+            self.paused = False
+            self.seek(0)
+        else:
+            self.paused = not self.paused
+            self.restart_clock()
+        PAUSE.config(text="Play" if self.paused else "Pause")
+
+    def set_speed(self: "Playback", speed: float) -> None:
+        """
+        Change the speed of the playback, from the last frame read
+        """
+        self.speed = speed
+        self.restart_clock()
+
+    def seek(self: "Playback", index: int) -> None:
+        """
+        Draw the frame index (the last one if the game is shorter)
+        and go on from there
+
+        With the frame index of the log or the replay, the reader goes
+        straight to the frame, else going back reads the game again from
+        its start
+        """
+        index = max(index, 0)
+        if self.reader.offsets is not None:
+            self.index = self.reader.seek(index) - 1
+            self.frames = iter(self.reader)
+            self.ended = False
+        elif index <= self.index:
+            self.reader.close()
+            self.reader = open_stage(f"{PATH}/logs", self.stage)
+            self.frames = iter(self.reader)
+            self.index = -1
+            self.ended = False
+
+        frame: Frame | None = self.read_until(index)
+        if frame is not None:
+            self.show(frame)
+        self.restart_clock()
+
+    def stop(self: "Playback") -> None:
+        """
+        Stop the playback for good
+        """
+        self.cancel()
+        self.reader.close()
+
+
+def pause_playback() -> None:
+    """
+    Pause or play again the stage displayed
+    """
+    if PLAYBACK is not None:
+        PLAYBACK.pause()
 
-            while line != "---------------------------------":
-                if line.startswith("Player:"):
-                    frame_dict["player"] = line.split()[1:]
-                elif line.startswith("Enemy:"):
-                    frame_dict["enemies"].append(line.split()[1:])
-                elif line.startswith("Player_Bullet:"):
-                    frame_dict["player_bullet"].append(line.split()[1:])
-                elif line.startswith("Enemy_Bullet:"):
-                    frame_dict["enemy_bullet"].append(line.split()[1:])
 
-                i += 1
-                try:
-                    line = lines[i]
-                except IndexError:
-                    break
+def change_speed(step: int) -> None:
+    """
+    Go step speeds faster (or slower if step is negative)
+    """
+    if PLAYBACK is not None:
+        speed: float = SPEEDS[min(max(SPEEDS.index(PLAYBACK.speed) + step, 0), len(SPEEDS) - 1)]
+        PLAYBACK.set_speed(speed)
+        SPEED.config(text=f"x{speed:g}")
 
-            frames.append(frame_dict)
 
-        i += 1
+def seek_playback(index: int) -> None:
+    """
+    Go to the frame index of the stage displayed
+    """
+    if PLAYBACK is not None:
+        PLAYBACK.seek(index)
 
 
 def stage_display(stage: int, result: str) -> None:
     """
     Display the stage
+
+    The frames are read while they are displayed, so the first one
+    is shown at once whatever the length of the game
     """
-    global ACTUAL_STAGE
+    global ACTUAL_STAGE, PLAYBACK
     ACTUAL_STAGE = stage
+    stop_overview()
     GAME.delete("all")
 
-    splited_text: List[str] = parse_stage_result(stage, result)
+    speed: float = 1
+    if PLAYBACK is not None:
+        speed = PLAYBACK.speed
+        PLAYBACK.stop()
+        PLAYBACK = None
+    SEEK.config(to=MAX_FRAME)
+    SEEK.set(0)
+    PAUSE.config(text="Pause")
 
-    if ACTUAL_STAGE == stage:
-        GAME.update()
+    reader: LogReader | ReplayReader | None = open_stage_result(stage, result)
+    if reader is not None:
+        if reader.offsets is not None:
+            SEEK.config(to=max(len(reader.offsets) - 1, 0))
+        PLAYBACK = Playback(stage, reader, speed)
+        PLAYBACK.tick()
 
-    frames: List[Dict] = []
-    parse_mooves(frames, splited_text)
 
-    all_items: List[int] = []
-    for frame in frames:
-        if ACTUAL_STAGE != stage:
-            break
+def stop_overview() -> None:
+    """
+    Stop loading the thumbnails of the overview
+    """
+    global OVERVIEW_JOB
+    if OVERVIEW_JOB is not None:
+        WINDOW.after_cancel(OVERVIEW_JOB)
+        OVERVIEW_JOB = None
 
-        for item in all_items:
-            GAME.delete(item)
 
-        all_items = []
+def load_thumbnail(stage: int) -> None:
+    """
+    Show the thumbnail of the stage in the overview, then schedule the next one
 
-        if ACTUAL_STAGE == stage:
-            all_items.append(GAME.create_text(10, 10, text=f"Time: {frame['frame']/10}s", fill="purple", font=FONT, anchor="nw"))
+    A stage without log (or with a broken one) keeps its plain cell
+    """
+    global OVERVIEW_JOB
+    OVERVIEW_JOB = None
+    if stage >= len(STAGE_RESULTS):
+        return
 
-            all_items.append(GAME.create_rectangle(int(frame["player"][0]) - TANK_SIZE,
-                                                   int(frame["player"][1]) - TANK_SIZE,
-                                                   int(frame["player"][0]) + TANK_SIZE,
-                                                   int(frame["player"][1]) + TANK_SIZE,
-                                                   fill="blue"))
+    try:
+        THUMBNAILS.append(tk.PhotoImage(file=render_thumbnail(stage, f"{PATH}/logs", f"{PATH}/logs/thumbs", stage_dir=f"{PATH}/stages")))
+    except (OSError, ValueError, tk.TclError):
+        pass
+    else:
+        item: int = GAME.create_image((stage - 1) % 10 * THUMB_CELL[0] + THUMB_CELL[0] // 2,
+                                      (stage - 1) // 10 * THUMB_CELL[1] + THUMB_CELL[1] // 2,
+                                      image=THUMBNAILS[-1], tags=f"stage_{stage}")
+        GAME.tag_lower(item, "number")
 
-        for enemy in frame["enemies"]:
-            if ACTUAL_STAGE != stage:
-                break
-            all_items.append(GAME.create_rectangle(int(enemy[1]) - TANK_SIZE,
-                                                   int(enemy[2]) - TANK_SIZE,
-                                                   int(enemy[1]) + TANK_SIZE,
-                                                   int(enemy[2]) + TANK_SIZE,
-                                                   fill="red"))
-
-        for bullet in frame["player_bullet"]:
-            if ACTUAL_STAGE != stage:
-                break
-            all_items.append(GAME.create_rectangle(int(bullet[0]) - BULLET_SIZE,
-                                                   int(bullet[1]) - BULLET_SIZE,
-                                                   int(bullet[0]) + BULLET_SIZE,
-                                                   int(bullet[1]) + BULLET_SIZE,
-                                                   fill="blue"))
-
-        for bullet in frame["enemy_bullet"]:
-            if ACTUAL_STAGE != stage:
-                break
-            all_items.append(GAME.create_rectangle(int(bullet[0]) - BULLET_SIZE,
-                                                   int(bullet[1]) - BULLET_SIZE,
-                                                   int(bullet[0]) + BULLET_SIZE,
-                                                   int(bullet[1]) + BULLET_SIZE,
-                                                   fill="red"))
+    OVERVIEW_JOB = WINDOW.after(1, load_thumbnail, stage + 1)
 
-        if ACTUAL_STAGE == stage:
-            GAME.update()
-        sleep(0.1)
+
+def show_overview() -> None:
+    """
+    Display every stage in a grid, with the color of its result and the
+    thumbnail of its game (see ModuleRender.render_thumbnail), a click on
+    a stage displays it
+
+    The grid is shown at once, the thumbnails are loaded one by one
+    after it so the window stays responsive
+    """
+    global ACTUAL_STAGE, PLAYBACK
+    ACTUAL_STAGE = 0
+    stop_overview()
+    if PLAYBACK is not None:
+        PLAYBACK.stop()
+        PLAYBACK = None
+    GAME.delete("all")
+    GAME.config(width=800, height=650)
+    THUMBNAILS.clear()
+
+    pos_x: int
+    pos_y: int
+    for stage in range(1, len(STAGE_RESULTS)):
+        pos_x = (stage - 1) % 10 * THUMB_CELL[0]
+        pos_y = (stage - 1) // 10 * THUMB_CELL[1]
+        GAME.create_rectangle(pos_x, pos_y, pos_x + THUMB_CELL[0] - 1, pos_y + THUMB_CELL[1] - 1,
+                              fill=choose_color(STAGE_RESULTS[stage]), outline="white", tags=f"stage_{stage}")
+        GAME.tag_bind(f"stage_{stage}", "<Button-1>", partial(lambda ind, event: stage_display(ind, STAGE_RESULTS[ind]), stage))
+    for stage in range(1, len(STAGE_RESULTS)):
+        GAME.create_text((stage - 1) % 10 * THUMB_CELL[0] + 3, (stage - 1) // 10 * THUMB_CELL[1] + 2, text=stage,
+                         fill="black", font=FONT, anchor="nw", tags=("number", f"stage_{stage}"))
+
+    load_thumbnail(1)
 
 
 def choose_color(result: str) -> str:
@@ -305,7 +613,7 @@ def choose_color(result: str) -> str:
         return "red"
     if result == TIE_MSG:
         return "orange"
-    if result == TIME_OUT_MSG:
+    if result.startswith(TIME_OUT_MSG):
         return "blue"
     return "purple"
 
@@ -314,6 +622,7 @@ def main_preset() -> None:
     """
     Set everything up
     """
+    global STAGE_RESULTS
     try:
         with open(f"{PATH}/logs/all.log", "r", encoding="iso8859") as file:
             stage_res_tmp: List[str] = file.read().split("\n")
@@ -347,6 +656,7 @@ def main_preset() -> None:
 
         ind += 1
 
+    STAGE_RESULTS = stage_res_mess
     stage_res_color: List[str] = [choose_color(res) for res in stage_res_mess]
 
     nb_win: str = str(stage_res_color.count("green"))
@@ -362,6 +672,8 @@ def main_preset() -> None:
     for ind, button in enumerate(BUTTONS):
         button.place(x=850 + (ind % 10) * 35, y=60 + (ind//10) * 35, anchor="nw")
 
+    show_overview()
+
 
 def main() -> None:
     """
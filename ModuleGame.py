@@ -3,10 +3,21 @@ The Main file of the game
 """
 
 
-from os import path, makedirs
-from typing import List, Literal
-from math import sqrt
-from TankLib import Wall, Bullet, Tank, TankAction, StageData
+from os import path, makedirs, remove, getpid
+from argparse import ArgumentParser, Namespace
+from contextlib import ExitStack
+from types import FrameType
+from time import process_time
+from multiprocessing.queues import SimpleQueue
+from dataclasses import dataclass, field
+import signal
+from typing import Dict, List, Literal, Protocol, TextIO
+from math import sqrt, ceil
+from random import Random
+from zlib import crc32
+from TankLib import check_collision, get_wall_map, Wall, WallView, WallGrid, Bullet, Tank, TankAction, StageData, StageView
+from ModuleReplay import ReplayHeader, ReplayWriter, remove_index, write_index
+from ModuleWallMap import get_wall_maps, MAP_DIR
 import ModuleBot
 import ModulePlayer
 
@@ -19,9 +30,132 @@ TANK_SPEED: int = 3
 PLAYER_MAX_BULLET: int = 5
 ENEMY_MAX_BULLET: int = 3
 BOT: int = 1
+PRECISION: float = 10e-6
+# Added to the boxes of the broad phase of the bullets, far more than the errors of the floats
+SWEEP_MARGIN: int = 1
+FLUSH_SIZE: int = 100
+REPLAY: bool = False
+WORLD: bool = False
+CPU_LIMIT: float = 45
+MOVE_LIMIT: float = 1
+# Seconds of wall clock time before game.py kills the worker of a stage,
+# for the time the CPU budget doesn't see (sleeps, blocking calls)
+WALL_LIMIT: float = 2 * CPU_LIMIT
+# To increase when a change of the engine changes the games (see ModuleCache)
+ENGINE_VERSION: int = 3
 PATH: str = path.dirname(path.abspath(__file__))
 
 
+class StageTimeout(BaseException):
+    """
+    The exception raised when a stage goes over its time limit
+
+    Like KeyboardInterrupt, it isn't an Exception so that it can't be
+    caught by an "except Exception" of the player
+    """
+
+    def __init__(self: "StageTimeout", frame: int, what: str, elapsed: float, limit: float) -> None:
+        super().__init__(frame, what, elapsed, limit)
+        self.frame: int = frame
+        self.what: str = what
+        self.elapsed: float = elapsed
+        self.limit: float = limit
+
+    def __str__(self: "StageTimeout") -> str:
+        return f"frame {self.frame}: {self.what} took {self.elapsed:.3f} s of CPU, limit {self.limit:g} s"
+
+
+@dataclass
+class TimeBudget:
+    """
+    The class for the CPU time budget of a stage, in seconds
+
+    The whole stage has stage_limit seconds and each call to the player's
+    move has move_limit seconds. Both are checked after the fact at every
+    frame and, where setitimer exists, the kernel interrupts a stage or a
+    move going over its limit (ITIMER_PROF counts the CPU time
+    of the process, so the other running stages don't matter)
+
+    Only CPU time is counted: a player that sleeps, waits for I/O or
+    stays in a long C call (the signal is only handled back in Python)
+    is not charged and not interrupted. game.py kills the worker of
+    a stage over WALL_LIMIT seconds of wall clock time for these
+    """
+    stage_limit: float = CPU_LIMIT
+    move_limit: float = MOVE_LIMIT
+    start: float = 0
+    frame: int = 0
+    move_start: float | None = None
+
+    def arm(self: "TimeBudget", seconds: float) -> None:
+        """
+        Interrupt the process after seconds of CPU time, then every second
+        in case the exception is caught anyway
+        """
+        if hasattr(signal, "setitimer"):
+            signal.setitimer(signal.ITIMER_PROF, max(seconds, 0.001), 1)
+
+    def disarm(self: "TimeBudget") -> None:
+        """
+        Stop the interruptions
+        """
+        if hasattr(signal, "setitimer"):
+            signal.setitimer(signal.ITIMER_PROF, 0)
+
+    def remaining(self: "TimeBudget") -> float:
+        """
+        The CPU time left for the stage
+        """
+        return self.stage_limit - (process_time() - self.start)
+
+    def get_timeout(self: "TimeBudget") -> StageTimeout:
+        """
+        The exception for the limit that is over (the move first)
+        """
+        now: float = process_time()
+        if self.move_start is not None and now - self.move_start >= self.move_limit:
+            return StageTimeout(self.frame, "move", now - self.move_start, self.move_limit)
+        return StageTimeout(self.frame, "stage", now - self.start, self.stage_limit)
+
+    def check(self: "TimeBudget") -> None:
+        """
+        Raise a StageTimeout if a limit is over
+        """
+        if self.remaining() < 0 or (self.move_start is not None and process_time() - self.move_start > self.move_limit):
+            raise self.get_timeout()
+
+
+BUDGET: TimeBudget | None = None
+# Where the workers of game.py put the number of a stage and their pid when they start it
+STARTED: SimpleQueue | None = None
+
+
+def raise_timeout(signum: int, frame: FrameType | None) -> None:
+    """
+    The signal handler for the CPU time limits of a stage
+    """
+    if BUDGET is not None:
+        raise BUDGET.get_timeout()
+
+
+def timed_move(stage: StageView) -> TankAction:
+    """
+    Call the player's move, within the limit of the budget if there is one
+    """
+    if BUDGET is None:
+        return ModulePlayer.move(stage)
+
+    BUDGET.move_start = process_time()
+    BUDGET.arm(min(BUDGET.move_limit, BUDGET.remaining()))
+
+    action: TankAction = ModulePlayer.move(stage)
+
+    BUDGET.check()
+    BUDGET.move_start = None
+    BUDGET.arm(BUDGET.remaining())
+    return action
+
+
 def check_move(direction: Literal["UP", "DOWN", "LEFT", "RIGHT", "NONE"], tank: Tank, stage: StageData) -> int:
     """
     Check if the move is valid
@@ -47,9 +181,8 @@ def check_move(direction: Literal["UP", "DOWN", "LEFT", "RIGHT", "NONE"], tank:
         if new_pos[1] - tank.size < 0 or new_pos[1] + tank.size > stage.height:
             return i - 1
 
-        for wall in stage.walls:
-            if wall.is_in_wall(new_pos[0], new_pos[1], tank.size, tank.size):
-                return i - 1
+        if get_wall_map(stage, tank.size).collide(new_pos[0], new_pos[1]):
+            return i - 1
 
         for enemy in stage.enemies:
             if enemy != tank and enemy.is_alive and enemy.is_in_tank(new_pos[0], new_pos[1], tank.size, tank.size):
@@ -77,183 +210,634 @@ def make_move(direction: Literal["UP", "DOWN", "LEFT", "RIGHT", "NONE"], tank: T
             tank.pos_x += distance
 
 
-def make_shoot(shoot: bool, direction: tuple[int, int], tank: Tank, stage: StageData) -> None:
+def get_value(bullet: Bullet) -> tuple:
+    """
+    Return what makes the bullet equal to another one
+    """
+    return (bullet.pos_x, bullet.pos_y, tuple(bullet.direction), bullet.size)
+
+
+@dataclass
+class Registry:
+    """
+    The class for the bullets of a game, updated on every shot, move and destruction
+
+    owners: the tank of each bullet, by id of the bullet
+    values: the number of bullets of each value (see get_value)
+
+    Bullets are destructed like list.remove always did: the first bullet
+    equal to the one hit. A bullet alone of its value is the only one equal
+    to itself, so it is found from its id without comparing the bullets
+    """
+    owners: Dict[int, Tank] = field(default_factory=dict)
+    values: Dict[tuple, int] = field(default_factory=dict)
+
+    def add(self: "Registry", bullet: Bullet, tank: Tank) -> None:
+        """
+        Add a bullet just shot by tank
+        """
+        value: tuple = get_value(bullet)
+
+        self.owners[id(bullet)] = tank
+        self.values[value] = self.values.get(value, 0) + 1
+
+    def move(self: "Registry", value: tuple, bullet: Bullet) -> None:
+        """
+        Update a bullet that just moved, of value before the move
+        """
+        self.discard(value)
+        value = get_value(bullet)
+        self.values[value] = self.values.get(value, 0) + 1
+
+    def discard(self: "Registry", value: tuple) -> None:
+        """
+        Forget a bullet of value
+        """
+        if self.values[value] == 1:
+            del self.values[value]
+        else:
+            self.values[value] -= 1
+
+    def get_owner(self: "Registry", bullet: Bullet, stage: StageData) -> Tank:
+        """
+        Return the first tank with a bullet equal to bullet,
+        the player before the enemies
+        """
+        if self.values[get_value(bullet)] == 1:
+            return self.owners[id(bullet)]
+        return next(a for a in [stage.player] + stage.enemies if bullet in a.bullets)
+
+    def remove(self: "Registry", bullet: Bullet, tank: Tank) -> None:
+        """
+        Remove the first bullet equal to bullet from the bullets of tank
+
+        The bullets stay in the order they were shot, as they move and are
+        written in the logs in that order
+        """
+        value: tuple = get_value(bullet)
+
+        if self.values[value] > 1:
+            bullet = next(a for a in tank.bullets if a == bullet)
+        for ind, other in enumerate(tank.bullets):
+            if other is bullet:
+                del tank.bullets[ind]
+                break
+
+        del self.owners[id(bullet)]
+        self.discard(value)
+
+
+def get_registry(stage: StageData) -> Registry:
+    """
+    Get the registry of the bullets of the stage
+    """
+    registry: Registry = Registry()
+
+    for tank in [stage.player] + stage.enemies:
+        for bullet in tank.bullets:
+            registry.add(bullet, tank)
+    return registry
+
+
+def make_shoot(shoot: bool, direction: tuple[int, int], tank: Tank, stage: StageData, registry: Registry) -> None:
     """
     Make the shoot specified in args for tank
     """
     if shoot and len(tank.bullets) < tank.max_bullets and direction != (0, 0):
         bullet: Bullet = Bullet(tank.pos_x, tank.pos_y, direction, stage.bullet_size)
         tank.bullets.append(bullet)
+        registry.add(bullet, tank)
 
 
-def actualize_tanks(stage: StageData) -> None:
+def actualize_tanks(stage: StageData, registry: Registry, previous: StageView, player_previous: StageView) -> None:
     """
     Actualize the tanks
+
+    Bots get a read-only view of the stage, built once per frame from
+    previous and only updated for the tank that just played. The player
+    gets its own view, from player_previous (see StageData.view)
     """
     action: TankAction
+    view: StageView = stage.view(previous)
 
-    for enemy in stage.enemies:
+    for ind, enemy in enumerate(stage.enemies):
         if enemy.is_alive:
-            action = ModuleBot.bot_move(stage.copy(), enemy.copy(), BOT)
+            action = ModuleBot.bot_move(view, view.enemies[ind], BOT)
             make_move(action.direction, enemy, stage)
-            make_shoot(action.shoot, action.shoot_direction, enemy, stage)
+            make_shoot(action.shoot, action.shoot_direction, enemy, stage, registry)
+            view = view.with_enemy(ind, enemy.view())
 
     if stage.player.is_alive:
-        action = ModulePlayer.move(stage.copy())
+        action = timed_move(stage.view(player_previous))
         make_move(action.direction, stage.player, stage)
-        make_shoot(action.shoot, action.shoot_direction, stage.player, stage)
+        make_shoot(action.shoot, action.shoot_direction, stage.player, stage, registry)
 
 
-def get_coordinates(bullet: Bullet, stage: StageData) -> List[tuple[float, float]]:
+def get_steps(bullet: Bullet, stage: StageData) -> tuple[int, tuple[float, float], tuple[float, float]]:
     """
-    Return the coordinates of the bullet for direction during the frame
+    Return the number of positions taken by the bullet during the frame
+    (one per pixel), its unit vector and its last position
     """
-    coords: List[tuple[float, float]] = []
     x: float = 0
     y: float = 0
+    last: tuple[float, float] = (0, 0)
+    nb_steps: int = 0
 
     divider: float = sqrt(bullet.direction[0]**2 + bullet.direction[1]**2)
     unit_vector: tuple[float, float] = (bullet.direction[0] / divider, bullet.direction[1] / divider)
 
     while x**2 + y**2 < stage.bullet_speed**2:
-        coords.append((bullet.pos_x + x, bullet.pos_y + y))
+        last = (x, y)
+        nb_steps += 1
 
         x += unit_vector[0]
         y += unit_vector[1]
 
-    return coords
+    return nb_steps, unit_vector, (bullet.pos_x + last[0], bullet.pos_y + last[1])
 
 
-def bullet_collision(is_player: bool, bullet: Bullet, coord: tuple[float, float], stage: StageData) -> Bullet | Tank | Wall | None:
+def get_border_exit(bullet: Bullet, unit_vector: tuple[float, float], nb_steps: int, stage: StageData) -> int:
     """
-    Return what the bullet collide with if it's a tank or a bullet
+    Return the first step where the bullet goes out of the map,
+    or nb_steps if it stays in
     """
-    for wall in stage.walls:
-        if wall.is_in_wall(coord[0], coord[1], bullet.size, bullet.size):
-            return wall
+    first: int = nb_steps
+    step: int
+
+    for pos, speed, limit in ((bullet.pos_x, unit_vector[0], stage.width), (bullet.pos_y, unit_vector[1], stage.height)):
+        if speed == 0:
+            if pos - bullet.size < 0 or pos + bullet.size > limit:
+                return 0
+            continue
+
+        if speed > 0:
+            step = max(0, ceil((limit - bullet.size - pos) / speed))
+        else:
+            step = max(0, ceil((bullet.size - pos) / speed))
+
+        # The division is only an estimation, the exact step is found
+        # with the same comparison as the border check
+        while step > 0 and (pos + (step - 1) * speed - bullet.size < 0 or pos + (step - 1) * speed + bullet.size > limit):
+            step -= 1
+        while step < first and not (pos + step * speed - bullet.size < 0 or pos + step * speed + bullet.size > limit):
+            step += 1
+
+        first = min(first, step)
+
+    return first
+
+
+def get_time_of_impact(bullet: Bullet, unit_vector: tuple[float, float], nb_steps: int, obj: tuple[int, int, int, int]) -> int:
+    """
+    Return the first step where the bullet collides with obj,
+    or nb_steps if it doesn't before
+
+    obj: (pos_x, pos_y, size_x, size_y) like in check_collision
+
+    The steps overlapping obj on both axis are solved analytically
+    and only the candidates are checked with check_collision
+    """
+    start: float = 0
+    end: float = nb_steps - 1
+    margin: float
+    enter: float
+    leave: float
+
+    for pos, speed, center, size in ((bullet.pos_x, unit_vector[0], obj[0], obj[2]), (bullet.pos_y, unit_vector[1], obj[1], obj[3])):
+        margin = size + bullet.size + PRECISION
+        if speed == 0:
+            if abs(pos - center) > margin:
+                return nb_steps
+            continue
+
+        enter = (center - margin - pos) / speed
+        leave = (center + margin - pos) / speed
+        if enter > leave:
+            enter, leave = leave, enter
+
+        start = max(start, enter)
+        end = min(end, leave)
+        if start > end:
+            return nb_steps
+
+    step: int = max(0, ceil(start - PRECISION))
+    while step < nb_steps and step <= end + PRECISION:
+        if check_collision(obj, (bullet.pos_x + step * unit_vector[0], bullet.pos_y + step * unit_vector[1], bullet.size, bullet.size)):
+            return step
+        step += 1
+
+    return nb_steps
+
+
+@dataclass
+class BroadPhase:
+    """
+    The class for the broad phase of the bullets of the player or of the
+    enemies, built before they move: what they may hit doesn't move
+    while they do
+
+    targets: every tank and bullet the bullets may hit, in the order
+    bullet_moves checks them
+    candidates: the indexes in targets of what each bullet may hit during
+    the frame, by id of the bullet
+    """
+    targets: List[Bullet | Tank] = field(default_factory=list)
+    candidates: Dict[int, List[int]] = field(default_factory=dict)
+
+    def get_targets(self: "BroadPhase", is_player: bool, bullet: Bullet, registry: Registry) -> List[Bullet | Tank]:
+        """
+        Return what the bullet may hit and is still there: dead enemies
+        can't be hit by the player (a dead player still can) and destroyed
+        bullets can't be hit
+        """
+        targets: List[Bullet | Tank] = []
+        target: Bullet | Tank
+
+        for ind in self.candidates[id(bullet)]:
+            target = self.targets[ind]
+            if isinstance(target, Bullet):
+                if id(target) in registry.owners:
+                    targets.append(target)
+            elif target.is_alive or not is_player:
+                targets.append(target)
+        return targets
+
+
+def get_box(obj: Bullet | Tank, reach: tuple[float, float] = (0, 0), margin: int = 0) -> tuple[float, float, float, float]:
+    """
+    Return the box (min_x, max_x, min_y, max_y) of obj moved by reach
+    """
+    return (min(obj.pos_x, obj.pos_x + reach[0]) - obj.size - margin, max(obj.pos_x, obj.pos_x + reach[0]) + obj.size + margin,
+            min(obj.pos_y, obj.pos_y + reach[1]) - obj.size - margin, max(obj.pos_y, obj.pos_y + reach[1]) + obj.size + margin)
+
+
+def get_broad_phase(is_player: bool, stage: StageData) -> BroadPhase:
+    """
+    Get the broad phase of the bullets of the player or of the enemies
+
+    The boxes swept by the bullets during the frame and the boxes of the
+    targets are sorted on x, then swept: only the boxes still open on x
+    are compared on y
+    """
+    movers: List[Bullet]
+    phase: BroadPhase = BroadPhase()
 
     if is_player:
+        movers = list(stage.player.bullets)
         for enemy in stage.enemies:
-            if enemy.is_in_tank(coord[0], coord[1], bullet.size, bullet.size) and enemy.is_alive:
-                return enemy
-            for enemy_bullet in enemy.bullets:
-                if enemy_bullet.is_in_bullet(coord[0], coord[1], bullet.size, bullet.size):
-                    return enemy_bullet
+            phase.targets.append(enemy)
+            phase.targets += enemy.bullets
     else:
-        if stage.player.is_in_tank(coord[0], coord[1], bullet.size, bullet.size):
-            return stage.player
-        for player_bullet in stage.player.bullets:
-            if player_bullet.is_in_bullet(coord[0], coord[1], bullet.size, bullet.size):
-                return player_bullet
+        movers = [a for enemy in stage.enemies for a in enemy.bullets]
+        phase.targets.append(stage.player)
+        phase.targets += stage.player.bullets
+
+    boxes: List[tuple[float, float, float, float, int]] = []
+    divider: float
+
+    # A bullet moves less than the speed of the bullets in a frame
+    for ind, bullet in enumerate(movers):
+        divider = sqrt(bullet.direction[0]**2 + bullet.direction[1]**2) / stage.bullet_speed
+        boxes.append(get_box(bullet, (bullet.direction[0] / divider, bullet.direction[1] / divider), SWEEP_MARGIN) + (-1 - ind,))
+    for ind, target in enumerate(phase.targets):
+        boxes.append(get_box(target) + (ind,))
+    boxes.sort()
+
+    open_movers: List[tuple[float, float, float, float, int]] = []
+    open_targets: List[tuple[float, float, float, float, int]] = []
+    phase.candidates = {id(a): [] for a in movers}
+
+    for box in boxes:
+        open_movers = [a for a in open_movers if a[1] >= box[0]]
+        open_targets = [a for a in open_targets if a[1] >= box[0]]
+        if box[4] < 0:
+            phase.candidates[id(movers[-1 - box[4]])] += [a[4] for a in open_targets if a[2] <= box[3] and box[2] <= a[3]]
+            open_movers.append(box)
+        else:
+            for other in open_movers:
+                if other[2] <= box[3] and box[2] <= other[3]:
+                    phase.candidates[id(movers[-1 - other[4]])].append(box[4])
+            open_targets.append(box)
 
-    return None
+    for candidates in phase.candidates.values():
+        candidates.sort()
+    return phase
 
 
-def bullet_moves(is_player: bool, bullet: Bullet, stage: StageData) -> Bullet | Tank | Wall | None:
+def bullet_moves(bullet: Bullet, targets: List[Bullet | Tank], stage: StageData) -> Bullet | Tank | Wall | WallView | None:
     """
     Return what the bullet collide with
+
+    Every object is swept along the path of the bullet during the frame,
+    the first step wins and on the same step the border, then the walls,
+    then the targets in order win
+
+    targets: the tanks and bullets the bullet may hit (see BroadPhase)
     """
-    coords: List[tuple[float, float]] = get_coordinates(bullet, stage)
-    collision: Bullet | Tank | Wall | None
-    for coord in coords:
-        if coord[0] - bullet.size < 0 or \
-           coord[0] + bullet.size > stage.width or \
-           coord[1] - bullet.size < 0 or \
-           coord[1] + bullet.size > stage.height:
-            return Wall()
+    nb_steps: int
+    unit_vector: tuple[float, float]
+    last: tuple[float, float]
+    nb_steps, unit_vector, last = get_steps(bullet, stage)
+
+    first: int = get_border_exit(bullet, unit_vector, nb_steps, stage)
+    collision: Bullet | Tank | Wall | WallView | None = Wall() if first < nb_steps else None
+    step: int
+
+    for wall in stage.wall_grid.get_walls(min(bullet.pos_x, last[0]) - bullet.size, min(bullet.pos_y, last[1]) - bullet.size,
+                                          max(bullet.pos_x, last[0]) + bullet.size, max(bullet.pos_y, last[1]) + bullet.size):
+        step = get_time_of_impact(bullet, unit_vector, first, (wall.pos_x, wall.pos_y, wall.size_x, wall.size_y))
+        if step < first:
+            first, collision = step, wall
+
+    for target in targets:
+        step = get_time_of_impact(bullet, unit_vector, first, (target.pos_x, target.pos_y, target.size, target.size))
+        if step < first:
+            first, collision = step, target
+
+    if collision is not None:
+        return collision
+
+    bullet.pos_x = round(last[0])
+    bullet.pos_y = round(last[1])
+    return None
 
-        collision = bullet_collision(is_player, bullet, coord, stage)
 
-        if collision is not None:
-            return collision
+@dataclass
+class Roster:
+    """
+    The class for the enemies of a game, updated on every death
 
-    bullet.pos_x = round(coords[-1][0])
-    bullet.pos_y = round(coords[-1][1])
-    return None
+    alive: the enemies alive
+    dead: the dead enemies still in the enemies of the stage,
+    as their bullets are still moving
+    Both are dicts by id of the tank, in the order of the deaths
+    """
+    alive: Dict[int, Tank] = field(default_factory=dict)
+    dead: Dict[int, Tank] = field(default_factory=dict)
+
+    def kill(self: "Roster", tank: Tank) -> None:
+        """
+        Move an enemy that just died to the dead enemies
+        """
+        if self.alive.pop(id(tank), None) is not None:
+            self.dead[id(tank)] = tank
 
+    def remove_dead(self: "Roster", stage: StageData) -> None:
+        """
+        Remove from the enemies of the stage the dead enemies without bullets
+        """
+        removed: List[int] = [a for a, b in self.dead.items() if not b.bullets]
 
-def bullet_destruct(bullet: Bullet, tank: Tank, stage: StageData, collision: Bullet | Tank | Wall, special: List[str]) -> None:
+        if removed:
+            for key in removed:
+                del self.dead[key]
+            stage.enemies[:] = [a for a in stage.enemies if id(a) not in removed]
+
+
+def get_roster(stage: StageData) -> Roster:
+    """
+    Get the roster of the enemies of the stage
+    """
+    roster: Roster = Roster()
+
+    for enemy in stage.enemies:
+        if enemy.is_alive:
+            roster.alive[id(enemy)] = enemy
+        else:
+            roster.dead[id(enemy)] = enemy
+    return roster
+
+
+def bullet_destruct(bullet: Bullet, tank: Tank, stage: StageData, collision: Bullet | Tank | Wall | WallView, special: List[str],
+                    roster: Roster, registry: Registry) -> None:
     """
     Destruct the bullet
     """
-    tank.bullets.remove(bullet)
+    registry.remove(bullet, tank)
 
     if isinstance(collision, Bullet):
-        if collision in stage.player.bullets:
-            stage.player.bullets.remove(collision)
-        else:
-            for enemy in stage.enemies:
-                if collision in enemy.bullets:
-                    enemy.bullets.remove(collision)
-                    break
+        registry.remove(collision, registry.get_owner(collision, stage))
 
     if isinstance(collision, Tank):
         collision.is_alive = False
+        roster.kill(collision)
         special.append(f"Death: {collision.name}")
 
 
-def actualize_bullets(stage: StageData, special: List[str]) -> None:
+def move_bullets(is_player: bool, tank: Tank, stage: StageData, special: List[str], roster: Roster, registry: Registry,
+                 phase: BroadPhase) -> None:
     """
-    Actualize the bullets
+    Move or destruct the bullets of the tank, in the order they were shot
+
+    A bullet right after a destroyed one only moves on the next frame,
+    as the list was always iterated while its bullets were removed
     """
-    collision: Bullet | Tank | Wall | None
+    collision: Bullet | Tank | Wall | WallView | None
+    bullet: Bullet
+    value: tuple
+    ind: int = 0
+
+    while ind < len(tank.bullets):
+        bullet = tank.bullets[ind]
+        value = get_value(bullet)
+        collision = bullet_moves(bullet, phase.get_targets(is_player, bullet, registry), stage)
+
+        if collision is None:
+            registry.move(value, bullet)
+        else:
+            bullet_destruct(bullet, tank, stage, collision, special, roster, registry)
+        ind += 1
 
-    for bullet in stage.player.bullets:
-        collision = bullet_moves(True, bullet, stage)
 
-        if collision is not None:
-            bullet_destruct(bullet, stage.player, stage, collision, special)
+def actualize_bullets(stage: StageData, special: List[str], roster: Roster, registry: Registry) -> None:
+    """
+    Actualize the bullets
+    """
+    move_bullets(True, stage.player, stage, special, roster, registry, get_broad_phase(True, stage))
 
+    phase: BroadPhase = get_broad_phase(False, stage)
     for enemy in stage.enemies:
-        for bullet in enemy.bullets:
-            collision = bullet_moves(False, bullet, stage)
+        move_bullets(False, enemy, stage, special, roster, registry, phase)
+
+
+class LogWriter(Protocol):
+    """
+    The methods print_header and print_log use to write a log, of
+    FrameLog or of ModuleBatch.GameLog
+    """
+
+    def write(self: "LogWriter", text: str) -> None:
+        ...
+
+    def start_frame(self: "LogWriter") -> None:
+        ...
+
+    def end_frame(self: "LogWriter") -> None:
+        ...
+
+
+class FrameLog:
+    """
+    The class for the log file of a stage
 
-            if collision is not None:
-                bullet_destruct(bullet, enemy, stage, collision, special)
+    The file stays open for the whole game and the frames are kept in memory
+    until flush_size frames are waiting, the buffer is always flushed
+    when the log is closed, even on error
+
+    The offset of every frame is kept for the frame index of the log
+    (see ModuleReplay), written when it is closed. The lines end with
+    a bare newline on every system so that the offsets are the ones
+    of the characters written
+    """
+
+    def __init__(self: "FrameLog", log_file: str, flush_size: int = FLUSH_SIZE) -> None:
+        remove_index(log_file)
+        self.log_file: str = log_file
+        self.file: TextIO = open(log_file, "w", encoding="iso8859", newline="\n")
+        self.flush_size: int = flush_size
+        self.buffer: List[str] = []
+        self.nb_frames: int = 0
+        self.position: int = 0
+        self.offsets: List[int] = []
+
+    def __enter__(self: "FrameLog") -> "FrameLog":
+        return self
+
+    def __exit__(self: "FrameLog", *args: object) -> None:
+        self.close()
+
+    def write(self: "FrameLog", text: str) -> None:
+        """
+        Add text to the buffer
+        """
+        self.buffer.append(text)
+        self.position += len(text)
+
+    def start_frame(self: "FrameLog") -> None:
+        """
+        Mark the start of a frame
+        """
+        self.offsets.append(self.position)
+
+    def end_frame(self: "FrameLog") -> None:
+        """
+        Mark the end of a frame, flush if enough frames are waiting
+        """
+        self.nb_frames += 1
+        if self.nb_frames >= self.flush_size:
+            self.flush()
+
+    def flush(self: "FrameLog") -> None:
+        """
+        Write the buffer in the file
+        """
+        self.file.write("".join(self.buffer))
+        self.file.flush()
+        self.buffer.clear()
+        self.nb_frames = 0
+
+    def close(self: "FrameLog") -> None:
+        """
+        Flush the buffer, close the file and write its frame index
+        """
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+            write_index(self.log_file, self.offsets, self.position)
+
+
+def print_header(stage: StageData, log: LogWriter) -> None:
+    """
+    Print the header of the log of the stage
+    """
+    log.write(f"Dimension: {stage.width} {stage.height}\n")
+    log.write(f"TankSize: {TANK_SIZE}\n")
+    log.write(f"BulletSize: {BULLET_SIZE}\n")
+    log.write(f"Seed: {stage.seed}\n")
+    for wall in stage.walls:
+        log.write(f"Wall: {wall.pos_x} {wall.pos_y} {wall.size_x} "
+                  f"{wall.size_y}\n")
+    log.write("---------------------------------\n")
 
 
-def print_log(stage: StageData, log_file: str, special: List[str]) -> None:
+def print_log(stage: StageData | StageView, log: LogWriter, special: List[str]) -> None:
     """
     Print the log of the stage
     """
-    with open(log_file, "a", encoding="iso8859") as f:
-        f.write(f"Frame: {stage.current_frame}\n")
+    log.start_frame()
+    log.write(f"Frame: {stage.current_frame}\n")
 
-        if stage.player.is_alive:
-            f.write(f"Player: {stage.player.pos_x} {stage.player.pos_y}\n")
-        else:
-            f.write("Player: -100 -100\n")
+    if stage.player.is_alive:
+        log.write(f"Player: {stage.player.pos_x} {stage.player.pos_y}\n")
+    else:
+        log.write("Player: -100 -100\n")
 
-        for enemy in stage.enemies:
-            if enemy.is_alive:
-                f.write(f"Enemy: {enemy.name} {enemy.pos_x} {enemy.pos_y}\n")
+    for enemy in stage.enemies:
+        if enemy.is_alive:
+            log.write(f"Enemy: {enemy.name} {enemy.pos_x} {enemy.pos_y}\n")
 
-        for bullet in stage.player.bullets:
-            f.write(f"Player_Bullet: {bullet.pos_x} {bullet.pos_y}\n")
+    for bullet in stage.player.bullets:
+        log.write(f"Player_Bullet: {bullet.pos_x} {bullet.pos_y}\n")
 
-        for enemy in stage.enemies:
-            for bullet in enemy.bullets:
-                f.write(f"Enemy_Bullet: {bullet.pos_x} {bullet.pos_y}\n")
+    for enemy in stage.enemies:
+        for bullet in enemy.bullets:
+            log.write(f"Enemy_Bullet: {bullet.pos_x} {bullet.pos_y}\n")
+
+    for spec in special:
+        log.write(f"{spec}\n")
+
+    log.write("---------------------------------\n")
+    log.end_frame()
+
+
+def print_replay(stage: StageData | StageView, replay: ReplayWriter, special: List[str]) -> None:
+    """
+    Print the frame of the stage in the binary replay
+    """
+    player: tuple[int, int] = (-100, -100)
+    if stage.player.is_alive:
+        player = (stage.player.pos_x, stage.player.pos_y)
+
+    replay.write_frame(player,
+                       [(enemy.name, enemy.pos_x, enemy.pos_y) for enemy in stage.enemies if enemy.is_alive],
+                       [(bullet.pos_x, bullet.pos_y) for bullet in stage.player.bullets],
+                       [(bullet.pos_x, bullet.pos_y) for enemy in stage.enemies for bullet in enemy.bullets],
+                       [spec[len("Death: "):] for spec in special if spec.startswith("Death: ")])
 
-        for spec in special:
-            f.write(f"{spec}\n")
 
-        f.write("---------------------------------\n")
+def get_replay_header(stage: StageData) -> ReplayHeader:
+    """
+    Get the header of the binary replay of the stage
+    """
+    return ReplayHeader(stage.width, stage.height, TANK_SIZE, BULLET_SIZE,
+                        [(wall.pos_x, wall.pos_y, wall.size_x, wall.size_y) for wall in stage.walls],
+                        [stage.player.name] + [enemy.name for enemy in stage.enemies], stage.seed)
 
 
-def get_stage_data(file: str) -> StageData:
+def get_default_seed(text: str) -> int:
+    """
+    Get the seed of a stage file without a Seed line,
+    the same stage always gets the same seed
+    """
+    return crc32(text.encode("iso8859"))
+
+
+def get_stage_data(file: str, map_dir: str = MAP_DIR) -> StageData:
     """
     Get the stage data
+
+    map_dir: the folder of the cache of the maps of the walls (see ModuleWallMap)
     """
     global BOT
 
     with open(file, "r", encoding="iso8859") as f:
-        lines: List[str] = f.readlines()
+        text: str = f.read()
+    lines: List[str] = text.splitlines()
 
     stage: StageData = StageData([], [], Tank(), 0, 0, 0, NB_FRAME,
                                  BULLET_SIZE, TANK_SIZE, BULLET_SPEED,
                                  TANK_SPEED, PLAYER_MAX_BULLET,
-                                 ENEMY_MAX_BULLET)
+                                 ENEMY_MAX_BULLET, seed=get_default_seed(text))
     data: List[str]
 
     for line in lines:
@@ -277,77 +861,162 @@ def get_stage_data(file: str) -> StageData:
                 stage.enemies.append(Tank(True, data[1], int(data[2]), int(data[3]), stage.tank_size, stage.enemy_max_bullet, []))
             case "Bot:":
                 BOT = int(data[1])
+            case "Seed:":
+                stage.seed = int(data[1])
+
+    stage.wall_grid = WallGrid(stage.walls, stage.width, stage.height)
+    stage.wall_maps = get_wall_maps(stage, text, [stage.tank_size, stage.bullet_size], map_dir)
+    stage.rng = Random(stage.seed)
 
     return stage
 
 
-def check_end(stage: StageData) -> bool:
+def check_end(stage: StageData, roster: Roster) -> bool:
     """
     Check if the game is finished
     """
     if not stage.player.is_alive:
         return True
-    if not any(enemy.is_alive for enemy in stage.enemies):
+    if not roster.alive:
         return True
     if stage.current_frame > stage.max_frame:
         return True
     return False
 
 
-def main(stage_nb: int) -> str:
+def play(stage_data: StageData, log: FrameLog, replay_log: ReplayWriter | None = None) -> str:
+    """
+    Play the stage until the end and return the result
+    """
+    special_action: List[str] = []
+    finished: bool = False
+    walls_view: StageView = stage_data.view()
+    player_view: StageView = stage_data.view()
+    roster: Roster = get_roster(stage_data)
+    registry: Registry = get_registry(stage_data)
+    result: str = "GAME OVER"
+
+    print_header(stage_data, log)
+
+    while not finished:
+        if BUDGET is not None:
+            BUDGET.frame = stage_data.current_frame
+        roster.remove_dead(stage_data)
+        actualize_tanks(stage_data, registry, walls_view, player_view)
+        actualize_bullets(stage_data, special_action, roster, registry)
+        print_log(stage_data, log, special_action)
+        if BUDGET is not None:
+            BUDGET.check()
+        if replay_log is not None:
+            print_replay(stage_data, replay_log, special_action)
+        stage_data.current_frame += 1
+        special_action.clear()
+        finished = check_end(stage_data, roster)
+
+    if stage_data.current_frame > stage_data.max_frame:
+        result = "TIE"
+    elif stage_data.player.is_alive:
+        result = "WINNER"
+
+    return result
+
+
+def main(stage_nb: int, replay: bool = REPLAY, stage_dir: str = f"{PATH}/stages", log_dir: str = f"{PATH}/logs",
+         world: bool = WORLD, map_dir: str = MAP_DIR) -> str:
     """
     The main function of the game
+
+    replay: if True, write the binary replay of the stage alongside the log
+    stage_dir and log_dir: the folders of the stage files and of the logs
+    world: if True, play with the array engine of ModuleWorld (needs numpy)
+    map_dir: the folder of the cache of the maps of the walls
     """
-    stage_dir: str = f"{PATH}/stages"
     stage_file: str = f"{stage_dir}/stage_{stage_nb}.in"
-    log_file: str = f"{PATH}/logs/stage_{stage_nb}.log"
-    special_action: List[str] = []
+    log_file: str = f"{log_dir}/stage_{stage_nb}.log"
+    replay_file: str = f"{log_dir}/stage_{stage_nb}.replay"
 
-    makedirs(f"{PATH}/logs", exist_ok=True)
+    makedirs(log_dir, exist_ok=True)
 
     if not path.isfile(stage_file):
         return "Stage not found"
 
-    stage_data: StageData = get_stage_data(stage_file)
+    stage_data: StageData = get_stage_data(stage_file, map_dir)
+    ModuleBot.reset()
 
-    with open(log_file, "w", encoding="iso8859") as file:
-        file.write(f"Dimension: {stage_data.width} {stage_data.height}\n")
-        file.write(f"TankSize: {TANK_SIZE}\n")
-        file.write(f"BulletSize: {BULLET_SIZE}\n")
-        for wall in stage_data.walls:
-            file.write(f"Wall: {wall.pos_x} {wall.pos_y} {wall.size_x} "
-                       f"{wall.size_y}\n")
-        file.write("---------------------------------\n")
+    result: str
+    replay_log: ReplayWriter | None = None
 
-    finished: bool = False
+    if not replay and path.isfile(replay_file):
+        remove(replay_file)
 
-    while not finished:
-        for enemy in stage_data.enemies:
-            if not enemy.is_alive and not enemy.bullets:
-                stage_data.enemies.remove(enemy)
-        actualize_tanks(stage_data)
-        actualize_bullets(stage_data, special_action)
-        print_log(stage_data, log_file, special_action)
-        stage_data.current_frame += 1
-        special_action.clear()
-        finished = check_end(stage_data)
+    with ExitStack() as stack:
+        log: FrameLog = stack.enter_context(FrameLog(log_file))
+        if replay:
+            replay_log = stack.enter_context(ReplayWriter(replay_file, get_replay_header(stage_data)))
 
-    result: str = "GAME OVER"
+        if world:
+            # Imported only here, numpy is only needed for this engine
+            import ModuleWorld
+            result = ModuleWorld.play(stage_data, log, replay_log)
+        else:
+            result = play(stage_data, log, replay_log)
 
-    if stage_data.current_frame > stage_data.max_frame:
-        result = "TIE"
-    elif stage_data.player.is_alive:
-        result = "WINNER"
+        log.write(f"Result: {result}\n")
+        if replay_log is not None:
+            replay_log.write_result(result)
 
-    with open(log_file, "a", encoding="iso8859") as file:
-        file.write(f"Result: {result}\n")
     return result
 
 
+def set_started(queue: SimpleQueue) -> None:
+    """
+    The initializer of the workers of game.py, see STARTED
+    """
+    global STARTED
+    STARTED = queue
+
+
+def run_stage(stage_nb: int, replay: bool = REPLAY, cpu_limit: float = CPU_LIMIT, move_limit: float = MOVE_LIMIT,
+              world: bool = WORLD) -> tuple[int, str]:
+    """
+    Run a stage within a budget of CPU time, for the workers of game.py
+
+    A stage over its budget gives "TIME OUT (<reason>)", see StageTimeout.
+    The budget only counts CPU time, the wall clock time is limited by
+    game.py (see TimeBudget)
+    """
+    global BUDGET
+    result: str
+
+    if STARTED is not None:
+        STARTED.put((stage_nb, getpid()))
+    BUDGET = TimeBudget(cpu_limit, move_limit, process_time())
+    if hasattr(signal, "setitimer"):
+        signal.signal(signal.SIGPROF, raise_timeout)
+    BUDGET.arm(cpu_limit)
+
+    try:
+        result = main(stage_nb, replay, world=world)
+    except StageTimeout as timeout:
+        result = f"TIME OUT ({timeout})"
+    except Exception as e:
+        result = f"Error: {e}"
+    finally:
+        BUDGET.disarm()
+        BUDGET = None
+
+    return stage_nb, result
+
+
 if __name__ == "__main__":
+    PARSER: ArgumentParser = ArgumentParser()
+    PARSER.add_argument("--replay", type=bool, default=False, help="If True, write binary replays alongside the logs")
+    PARSER.add_argument("--world", type=bool, default=False, help="If True, play with the array engine of ModuleWorld (needs numpy)")
+    ARGS: Namespace = PARSER.parse_known_args()[0]
+
     for STAGE_INDEX in range(1, 101):
         try:
-            RESULT = main(STAGE_INDEX)
+            RESULT = main(STAGE_INDEX, ARGS.replay, world=ARGS.world)
         except Exception as e:
             RESULT = f"Error: {e}"
         with open(f"{PATH}/logs/all.log", "a", encoding="iso8859") as f:
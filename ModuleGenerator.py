@@ -4,7 +4,7 @@ Make stage file
 
 
 from os import makedirs, path
-from random import randint
+from random import Random, randrange
 from typing import List
 from math import ceil
 from TankLib import Wall, Tank
@@ -26,16 +26,24 @@ def check_wall_in_walls(x: int, y: int, size_x: int, size_y: int, walls: list[Wa
     return False
 
 
-def generate_stage(i: int) -> None:
+def generate_stage(i: int, seed: int | None = None, file_name: str | None = None) -> None:
     """
     Generate a stage
+
+    The same seed always gives the same stage, it is written in the stage
+    file to seed the bots and the player (default: a random seed)
+    file_name: the stage file (default: stage_<i>.in in the stages folder)
     """
+    if seed is None:
+        seed = randrange(2**32)
+
+    rng: Random = Random(seed)
     walls: List[Wall] = []
     player: Tank = Tank()
     enemies: List[Tank] = []
-    width: int = randint(450, 800)
-    height: int = randint(450, 650)
-    nb_walls: int = randint(3, 15)
+    width: int = rng.randint(450, 800)
+    height: int = rng.randint(450, 650)
+    nb_walls: int = rng.randint(3, 15)
     nb_enemies: int
     x: int
     y: int
@@ -53,32 +61,32 @@ def generate_stage(i: int) -> None:
         nb_enemies = 7
 
     while len(walls) < nb_walls:
-        size_x = randint(75 // nb_walls, round(width / (nb_walls * 1.5)))
-        size_y = randint(75 // nb_walls, round(height / (nb_walls * 1.5)))
-        x = randint(size_x, width - size_x)
-        y = randint(size_y, height - size_y)
+        size_x = rng.randint(75 // nb_walls, round(width / (nb_walls * 1.5)))
+        size_y = rng.randint(75 // nb_walls, round(height / (nb_walls * 1.5)))
+        x = rng.randint(size_x, width - size_x)
+        y = rng.randint(size_y, height - size_y)
         if size_x * size_y < width * height / (nb_walls * 4):
             if not check_wall_in_walls(x, y, size_x, size_y, walls):
                 walls.append(Wall(x, y, size_x, size_y))
 
     while True:
-        x = randint(TANK_SIZE + 1, width - TANK_SIZE - 1)
-        y = randint(TANK_SIZE + 1, height - TANK_SIZE - 1)
+        x = rng.randint(TANK_SIZE + 1, width - TANK_SIZE - 1)
+        y = rng.randint(TANK_SIZE + 1, height - TANK_SIZE - 1)
         if not any(wall.is_in_wall(x, y, TANK_SIZE, TANK_SIZE) for wall in walls):
             player.pos_x = x
             player.pos_y = y
             break
 
     while len(enemies) < nb_enemies:
-        x = randint(TANK_SIZE + 1, width - TANK_SIZE - 1)
-        y = randint(TANK_SIZE + 1, height - TANK_SIZE - 1)
+        x = rng.randint(TANK_SIZE + 1, width - TANK_SIZE - 1)
+        y = rng.randint(TANK_SIZE + 1, height - TANK_SIZE - 1)
         if not any(wall.is_in_wall(x, y, TANK_SIZE, TANK_SIZE) for wall in walls) and not any(enemy.is_in_tank(x, y, TANK_SIZE, TANK_SIZE) for enemy in enemies) and not player.is_in_tank(x, y, TANK_SIZE * 11, TANK_SIZE * 11):
-            enemies.append(Tank(LIST_NAME[0], x, y, TANK_SIZE))
-            LIST_NAME.append(LIST_NAME.pop(0))
+            enemies.append(Tank(True, LIST_NAME[len(enemies) % len(LIST_NAME)], x, y, TANK_SIZE))
 
-    with open(f"{STAGE_DIR}/stage_{i}.in", "w", encoding="iso8859") as file:
+    with open(file_name or f"{STAGE_DIR}/stage_{i}.in", "w", encoding="iso8859") as file:
         file.write(f"Dimension: {width} {height}\n")
         file.write(f"Bot: {((i - 1) // 10) + 1}\n")
+        file.write(f"Seed: {seed}\n")
         for wall in walls:
             file.write(f"Wall: {wall.pos_x} {wall.pos_y} {wall.size_x} {wall.size_y}\n")
         file.write(f"Player: {player.pos_x} {player.pos_y}\n")
@@ -6,7 +6,7 @@ The module for the player
 import TankLib
 
 
-def move(stage: TankLib.StageData) -> TankLib.TankAction:
+def move(stage: TankLib.StageView) -> TankLib.TankAction:
     """
     The function for the movement
     Need to return a tuple who specify action to do for player's tank
@@ -15,5 +15,8 @@ def move(stage: TankLib.StageData) -> TankLib.TankAction:
 
     # TODO: Write your code here
     # You can use the stage variable to get all informations about the stage
+    # It is read-only (see TankLib.StageView): tuples instead of lists, and
+    # stage.copy() gives a modifiable StageData if you need one
+    # stage.rng is your own random generator, seeded from the stage
 
     return player_s_action
@@ -0,0 +1,281 @@
+"""
+The module with the rays, for the bots and the players
+
+A ray is the path of a bullet moved pixel by pixel: its unit vector is
+added to its position at every step, like the bots and the sample player
+always did. No list of the positions is made: the position of a step is
+computed when it is needed, with the same additions going on from the last
+step computed, so they are the same numbers. They only move one way on
+each axis, so the first step where the bullet reaches a point, a wall or
+the border is estimated on the line of the ray, then found from a few steps
+before. Only the walls of the cells of the wall grid crossed by the ray are
+tested, cell after cell (traversal of Amanatides and Woo), until the cells
+are past the first hit
+"""
+
+
+from functools import reduce
+from itertools import repeat
+from operator import add
+from dataclasses import dataclass
+from math import sqrt, inf
+from typing import Callable, Dict, Iterator, List, Set
+from TankLib import is_lower_equal, StageData, StageView, Wall, WallView, WallGrid
+
+
+# The steps before the estimated one where a search starts, for the
+# rounding of the additions
+MARGIN: int = 2
+
+
+@dataclass(frozen=True, slots=True)
+class RayHit:
+    """
+    The class for the first thing hit by a ray
+
+    step: the number of steps before the hit
+    distance: the distance from the start of the ray to the hit
+    wall: the wall hit, None for the border of the map
+    """
+    step: int = 0
+    distance: float = 0
+    wall: Wall | WallView | None = None
+
+
+def get_lower_step(pos: int, speed: float, value: float) -> int:
+    """
+    Return a step before the first one where a position going from pos at
+    speed reaches value, estimated on the line of the ray
+    (0 if it is already reached or never is)
+    """
+    return max(int((value - pos) / speed) - MARGIN, 0) if speed else 0
+
+
+def is_entered(value: float, speed: float, center: int, size: int) -> bool:
+    """
+    Return if a position going at speed is within size of center, with
+    the test of check_collision, or past it
+    """
+    return (speed > 0 and value >= center) or (speed < 0 and value <= center) or is_lower_equal(abs(center - value), size)
+
+
+class Ray:
+    """
+    The class for the positions of a bullet moved pixel by pixel
+    from start in direction, until it leaves the map
+
+    nb_steps: enough steps to be out of the map on one axis
+    border: the first step out of the map, None until it is needed (see get_border)
+    step, position: the last step computed and its position (see get_position)
+    """
+
+    def __init__(self: "Ray", stage: StageData | StageView, start: tuple[int, int], direction: tuple[int, int], size: int) -> None:
+        divider: float = sqrt(direction[0]**2 + direction[1]**2)
+
+        self.stage: StageData | StageView = stage
+        self.start: tuple[int, int] = start
+        self.size: int = size
+        self.unit_vector: tuple[float, float] = (direction[0] / divider, direction[1] / divider)
+        self.step: int = 0
+        self.position: tuple[float, float] = start
+
+        self.nb_steps: int = max(stage.width, stage.height) * 2 + 3
+        for pos, speed, limit in ((start[0], self.unit_vector[0], stage.width), (start[1], self.unit_vector[1], stage.height)):
+            if speed > 0:
+                self.nb_steps = min(self.nb_steps, max(int((limit - pos) / speed), 0) + 3)
+            elif speed < 0:
+                self.nb_steps = min(self.nb_steps, max(int(pos / -speed), 0) + 3)
+
+        self.border: int | None = None
+
+    def get_position(self: "Ray", step: int) -> tuple[float, float]:
+        """
+        Return the position after step steps: the unit vector added step
+        times to start, going on from the last step computed if it is not
+        after step
+        """
+        if step < self.step:
+            self.step, self.position = 0, self.start
+        if step > self.step:
+            self.position = (reduce(add, repeat(self.unit_vector[0], step - self.step), self.position[0]),
+                             reduce(add, repeat(self.unit_vector[1], step - self.step), self.position[1]))
+            self.step = step
+        return self.position
+
+    def find_step(self: "Ray", reached: Callable[[float, float], bool], low: int, high: int) -> int:
+        """
+        Return the first step before high where reached is true for the
+        position, or high if it never is, reached being false then true
+
+        low: a step before the first one, estimated (the search starts from
+        the first step if reached is already true at low)
+        """
+        if low >= high:
+            return high
+        if low > 0 and reached(*self.get_position(low)):
+            low = 0
+        while low < high and not reached(*self.get_position(low)):
+            low += 1
+        return low
+
+    def is_in_map(self: "Ray", step: int) -> bool:
+        """
+        Return if the position of the step is in the map
+        """
+        pos_x: float
+        pos_y: float
+        pos_x, pos_y = self.get_position(step)
+        return 0 <= pos_x <= self.stage.width and 0 <= pos_y <= self.stage.height
+
+    def get_border(self: "Ray") -> int:
+        """
+        Return the first step out of the map, computed once (see get_border_step)
+        """
+        if self.border is None:
+            self.border = self.get_border_step()
+        return self.border
+
+    def get_border_step(self: "Ray") -> int:
+        """
+        Return the first step out of the map, or the number of steps if the ray stays in
+        """
+        width: int = self.stage.width
+        height: int = self.stage.height
+        low: int = self.nb_steps
+
+        for pos, speed, limit in ((self.start[0], self.unit_vector[0], width), (self.start[1], self.unit_vector[1], height)):
+            if pos < 0 or pos > limit:
+                return 0
+            if speed:
+                low = min(low, get_lower_step(pos, speed, limit if speed > 0 else 0))
+
+        return self.find_step(lambda x, y: x < 0 or x > width or y < 0 or y > height, low, self.nb_steps)
+
+    def get_end_step(self: "Ray", final: tuple[int, int]) -> int:
+        """
+        Return the first step where the ray reached final on both axis
+        (it is past it or on it), or the number of steps if it never does
+        """
+        forward: tuple[bool, bool] = (self.unit_vector[0] > 0, self.unit_vector[1] > 0)
+        low: int = 0
+
+        for pos, speed, limit in ((self.start[0], self.unit_vector[0], final[0]), (self.start[1], self.unit_vector[1], final[1])):
+            if speed == 0 and limit < pos:
+                return self.nb_steps
+            low = max(low, get_lower_step(pos, speed, limit))
+
+        return self.find_step(lambda x, y: (x >= final[0] if forward[0] else x <= final[0]) and
+                              (y >= final[1] if forward[1] else y <= final[1]), low, self.nb_steps)
+
+    def get_box_step(self: "Ray", box: tuple[int, int, int, int], end: int) -> int:
+        """
+        Return the first step before end where the bullet collides with box,
+        or end if it doesn't before
+
+        box: (pos_x, pos_y, size_x, size_y) like in check_collision
+        """
+        speed_x: float
+        speed_y: float
+        speed_x, speed_y = self.unit_vector
+        size_x: int = box[2] + self.size
+        size_y: int = box[3] + self.size
+        low: int = 0
+        pos_x: float
+        pos_y: float
+
+        for pos, speed, center, size in ((self.start[0], speed_x, box[0], size_x), (self.start[1], speed_y, box[1], size_y)):
+            if speed == 0 and not is_lower_equal(abs(center - pos), size):
+                return end
+            low = max(low, get_lower_step(pos, speed, center - size if speed > 0 else center + size))
+
+        # The bullet gets closer to the box then farther from it on each
+        # axis, so it collides at the first step where it entered both
+        first: int = self.find_step(lambda x, y: is_entered(x, speed_x, box[0], size_x) and is_entered(y, speed_y, box[1], size_y),
+                                    low, end)
+        if first < end:
+            pos_x, pos_y = self.get_position(first)
+            if is_lower_equal(abs(box[0] - pos_x), size_x) and is_lower_equal(abs(box[1] - pos_y), size_y):
+                return first
+        return end
+
+    def get_walls(self: "Ray") -> Iterator[tuple[float, List[Wall | WallView]]]:
+        """
+        Walk the cells of the wall grid crossed by the ray, in order, and
+        give for each the step where the ray enters it and the walls not
+        given yet of the cells around it that the size of the bullet
+        reaches, in the order of the walls list
+        """
+        grid: WallGrid = self.stage.wall_grid
+        cell_size: int = grid.cell_size
+        reach: int = (self.size + 1) // cell_size + 1
+        col: int = int(self.start[0] // cell_size)
+        row: int = int(self.start[1] // cell_size)
+        step: tuple[int, int] = (1 if self.unit_vector[0] > 0 else -1, 1 if self.unit_vector[1] > 0 else -1)
+        seen_cells: Set[int] = set()
+        seen_walls: Set[int] = set()
+        cells: List[int]
+        walls: List[Wall | WallView]
+
+        # Steps at which the next column and the next row are crossed
+        next_col: float = ((col + (step[0] > 0)) * cell_size - self.start[0]) / self.unit_vector[0] if self.unit_vector[0] else inf
+        next_row: float = ((row + (step[1] > 0)) * cell_size - self.start[1]) / self.unit_vector[1] if self.unit_vector[1] else inf
+        delta_col: float = cell_size / abs(self.unit_vector[0]) if self.unit_vector[0] else inf
+        delta_row: float = cell_size / abs(self.unit_vector[1]) if self.unit_vector[1] else inf
+        entry: float = 0
+
+        while entry < self.nb_steps:
+            cells = [around_row * grid.cols + around_col
+                     for around_row in range(max(row - reach, 0), min(row + reach, grid.rows - 1) + 1)
+                     for around_col in range(max(col - reach, 0), min(col + reach, grid.cols - 1) + 1)
+                     if around_row * grid.cols + around_col not in seen_cells]
+            seen_cells.update(cells)
+            walls = [a for a in grid.get_cell_walls(cells) if id(a) not in seen_walls]
+            seen_walls.update(id(a) for a in walls)
+            yield entry, walls
+
+            if next_col < next_row:
+                entry = next_col
+                col += step[0]
+                next_col += delta_col
+            else:
+                entry = next_row
+                row += step[1]
+                next_row += delta_row
+
+    def cast(self: "Ray", end: int | None = None) -> RayHit | None:
+        """
+        Return the first wall or border hit before end (default: until out
+        of the map), on the same step a wall before the border and the first
+        wall of the walls list before the others, or None
+        """
+        inside: bool = False
+        limit: int
+        order: Dict[int, int] = self.stage.wall_grid.order
+        hit: Wall | WallView | None = None
+        step: int
+        pos_x: float
+        pos_y: float
+
+        # The ray leaves the map once for all, so it is still in before end
+        # if it is in at the start and at the step before end
+        if end is not None and (end <= 0 or (self.is_in_map(0) and self.is_in_map(end - 1))):
+            inside, limit = True, end
+        else:
+            limit = self.get_border() + 1 if end is None else min(end, self.get_border() + 1)
+
+        for entry, walls in self.get_walls():
+            # A wall first met in a cell entered after the hit is hit after it
+            if entry > limit + 1:
+                break
+            for wall in walls:
+                step = self.get_box_step((wall.pos_x, wall.pos_y, wall.size_x, wall.size_y), limit + (hit is not None))
+                if step < limit or (hit is not None and step == limit and order[id(wall)] < order[id(hit)]):
+                    limit, hit = step, wall
+
+        if hit is None:
+            if inside or (end is not None and end <= self.get_border()):
+                return None
+            limit = self.get_border()
+
+        pos_x, pos_y = self.get_position(limit)
+        return RayHit(limit, sqrt((pos_x - self.start[0])**2 + (pos_y - self.start[1])**2), hit)
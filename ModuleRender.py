@@ -0,0 +1,470 @@
+"""
+The module for the rendering of the games without a display
+
+The frames of a log (or of a binary replay) are drawn straight into a
+buffer of RGB pixels, like ModuleDisplay draws them on its canvas, and
+written as PNG images or as one animated PNG (APNG) per stage. Only zlib
+is needed: no tkinter, no display and no other package
+
+In an animated PNG, every frame after the first only has the part of
+the image that changed since the last frame (around the boxes of the
+tanks and bullets of both frames)
+"""
+
+
+from os import path, makedirs, replace, remove, stat
+from glob import glob
+from struct import pack
+from zlib import compress, crc32
+from concurrent.futures import ProcessPoolExecutor, Future, as_completed
+from argparse import ArgumentParser, Namespace
+from re import compile as cmp
+from typing import BinaryIO, Dict, List, Literal
+from ModuleReplay import Frame, ReplayHeader, ReplayReader, LogReader, open_stage, read_last_frame
+
+
+PATH: str = path.dirname(path.abspath(__file__))
+LOG_DIR: str = f"{PATH}/logs"
+STAGE_DIR: str = f"{PATH}/stages"
+RENDER_DIR: str = f"{PATH}/logs/render"
+THUMB_DIR: str = f"{PATH}/logs/thumbs"
+THUMB_SIZE: tuple[int, int] = (76, 61)
+# The colors of ModuleDisplay
+BACKGROUND: bytes = b"\xff\xff\xff"
+OUTLINE: bytes = b"\x00\x00\x00"
+WALL: bytes = b"\x00\x80\x00"
+PLAYER: bytes = b"\x00\x00\xff"
+ENEMY: bytes = b"\xff\x00\x00"
+# The tanks at the start of a game on the thumbnails
+START_PLAYER: bytes = b"\x99\x99\xff"
+START_ENEMY: bytes = b"\xff\x99\x99"
+# The size of the canvas of ModuleDisplay for a log without dimension
+DEFAULT_SIZE: tuple[int, int] = (775, 625)
+# The time of a frame of a game: 1/10 second
+FRAME_DELAY: tuple[int, int] = (1, 10)
+COMPRESSION: int = 6
+PNG_SIGNATURE: bytes = b"\x89PNG\r\n\x1a\n"
+
+
+class Image:
+    """
+    The class for an RGB image, rows from the top
+
+    box: (x1, y1, x2, y2), the pixels from x1 to x2 and from y1 to y2
+    included, like the rectangles of tkinter
+    """
+
+    def __init__(self: "Image", width: int, height: int, pixels: bytes | bytearray | None = None) -> None:
+        self.width: int = width
+        self.height: int = height
+        self.pixels: bytearray = bytearray(BACKGROUND * (width * height) if pixels is None else pixels)
+
+    def clip(self: "Image", box: tuple[int, int, int, int]) -> tuple[int, int, int, int] | None:
+        """
+        Return the part of box in the image, None if there is none
+        """
+        x1: int = max(box[0], 0)
+        y1: int = max(box[1], 0)
+        x2: int = min(box[2], self.width - 1)
+        y2: int = min(box[3], self.height - 1)
+        return (x1, y1, x2, y2) if x1 <= x2 and y1 <= y2 else None
+
+    def fill(self: "Image", box: tuple[int, int, int, int], color: bytes) -> None:
+        """
+        Fill box with color
+        """
+        clipped: tuple[int, int, int, int] | None = self.clip(box)
+        if clipped is None:
+            return
+
+        row: bytes = color * (clipped[2] - clipped[0] + 1)
+        for y in range(clipped[1], clipped[3] + 1):
+            start: int = (y * self.width + clipped[0]) * 3
+            self.pixels[start:start + len(row)] = row
+
+    def rectangle(self: "Image", box: tuple[int, int, int, int], color: bytes) -> None:
+        """
+        Draw a rectangle filled with color with a black outline, like GAME.create_rectangle
+        """
+        self.fill(box, OUTLINE)
+        self.fill((box[0] + 1, box[1] + 1, box[2] - 1, box[3] - 1), color)
+
+    def restore(self: "Image", other: "Image", box: tuple[int, int, int, int]) -> None:
+        """
+        Copy box from other, an image of the same size
+        """
+        clipped: tuple[int, int, int, int] | None = self.clip(box)
+        if clipped is None:
+            return
+
+        for y in range(clipped[1], clipped[3] + 1):
+            start: int = (y * self.width + clipped[0]) * 3
+            end: int = (y * self.width + clipped[2] + 1) * 3
+            self.pixels[start:end] = other.pixels[start:end]
+
+    def get_data(self: "Image", box: tuple[int, int, int, int]) -> bytes:
+        """
+        Return the compressed rows of box for a PNG (filter 0 on every row)
+        """
+        rows: List[bytes | bytearray] = []
+
+        for y in range(box[1], box[3] + 1):
+            start: int = (y * self.width + box[0]) * 3
+            rows += [b"\x00", self.pixels[start:(y * self.width + box[2] + 1) * 3]]
+        return compress(b"".join(rows), COMPRESSION)
+
+    def copy(self: "Image") -> "Image":
+        """
+        Return a copy of the image
+        """
+        return Image(self.width, self.height, self.pixels)
+
+
+def get_chunk(kind: bytes, data: bytes) -> bytes:
+    """
+    Return a chunk of PNG
+    """
+    return pack(">I", len(data)) + kind + data + pack(">I", crc32(kind + data))
+
+
+def get_ihdr(width: int, height: int) -> bytes:
+    """
+    Return the header chunk of a PNG of RGB pixels on 8 bits
+    """
+    return get_chunk(b"IHDR", pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+
+
+def get_png(image: Image) -> bytes:
+    """
+    Return the image as a PNG
+    """
+    return PNG_SIGNATURE + get_ihdr(image.width, image.height) + \
+        get_chunk(b"IDAT", image.get_data((0, 0, image.width - 1, image.height - 1))) + get_chunk(b"IEND", b"")
+
+
+def write_png(png_file: str, image: Image) -> None:
+    """
+    Write the image as a PNG
+    """
+    with open(png_file, "wb") as file:
+        file.write(get_png(image))
+
+
+class ApngWriter:
+    """
+    The class for the writer of an animated PNG, frame by frame
+
+    The number of frames is only known at the end, it is written in the
+    header when the file is closed
+    """
+
+    def __init__(self: "ApngWriter", apng_file: str, width: int, height: int, delay: tuple[int, int] = FRAME_DELAY) -> None:
+        self.file: BinaryIO = open(apng_file, "wb")
+        self.width: int = width
+        self.height: int = height
+        self.delay: tuple[int, int] = delay
+        self.frames: int = 0
+        self.sequence: int = 0
+
+        self.file.write(PNG_SIGNATURE + get_ihdr(width, height))
+        self.actl: int = self.file.tell()
+        self.file.write(get_chunk(b"acTL", pack(">II", 0, 0)))
+
+    def __enter__(self: "ApngWriter") -> "ApngWriter":
+        return self
+
+    def __exit__(self: "ApngWriter", *args: object) -> None:
+        self.close()
+
+    def write_frame(self: "ApngWriter", image: Image, box: tuple[int, int, int, int]) -> None:
+        """
+        Write the next frame, where only box changed since the last frame
+        (the first frame is always the whole image)
+        """
+        if self.frames == 0:
+            box = (0, 0, self.width - 1, self.height - 1)
+
+        self.file.write(get_chunk(b"fcTL", pack(">IIIIIHHBB", self.sequence, box[2] - box[0] + 1, box[3] - box[1] + 1,
+                                                box[0], box[1], self.delay[0], self.delay[1], 0, 0)))
+        self.sequence += 1
+
+        if self.frames == 0:
+            self.file.write(get_chunk(b"IDAT", image.get_data(box)))
+        else:
+            self.file.write(get_chunk(b"fdAT", pack(">I", self.sequence) + image.get_data(box)))
+            self.sequence += 1
+        self.frames += 1
+
+    def close(self: "ApngWriter") -> None:
+        """
+        Write the number of frames and close the file
+        """
+        if self.file.closed:
+            return
+        self.file.write(get_chunk(b"IEND", b""))
+        self.file.seek(self.actl)
+        # Played in a loop
+        self.file.write(get_chunk(b"acTL", pack(">II", self.frames, 0)))
+        self.file.close()
+
+
+def get_background(header: ReplayHeader) -> Image:
+    """
+    Get the image of the stage without the tanks: the walls on the background
+    """
+    image: Image = Image(header.width or DEFAULT_SIZE[0], header.height or DEFAULT_SIZE[1])
+
+    for wall in header.walls:
+        image.rectangle((wall[0] - wall[2], wall[1] - wall[3], wall[0] + wall[2], wall[1] + wall[3]), WALL)
+    return image
+
+
+def get_boxes(frame: Frame, header: ReplayHeader) -> List[tuple[tuple[int, int, int, int], bytes]]:
+    """
+    Get the boxes of the tanks and bullets of the frame with their color,
+    in the order of ModuleDisplay
+    """
+    boxes: List[tuple[tuple[int, int, int, int], bytes]] = []
+    size: int = header.tank_size
+
+    for pos_x, pos_y, color in [(*frame.player, PLAYER)] + [(a[1], a[2], ENEMY) for a in frame.enemies]:
+        boxes.append(((pos_x - size, pos_y - size, pos_x + size, pos_y + size), color))
+
+    size = header.bullet_size
+    for bullets, color in ((frame.player_bullets, PLAYER), (frame.enemy_bullets, ENEMY)):
+        for pos_x, pos_y in bullets:
+            boxes.append(((pos_x - size, pos_y - size, pos_x + size, pos_y + size), color))
+
+    return boxes
+
+
+def get_union(image: Image, boxes: List[tuple[int, int, int, int]]) -> tuple[int, int, int, int]:
+    """
+    Return the smallest box of the image around every box in it
+    (its first pixel if there is none)
+    """
+    clipped: List[tuple[int, int, int, int]] = [a for a in map(image.clip, boxes) if a is not None]
+
+    if not clipped:
+        return (0, 0, 0, 0)
+    return (min(a[0] for a in clipped), min(a[1] for a in clipped), max(a[2] for a in clipped), max(a[3] for a in clipped))
+
+
+def render(reader: ReplayReader | LogReader, output: str, kind: Literal["apng", "png"] = "apng") -> int:
+    """
+    Render the frames of reader to the animated PNG output, or to one PNG
+    per frame in the folder output (frame_0000.png, ...), and return the number
+    of frames
+
+    A game without frames gives the image of its walls
+    """
+    background: Image = get_background(reader.header)
+    image: Image = background.copy()
+    boxes: List[tuple[tuple[int, int, int, int], bytes]] = []
+    last: List[tuple[int, int, int, int]] = []
+    nb_frames: int = 0
+
+    if kind == "png":
+        makedirs(output, exist_ok=True)
+        for frame in reader:
+            for box in last:
+                image.restore(background, box)
+            boxes = get_boxes(frame, reader.header)
+            for box, color in boxes:
+                image.rectangle(box, color)
+            last = [a[0] for a in boxes]
+            write_png(f"{output}/frame_{nb_frames:04}.png", image)
+            nb_frames += 1
+        if nb_frames == 0:
+            write_png(f"{output}/frame_0000.png", image)
+        return nb_frames
+
+    with ApngWriter(f"{output}.tmp", image.width, image.height) as writer:
+        for frame in reader:
+            for box in last:
+                image.restore(background, box)
+            boxes = get_boxes(frame, reader.header)
+            for box, color in boxes:
+                image.rectangle(box, color)
+            writer.write_frame(image, get_union(image, last + [a[0] for a in boxes]))
+            last = [a[0] for a in boxes]
+            nb_frames += 1
+        if nb_frames == 0:
+            writer.write_frame(image, (0, 0, 0, 0))
+    replace(f"{output}.tmp", output)
+    return nb_frames
+
+
+def render_stage(stage: int, kind: Literal["apng", "png"] = "apng", log_dir: str = LOG_DIR, render_dir: str = RENDER_DIR) -> str:
+    """
+    Render the game of the stage from its replay or its log, to
+    stage_<n>.apng or to the folder stage_<n> of render_dir,
+    and return the file or folder
+    """
+    output: str = f"{render_dir}/stage_{stage}" + (".apng" if kind == "apng" else "")
+
+    makedirs(render_dir, exist_ok=True)
+    with open_stage(log_dir, stage) as reader:
+        render(reader, output, kind)
+    return output
+
+
+def read_start(stage_file: str, header: ReplayHeader) -> Frame | None:
+    """
+    Get the tanks at the start of the game from the stage file, before
+    the moves of the first frame, or None if the file is missing or is not
+    the stage of header (other dimension or walls)
+    """
+    start: Frame = Frame()
+    dimension: tuple[int, int] = (0, 0)
+    walls: List[tuple[int, int, int, int]] = []
+    data: List[str]
+
+    try:
+        with open(stage_file, "r", encoding="iso8859") as file:
+            for line in file:
+                data = line.split()
+                match data[:1]:
+                    case ["Dimension:"]:
+                        dimension = (int(data[1]), int(data[2]))
+                    case ["Wall:"]:
+                        walls.append((int(data[1]), int(data[2]), int(data[3]), int(data[4])))
+                    case ["Player:"]:
+                        start.player = (int(data[1]), int(data[2]))
+                    case ["Enemy:"]:
+                        start.enemies.append((data[1], int(data[2]), int(data[3])))
+    except (OSError, ValueError, IndexError):
+        return None
+
+    if dimension != (header.width, header.height) or walls != [tuple(a) for a in header.walls]:
+        return None
+    return start
+
+
+def get_thumbnail(header: ReplayHeader, start: Frame | None, last: Frame | None, size: tuple[int, int] = THUMB_SIZE) -> Image:
+    """
+    Get the thumbnail of a game, as big as possible in size: its walls,
+    the tanks at the start (lighter) and the tanks and bullets of the last
+    frame, without outlines
+    """
+    width: int = header.width or DEFAULT_SIZE[0]
+    height: int = header.height or DEFAULT_SIZE[1]
+    scale: float = min(size[0] / width, size[1] / height)
+    image: Image = Image(max(round(width * scale), 1), max(round(height * scale), 1))
+    boxes: List[tuple[tuple[int, int, int, int], bytes]] = []
+
+    for wall in header.walls:
+        boxes.append(((wall[0] - wall[2], wall[1] - wall[3], wall[0] + wall[2], wall[1] + wall[3]), WALL))
+    if start is not None:
+        boxes += [(box, START_PLAYER if color == PLAYER else START_ENEMY)
+                  for box, color in get_boxes(Frame(start.frame, start.player, start.enemies), header)]
+    if last is not None:
+        boxes += get_boxes(last, header)
+
+    for box, color in boxes:
+        image.fill((int(box[0] * scale), int(box[1] * scale), int(box[2] * scale), int(box[3] * scale)), color)
+    return image
+
+
+def render_thumbnail(stage: int, log_dir: str = LOG_DIR, thumb_dir: str = THUMB_DIR, size: tuple[int, int] = THUMB_SIZE,
+                     stage_dir: str = STAGE_DIR) -> str:
+    """
+    Get the PNG file of the thumbnail of the game of the stage (see get_thumbnail)
+
+    The tanks at the start are read from the stage file in stage_dir (see
+    read_start), or taken from the first frame if it is not the stage of
+    the game. The last frame is read from the end of the log, or found with
+    the frame index of a replay alone, without reading the rest of it (a
+    replay without index is read to its end). The thumbnail is kept
+    in thumb_dir under the time of change of the log, and only made again
+    when the log changes
+    """
+    source: str = f"{log_dir}/stage_{stage}.log"
+    if not path.isfile(source):
+        source = f"{log_dir}/stage_{stage}.replay"
+
+    thumb_file: str = f"{thumb_dir}/stage_{stage}_{size[0]}x{size[1]}_{stat(source).st_mtime_ns}.png"
+    if path.isfile(thumb_file):
+        return thumb_file
+
+    first: Frame | None = None
+    last: Frame | None = None
+    reader: ReplayReader | LogReader
+
+    if source.endswith(".log"):
+        with LogReader(source) as reader:
+            first = next(iter(reader), None)
+            last = read_last_frame(source, reader.header)
+    else:
+        with ReplayReader(source) as reader:
+            first = last = next(iter(reader), None)
+            if reader.offsets is not None:
+                reader.seek(len(reader.offsets) - 1)
+            for frame in reader:
+                last = frame
+
+    makedirs(thumb_dir, exist_ok=True)
+    for old_file in glob(f"{thumb_dir}/stage_{stage}_*.png"):
+        remove(old_file)
+    with open(f"{thumb_file}.tmp", "wb") as file:
+        file.write(get_png(get_thumbnail(reader.header, read_start(f"{stage_dir}/stage_{stage}.in", reader.header) or first,
+                                         last, size)))
+    replace(f"{thumb_file}.tmp", thumb_file)
+    return thumb_file
+
+
+def get_failed_stages(log_dir: str = LOG_DIR) -> List[int]:
+    """
+    Get the stages of the last results of all.log that are not won
+    """
+    results: Dict[int, str] = {}
+
+    try:
+        with open(f"{log_dir}/all.log", "r", encoding="iso8859") as file:
+            for matched in cmp(r"Stage (?P<nb>\d+): (?P<res>[^\n]*)").finditer(file.read()):
+                results[int(matched.group("nb"))] = matched.group("res").strip()
+    except OSError:
+        return []
+
+    return sorted(a for a, b in results.items() if b != "WINNER")
+
+
+def main(stages: List[int], kind: Literal["apng", "png"] = "apng", workers: int | None = None,
+         log_dir: str = LOG_DIR, render_dir: str = RENDER_DIR) -> Dict[int, str]:
+    """
+    Render the stages, one stage per worker process (one per core by
+    default), and return the file or folder of every stage, or its error
+    """
+    results: Dict[int, str] = {}
+    futures: Dict[Future, int] = {}
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for stage in stages:
+            futures[executor.submit(render_stage, stage, kind, log_dir, render_dir)] = stage
+
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                results[futures[future]] = f"Error: {e}"
+
+    return dict(sorted(results.items()))
+
+
+if __name__ == "__main__":
+    PARSER: ArgumentParser = ArgumentParser(description="Render the games to animated PNG or PNG images, without a display")
+    PARSER.add_argument("--stages", type=int, nargs="*", default=[], help="The stages to render (default: every stage with a log or a replay)")
+    PARSER.add_argument("--failed", type=bool, default=False, help="If True, render the stages not won in all.log")
+    PARSER.add_argument("--format", type=str, default="apng", choices=["apng", "png"], help="One animated PNG per stage, or one folder of PNG per stage")
+    PARSER.add_argument("--logs", type=str, default=LOG_DIR, help="The folder of the logs and replays")
+    PARSER.add_argument("--output", type=str, default=RENDER_DIR, help="The folder of the images")
+    PARSER.add_argument("--workers", type=int, default=0, help="Number of stages rendered at the same time (default: number of cores)")
+    ARGS: Namespace = PARSER.parse_known_args()[0]
+
+    STAGES: List[int] = ARGS.stages or [a for a in range(1, 101) if path.isfile(f"{ARGS.logs}/stage_{a}.log") or
+                                        path.isfile(f"{ARGS.logs}/stage_{a}.replay")]
+    if ARGS.failed:
+        STAGES = [a for a in get_failed_stages(ARGS.logs) if not ARGS.stages or a in ARGS.stages]
+
+    for STAGE, OUTPUT in main(STAGES, ARGS.format, ARGS.workers or None, ARGS.logs, ARGS.output).items():
+        print(f"Stage {STAGE}: {OUTPUT}")
@@ -0,0 +1,506 @@
+"""
+The module with the binary replay format of the game
+
+A replay starts with a fixed header:
+    magic (4s), version (H), width, height, tank size, bullet size (4h),
+    seed of the stage (q),
+    number of walls (H) then pos_x, pos_y, size_x, size_y (4h) per wall,
+    number of names (H) then length (B) and name per tank (player first)
+
+Then one record of int16 per frame, frames being numbered from 0:
+    number of player bullets, enemy bullets and deaths,
+    mask of the enemies alive (bit i for the name i + 1),
+    player pos_x and pos_y,
+    pos_x and pos_y per enemy alive, in the order of the names,
+    pos_x and pos_y per player bullet then per enemy bullet,
+    name index per death
+
+And a last record of -1 followed by the length (B) and the result
+
+Logs and replays have a frame index beside them (same name with .index),
+written when they are closed, to go to any frame without reading the
+ones before:
+    magic (4s), version (H), size of the indexed file (q),
+    then the offset in bytes of every frame in the file (q per frame)
+"""
+
+
+from os import path, remove, SEEK_END
+from sys import byteorder
+from array import array
+from mmap import mmap, ACCESS_READ
+from struct import pack, unpack_from, calcsize
+from dataclasses import dataclass, field
+from typing import List, Dict, BinaryIO, Iterable, Iterator, TextIO
+
+
+MAGIC: bytes = b"TKRP"
+INDEX_MAGIC: bytes = b"TKIX"
+VERSION: int = 2
+HEADER_FORMAT: str = "<4sH4hqH"
+WALL_FORMAT: str = "<4h"
+INDEX_FORMAT: str = "<4sHq"
+FRAME_FORMAT: str = "<6h"
+FRAME_SIZE: int = 6
+END_FRAME: int = -1
+SEPARATOR: str = "---------------------------------"
+# The first block read back from the end of a log for its last frame
+TAIL_SIZE: int = 4096
+MAX_ENEMIES: int = 16
+PATH: str = path.dirname(path.abspath(__file__))
+
+
+@dataclass
+class ReplayHeader:
+    """
+    The class for the header of a replay
+    """
+    width: int = 0
+    height: int = 0
+    tank_size: int = 0
+    bullet_size: int = 0
+    walls: List[tuple[int, int, int, int]] = field(default_factory=list)
+    names: List[str] = field(default_factory=list)
+    seed: int = 0
+    result: str = ""
+
+
+@dataclass(slots=True)
+class Frame:
+    """
+    The class for a frame of a log or of a replay
+
+    enemies: name, pos_x and pos_y of the enemies alive
+    deaths: names of the tanks dead during the frame
+    """
+    frame: int = 0
+    player: tuple[int, int] = (-100, -100)
+    enemies: List[tuple[str, int, int]] = field(default_factory=list)
+    player_bullets: List[tuple[int, int]] = field(default_factory=list)
+    enemy_bullets: List[tuple[int, int]] = field(default_factory=list)
+    deaths: List[str] = field(default_factory=list)
+
+
+def to_little_endian(values: array) -> array:
+    """
+    Swap the bytes of the array if the machine is big endian
+    """
+    if byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def get_index_file(data_file: str) -> str:
+    """
+    Return the file of the frame index of a log or a replay
+    """
+    return f"{data_file}.index"
+
+
+def write_index(data_file: str, offsets: List[int], size: int) -> None:
+    """
+    Write the frame index of a log or a replay of size bytes,
+    with the offset of every frame in it
+    """
+    with open(get_index_file(data_file), "wb") as file:
+        file.write(pack(INDEX_FORMAT, INDEX_MAGIC, VERSION, size) + to_little_endian(array("q", offsets)).tobytes())
+
+
+def remove_index(data_file: str) -> None:
+    """
+    Remove the frame index of a log or a replay, before it is written again
+    """
+    if path.isfile(get_index_file(data_file)):
+        remove(get_index_file(data_file))
+
+
+def read_index(data_file: str) -> array | None:
+    """
+    Read the offsets of the frames of a log or a replay from its frame index,
+    None if there is no index or if it is not the index of the file
+    as it is now (the file changed since)
+    """
+    data: bytes
+    size: int
+
+    try:
+        with open(get_index_file(data_file), "rb") as file:
+            data = file.read()
+        size = path.getsize(data_file)
+    except OSError:
+        return None
+
+    start: int = calcsize(INDEX_FORMAT)
+    if len(data) < start or (len(data) - start) % 8 or unpack_from(INDEX_FORMAT, data) != (INDEX_MAGIC, VERSION, size):
+        return None
+
+    offsets: array = array("q")
+    offsets.frombytes(data[start:])
+    return to_little_endian(offsets)
+
+
+class ReplayWriter:
+    """
+    The class for the writer of a replay, and of its frame index
+    """
+
+    def __init__(self: "ReplayWriter", replay_file: str, header: ReplayHeader) -> None:
+        remove_index(replay_file)
+        self.replay_file: str = replay_file
+        self.file: BinaryIO = open(replay_file, "wb")
+        self.names: Dict[str, int] = {name: ind for ind, name in enumerate(header.names)}
+        self.offsets: List[int] = []
+
+        if len(header.names) > MAX_ENEMIES + 1:
+            raise ValueError(f"A replay can't have more than {MAX_ENEMIES} enemies")
+
+        self.file.write(pack(HEADER_FORMAT, MAGIC, VERSION, header.width, header.height,
+                             header.tank_size, header.bullet_size, header.seed, len(header.walls)))
+        for wall in header.walls:
+            self.file.write(pack(WALL_FORMAT, *wall))
+        self.file.write(pack("<H", len(header.names)))
+        for name in header.names:
+            encoded: bytes = name.encode("iso8859")
+            self.file.write(pack("<B", len(encoded)) + encoded)
+
+    def __enter__(self: "ReplayWriter") -> "ReplayWriter":
+        return self
+
+    def __exit__(self: "ReplayWriter", *args: object) -> None:
+        self.close()
+
+    def write_frame(self: "ReplayWriter", player: tuple[int, int], enemies: List[tuple[str, int, int]],
+                    player_bullets: List[tuple[int, int]], enemy_bullets: List[tuple[int, int]], deaths: List[str]) -> None:
+        """
+        Write the record of the next frame
+
+        enemies must be in the order of the names of the header
+        """
+        mask: int = 0
+        for name, _, _ in enemies:
+            mask |= 1 << (self.names[name] - 1)
+        self.offsets.append(self.file.tell())
+
+        values: array = array("h", (len(player_bullets), len(enemy_bullets), len(deaths), mask - (mask >> 15 << 16)))
+        values.extend(player)
+        for _, pos_x, pos_y in enemies:
+            values.extend((pos_x, pos_y))
+        for bullet in player_bullets:
+            values.extend(bullet)
+        for bullet in enemy_bullets:
+            values.extend(bullet)
+        values.extend(self.names[name] for name in deaths)
+        self.file.write(to_little_endian(values).tobytes())
+
+    def write_result(self: "ReplayWriter", result: str) -> None:
+        """
+        Write the last record with the result of the game
+        """
+        encoded: bytes = result.encode("iso8859")
+        self.file.write(to_little_endian(array("h", (END_FRAME,))).tobytes() + pack("<B", len(encoded)) + encoded)
+
+    def close(self: "ReplayWriter") -> None:
+        """
+        Close the file and write its frame index
+        """
+        if not self.file.closed:
+            write_index(self.replay_file, self.offsets, self.file.tell())
+            self.file.close()
+
+
+class ReplayReader:
+    """
+    The class for the reader of a replay
+
+    The header is read when the reader is made, the frames one by one
+    while it is iterated and the result after the last frame
+
+    offsets: the offsets of the frames from the frame index, None without
+    it (see seek)
+    """
+
+    def __init__(self: "ReplayReader", replay_file: str) -> None:
+        self.header: ReplayHeader = ReplayHeader()
+        self.offsets: array | None = read_index(replay_file)
+        self.frame: int = 0
+
+        with open(replay_file, "rb") as file:
+            self.data: mmap = mmap(file.fileno(), 0, access=ACCESS_READ)
+
+        magic: bytes
+        version: int
+        nb_walls: int
+        magic, version, self.header.width, self.header.height, self.header.tank_size, self.header.bullet_size, \
+            self.header.seed, nb_walls = unpack_from(HEADER_FORMAT, self.data)
+        if magic != MAGIC or version != VERSION:
+            self.data.close()
+            raise ValueError(f"{replay_file} is not a replay of version {VERSION}")
+        self.offset: int = calcsize(HEADER_FORMAT)
+
+        for _ in range(nb_walls):
+            self.header.walls.append(unpack_from(WALL_FORMAT, self.data, self.offset))
+            self.offset += calcsize(WALL_FORMAT)
+
+        nb_names: int = unpack_from("<H", self.data, self.offset)[0]
+        length: int
+        self.offset += 2
+        for _ in range(nb_names):
+            length = self.data[self.offset]
+            self.header.names.append(self.data[self.offset + 1:self.offset + 1 + length].decode("iso8859"))
+            self.offset += 1 + length
+
+    def __enter__(self: "ReplayReader") -> "ReplayReader":
+        return self
+
+    def __exit__(self: "ReplayReader", *args: object) -> None:
+        self.close()
+
+    def __iter__(self: "ReplayReader") -> Iterator[Frame]:
+        data: mmap = self.data
+        names: List[str] = self.header.names
+        values: array
+        counts: tuple[int, ...]
+        alive: List[str]
+        length: int
+        size: int
+        ind: int
+
+        while self.offset < len(data):
+            if unpack_from("<h", data, self.offset)[0] == END_FRAME:
+                length = data[self.offset + 2]
+                self.header.result = data[self.offset + 3:self.offset + 3 + length].decode("iso8859")
+                self.offset = len(data)
+                break
+
+            counts = unpack_from(FRAME_FORMAT, data, self.offset)
+            alive = [name for ind, name in enumerate(names[1:]) if counts[3] >> ind & 1]
+            size = FRAME_SIZE + 2 * len(alive) + 2 * counts[0] + 2 * counts[1] + counts[2]
+            values = array("h")
+            values.frombytes(data[self.offset:self.offset + 2 * size])
+            to_little_endian(values)
+            self.offset += 2 * size
+
+            ind = FRAME_SIZE + 2 * len(alive)
+            self.frame += 1
+            yield Frame(self.frame - 1, (counts[4], counts[5]),
+                        [(name, values[FRAME_SIZE + 2 * a], values[FRAME_SIZE + 2 * a + 1]) for a, name in enumerate(alive)],
+                        [(values[a], values[a + 1]) for a in range(ind, ind + 2 * counts[0], 2)],
+                        [(values[a], values[a + 1]) for a in range(ind + 2 * counts[0], ind + 2 * counts[0] + 2 * counts[1], 2)],
+                        [names[a] for a in values[size - counts[2]:]])
+
+    def seek(self: "ReplayReader", index: int) -> int:
+        """
+        Go to the frame index (the last one if the game is shorter) with the
+        frame index, the frames are read from there, and return its index
+
+        Raises ValueError if the replay has no frame index
+        """
+        if self.offsets is None:
+            raise ValueError("The replay has no frame index")
+        index = min(max(index, 0), len(self.offsets) - 1)
+        if index >= 0:
+            self.offset = self.offsets[index]
+            self.frame = index
+        return index
+
+    def read_frame(self: "ReplayReader", index: int) -> Frame | None:
+        """
+        Read the frame index alone (see seek)
+        """
+        self.seek(index)
+        return next(iter(self), None)
+
+    def close(self: "ReplayReader") -> None:
+        """
+        Close the replay
+        """
+        self.data.close()
+
+
+def parse_frames(lines: Iterable[str], header: ReplayHeader) -> Iterator[Frame]:
+    """
+    Parse the frames of the lines of a text log of ModuleGame, one by one
+    (the last one even if the lines stop before its end)
+
+    The names of the tanks seen and the result are added to header
+    """
+    frame: Frame | None = None
+    data: List[str]
+
+    for line in lines:
+        data = line.split()
+        if not data:
+            continue
+
+        match data[0]:
+            case "Frame:":
+                if frame is not None:
+                    yield frame
+                frame = Frame(int(data[1]))
+            case "Player:" if frame is not None:
+                frame.player = (int(data[1]), int(data[2]))
+            case "Enemy:" if frame is not None:
+                frame.enemies.append((data[1], int(data[2]), int(data[3])))
+                if data[1] not in header.names:
+                    header.names.append(data[1])
+            case "Player_Bullet:" if frame is not None:
+                frame.player_bullets.append((int(data[1]), int(data[2])))
+            case "Enemy_Bullet:" if frame is not None:
+                frame.enemy_bullets.append((int(data[1]), int(data[2])))
+            case "Death:" if frame is not None:
+                frame.deaths.append(data[1])
+                if data[1] not in header.names:
+                    header.names.append(data[1])
+            case "Result:":
+                header.result = line.rstrip("\n")[len("Result: "):]
+            case _:
+                if frame is not None and line.rstrip("\n") == SEPARATOR:
+                    yield frame
+                    frame = None
+
+    if frame is not None:
+        yield frame
+
+
+def read_last_frame(log_file: str, header: ReplayHeader, block: int = TAIL_SIZE) -> Frame | None:
+    """
+    Read the last frame of a text log of ModuleGame from its end, reading
+    back blocks twice as big every time until the start of the frame,
+    without reading the rest of the log (None if the log has no frame)
+
+    The result is added to header
+    """
+    data: bytes = b""
+    start: int = -1
+    size: int
+
+    with open(log_file, "rb") as file:
+        size = file.seek(0, SEEK_END)
+        while start != 0:
+            start = max(size - block, 0)
+            file.seek(start)
+            data = file.read(size - start)
+            if b"\nFrame: " in data:
+                data = data[data.rindex(b"\nFrame: ") + 1:]
+                break
+            block *= 2
+
+    last: Frame | None = None
+    for frame in parse_frames(data.decode("iso8859").splitlines(True), header):
+        last = frame
+    return last
+
+
+class LogReader:
+    """
+    The class for the reader of a text log of ModuleGame, in one pass
+
+    The header is read when the reader is made, the frames one by one
+    while it is iterated (see parse_frames) and the result after the last
+    frame. The names are the player then the enemies in the order they
+    are first seen
+
+    offsets: the offsets of the frames from the frame index, None without
+    it (see seek)
+    """
+
+    def __init__(self: "LogReader", log_file: str) -> None:
+        self.file: TextIO = open(log_file, "r", encoding="iso8859")
+        self.header: ReplayHeader = ReplayHeader(names=["Player"])
+        self.offsets: array | None = read_index(log_file)
+        data: List[str]
+
+        for line in self.file:
+            data = line.split()
+            if not data:
+                continue
+
+            match data[0]:
+                case "Dimension:":
+                    self.header.width = int(data[1])
+                    self.header.height = int(data[2])
+                case "TankSize:":
+                    self.header.tank_size = int(data[1])
+                case "BulletSize:":
+                    self.header.bullet_size = int(data[1])
+                case "Seed:":
+                    self.header.seed = int(data[1])
+                case "Wall:":
+                    self.header.walls.append((int(data[1]), int(data[2]), int(data[3]), int(data[4])))
+                case _:
+                    if line.rstrip("\n") == SEPARATOR:
+                        break
+
+    def __enter__(self: "LogReader") -> "LogReader":
+        return self
+
+    def __exit__(self: "LogReader", *args: object) -> None:
+        self.close()
+
+    def __iter__(self: "LogReader") -> Iterator[Frame]:
+        return parse_frames(self.file, self.header)
+
+    def seek(self: "LogReader", index: int) -> int:
+        """
+        Go to the frame index (the last one if the game is shorter) with the
+        frame index, the frames are read from there, and return its index
+
+        Raises ValueError if the log has no frame index
+        """
+        if self.offsets is None:
+            raise ValueError("The log has no frame index")
+        index = min(max(index, 0), len(self.offsets) - 1)
+        if index >= 0:
+            self.file.seek(self.offsets[index])
+        return index
+
+    def read_frame(self: "LogReader", index: int) -> Frame | None:
+        """
+        Read the frame index alone (see seek)
+        """
+        self.seek(index)
+        return next(iter(self), None)
+
+    def close(self: "LogReader") -> None:
+        """
+        Close the log
+        """
+        self.file.close()
+
+
+def open_stage(log_dir: str, stage: int) -> ReplayReader | LogReader:
+    """
+    Open the binary replay of the stage if there is one, else its log
+    """
+    if path.isfile(f"{log_dir}/stage_{stage}.replay"):
+        return ReplayReader(f"{log_dir}/stage_{stage}.replay")
+    return LogReader(f"{log_dir}/stage_{stage}.log")
+
+
+def convert_log(log_file: str, replay_file: str) -> None:
+    """
+    Convert a text log of ModuleGame to a replay
+
+    The log is read twice, first for the names of the header,
+    so that its frames are never all in memory
+    """
+    header: ReplayHeader
+
+    with LogReader(log_file) as reader:
+        for ind, frame in enumerate(reader):
+            if frame.frame != ind:
+                raise ValueError(f"{log_file}: frame {frame.frame} is not the frame {ind}")
+        header = reader.header
+
+    with LogReader(log_file) as reader, ReplayWriter(replay_file, header) as writer:
+        for frame in reader:
+            writer.write_frame(frame.player, frame.enemies, frame.player_bullets, frame.enemy_bullets, frame.deaths)
+        if header.result:
+            writer.write_result(header.result)
+
+
+if __name__ == "__main__":
+    for STAGE_INDEX in range(1, 101):
+        LOG_FILE: str = f"{PATH}/logs/stage_{STAGE_INDEX}.log"
+        if path.isfile(LOG_FILE):
+            convert_log(LOG_FILE, f"{PATH}/logs/stage_{STAGE_INDEX}.replay")
@@ -0,0 +1,65 @@
+"""
+The module with the lines of sight, for the bots and the players
+
+A line of sight only depends on the walls, that never move during a game,
+and on the positions, that are integers. Tanks often stay at the same
+place for many frames (blocked or waiting), so every result is kept here
+by occupancy map of the stage (see TankLib.WallMap), until the map is
+gone, and the same question is never computed twice in a stage
+
+The rays themselves are cast by ModuleRay
+"""
+
+
+from weakref import WeakKeyDictionary
+from typing import Dict
+from TankLib import get_wall_map, Bullet, BulletView, Tank, TankView, StageData, StageView, WallMap
+from ModuleRay import Ray, RayHit
+
+
+# The results kept per stage and size of bullet, forgotten all at once beyond
+SIGHT_CACHE_SIZE: int = 1 << 16
+# The results of the lines of sight already computed, by occupancy map
+SIGHTS: "WeakKeyDictionary[WallMap, Dict[tuple, bool]]" = WeakKeyDictionary()
+
+
+def get_walls_colide(bullet: Bullet | BulletView, final: tuple[int, int], stage: StageData | StageView) -> bool:
+    """
+    Return if the bullet colide with a wall or leaves the map before final
+    """
+    wall_map: WallMap = get_wall_map(stage, bullet.size)
+    sights: Dict[tuple, bool] | None = SIGHTS.get(wall_map)
+    key: tuple = (bullet.pos_x, bullet.pos_y, bullet.direction, final)
+
+    if sights is None:
+        sights = SIGHTS[wall_map] = {}
+    result: bool | None = sights.get(key)
+
+    if result is None:
+        if len(sights) >= SIGHT_CACHE_SIZE:
+            sights.clear()
+        ray: Ray = Ray(stage, (bullet.pos_x, bullet.pos_y), bullet.direction, bullet.size)
+        result = sights[key] = ray.cast(ray.get_end_step(final)) is not None
+    return result
+
+
+def get_tank_collision(bullet: Bullet | BulletView, tank: Tank | TankView, stage: StageData | StageView) -> bool:
+    """
+    Return if the bullet colide with the tank before a wall or the border of the map
+    """
+    ray: Ray = Ray(stage, (bullet.pos_x, bullet.pos_y), bullet.direction, bullet.size)
+    hit: RayHit | None = ray.cast()
+    end: int = ray.nb_steps if hit is None else hit.step
+
+    return ray.get_box_step((tank.pos_x, tank.pos_y, tank.size, tank.size), end) < end
+
+
+def is_in_sight(stage: StageData | StageView, start: tuple[int, int], final: tuple[int, int], size: int | None = None) -> bool:
+    """
+    Return if a bullet shot from start toward final reaches it without
+    hitting a wall or leaving the map
+
+    size: the size of the bullet (default: the size of the bullets of the stage)
+    """
+    direction: tuple[int, int] = (final[0] - start[0], final[1] - start[1])
+    return not get_walls_colide(Bullet(start[0], start[1], direction, stage.bullet_size if size is None else size), final, stage)
@@ -4,12 +4,12 @@ The module for the participant
 
 
 from typing import Literal, List, Dict
-from random import choice
 from math import sqrt
-from TankLib import Bullet, Tank, Wall, TankAction, StageData
+from TankLib import get_wall_map, BulletView, TankView, WallView, TankAction, StageView
+from ModuleSight import is_in_sight, get_tank_collision
 
 
-def get_coordinates(bullet: Bullet, stage: StageData) -> List[tuple[float, float]]:
+def get_coordinates(bullet: BulletView, stage: StageView) -> List[tuple[float, float]]:
     """
     Return the coordinates of the bullet for direction during the frame
     """
@@ -29,7 +29,7 @@ def get_coordinates(bullet: Bullet, stage: StageData) -> List[tuple[float, float
     return coords
 
 
-def bullet_collision(is_player: bool, bullet: Bullet, coord: tuple[float, float], stage: StageData) -> Bullet | Tank | Wall | None:
+def bullet_collision(is_player: bool, bullet: BulletView, coord: tuple[float, float], stage: StageView) -> BulletView | TankView | WallView | None:
     """
     Return what the bullet collide with if it's a tank or a bullet
     """
@@ -39,7 +39,7 @@ def bullet_collision(is_player: bool, bullet: Bullet, coord: tuple[float, float]
 
     if is_player:
         for enemy in stage.enemies:
-            if enemy.is_in_tank(coord[0], coord[1], bullet.size, bullet.size) and enemy.is_alive:
+            if enemy.is_alive and enemy.is_in_tank(coord[0], coord[1], bullet.size, bullet.size):
                 return enemy
             for enemy_bullet in enemy.bullets:
                 if enemy_bullet.is_in_bullet(coord[0], coord[1], bullet.size, bullet.size):
@@ -54,7 +54,7 @@ def bullet_collision(is_player: bool, bullet: Bullet, coord: tuple[float, float]
     return None
 
 
-def check_move(direction: Literal["UP", "DOWN", "LEFT", "RIGHT", "NONE"], tank: Tank, stage: StageData) -> int:
+def check_move(direction: Literal["UP", "DOWN", "LEFT", "RIGHT", "NONE"], tank: TankView, stage: StageView) -> int:
     """
     Check if the move is valid
     """
@@ -79,9 +79,8 @@ def check_move(direction: Literal["UP", "DOWN", "LEFT", "RIGHT", "NONE"], tank:
         if new_pos[1] - tank.size < 0 or new_pos[1] + tank.size > stage.height:
             return i - 1
 
-        for wall in stage.walls:
-            if wall.is_in_wall(new_pos[0], new_pos[1], tank.size, tank.size):
-                return i - 1
+        if get_wall_map(stage, tank.size).collide(new_pos[0], new_pos[1]):
+            return i - 1
 
         for enemy in stage.enemies:
             if enemy.is_alive:
@@ -95,7 +94,7 @@ def check_move(direction: Literal["UP", "DOWN", "LEFT", "RIGHT", "NONE"], tank:
     return stage.tank_speed
 
 
-def make_move(tank: Tank, stage: StageData) -> Literal["UP", "DOWN", "LEFT", "RIGHT", "NONE"]:
+def make_move(tank: TankView, stage: StageView) -> Literal["UP", "DOWN", "LEFT", "RIGHT", "NONE"]:
     """
     Make the move specified in args for tank
     """
@@ -115,36 +114,7 @@ def make_move(tank: Tank, stage: StageData) -> Literal["UP", "DOWN", "LEFT", "RI
     return result
 
 
-def get_walls_colide(bullet: Bullet, final: tuple[int, int], stage: StageData) -> bool:
-    """
-    Return if the bullet colide with a wall
-    """
-    x: float = bullet.pos_x
-    y: float = bullet.pos_y
-
-    divider: float = sqrt(bullet.direction[0]**2 + bullet.direction[1]**2)
-    unit_vector: tuple[float, float] = (bullet.direction[0] / divider, bullet.direction[1] / divider)
-
-    checker_x: bool = final[0] > x if unit_vector[0] > 0 else final[0] < x
-    checker_y: bool = final[1] > y if unit_vector[1] > 0 else final[1] < y
-
-    while checker_x or checker_y:
-        if any(a_wall.is_in_wall(x, y, bullet.size, bullet.size) for a_wall in stage.walls):
-            return True
-
-        if x < 0 or x > stage.width or y < 0 or y > stage.height:
-            return True
-
-        x += unit_vector[0]
-        y += unit_vector[1]
-
-        checker_x = final[0] > x if unit_vector[0] > 0 else final[0] < x
-        checker_y = final[1] > y if unit_vector[1] > 0 else final[1] < y
-
-    return False
-
-
-def choose_shooting_direction(stage: StageData) -> tuple[int, int]:
+def choose_shooting_direction(stage: StageView) -> tuple[int, int]:
     """
     The function for the shooting direction
     """
@@ -155,7 +125,6 @@ def choose_shooting_direction(stage: StageData) -> tuple[int, int]:
 
     dist: int
     direction: tuple[int, int]
-    test: bool
 
     for tank in stage.enemies:
         if not tank.is_alive:
@@ -164,44 +133,18 @@ def choose_shooting_direction(stage: StageData) -> tuple[int, int]:
 
         if min_dist == -1 or dist < min_dist:
             direction = (tank.pos_x - pos_x, tank.pos_y - pos_y)
-            test = get_walls_colide(Bullet(pos_x, pos_y, direction, stage.bullet_size), (tank.pos_x, tank.pos_y), stage)
-
-            if not test:
+            if is_in_sight(stage, (pos_x, pos_y), (tank.pos_x, tank.pos_y)):
                 min_dist = dist
                 shoot_direction = direction
 
     return shoot_direction
 
 
-def get_tank_collision(bullet: Bullet, tank: Tank, stage: StageData) -> bool:
-    """
-    Return if the bullet colide with the tank
-    """
-    x: float = bullet.pos_x
-    y: float = bullet.pos_y
-
-    divider: float = sqrt(bullet.direction[0]**2 + bullet.direction[1]**2)
-    unit_vector: tuple[float, float] = (bullet.direction[0] / divider, bullet.direction[1] / divider)
-
-    while True:
-        if any(a_wall.is_in_wall(x, y, bullet.size, bullet.size) for a_wall in stage.walls):
-            return False
-
-        if x < 0 or x > stage.width or y < 0 or y > stage.height:
-            return False
-
-        if tank.is_in_tank(x, y, bullet.size, bullet.size):
-            return True
-
-        x += unit_vector[0]
-        y += unit_vector[1]
-
-
-def destroy_bullet(stage: StageData) -> tuple[int, int]:
+def destroy_bullet(stage: StageView) -> tuple[int, int]:
     """
     The function to destroy the enemy's bullet that are near the tank
     """
-    player: Tank = stage.player
+    player: TankView = stage.player
     shoot_direction: tuple[int, int] = (0, 0)
 
     direction: tuple[int, int]
@@ -221,14 +164,14 @@ def destroy_bullet(stage: StageData) -> tuple[int, int]:
     return shoot_direction
 
 
-def move(stage: StageData) -> TankAction:
+def move(stage: StageView) -> TankAction:
     """
     The function for the movement
     Need to return a tuple who specify action to do for player's tank
     """
     player_action: TankAction = TankAction()
 
-    player_action.direction = choice(["UP", "DOWN", "LEFT", "RIGHT", "NONE"])
+    player_action.direction = stage.rng.choice(["UP", "DOWN", "LEFT", "RIGHT", "NONE"])
 
     player_action.shoot = len(stage.player.bullets) < stage.player.max_bullets - 2
 
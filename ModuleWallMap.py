@@ -0,0 +1,107 @@
+"""
+The module with the cache of the occupancy maps of the walls (see TankLib.WallMap)
+
+The maps of a stage are written once in the maps folder, in a file named
+after a hash of the stage file and of the sizes of the objects, so that
+the next runs of the same stage load them instead of building them
+"""
+
+
+from os import path, makedirs, replace
+from hashlib import sha256
+from struct import Struct, error as StructError
+from zlib import compress, decompress, error as ZlibError
+from typing import Dict, List
+from TankLib import StageData, WallGrid, WallMap
+
+
+PATH: str = path.dirname(path.abspath(__file__))
+MAP_DIR: str = f"{PATH}/logs/maps"
+MAGIC: bytes = b"TMAP"
+VERSION: int = 2
+# Magic, version and number of maps
+HEADER: Struct = Struct("<4sHH")
+# Size of the objects and length of the blocked pixels
+MAP_HEADER: Struct = Struct("<HI")
+
+
+def get_map_file(text: str, sizes: List[int], map_dir: str = MAP_DIR) -> str:
+    """
+    Get the file of the maps of a stage file of content text
+    """
+    key: str = sha256(f"{VERSION} {sizes}\n{text}".encode("iso8859")).hexdigest()
+    return f"{map_dir}/{key}.map"
+
+
+def write_maps(map_file: str, maps: List[WallMap]) -> None:
+    """
+    Write the maps, through a temporary file so that it is never half written
+    """
+    data: List[bytes] = [HEADER.pack(MAGIC, VERSION, len(maps))]
+
+    for wall_map in maps:
+        data += [MAP_HEADER.pack(wall_map.size, len(wall_map.blocked)), wall_map.blocked]
+
+    temp_file: str = f"{map_file}.tmp"
+    with open(temp_file, "wb") as file:
+        file.write(compress(b"".join(data), 1))
+    replace(temp_file, map_file)
+
+
+def read_maps(map_file: str, grid: WallGrid) -> List[WallMap]:
+    """
+    Read the maps of the walls of grid
+
+    Raise ValueError if the file is not a file of maps for these walls
+    """
+    with open(map_file, "rb") as file:
+        data: bytes = decompress(file.read())
+
+    magic: bytes
+    version: int
+    nb_maps: int
+    magic, version, nb_maps = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{map_file} is not a file of maps of version {VERSION}")
+
+    maps: List[WallMap] = []
+    offset: int = HEADER.size
+    size: int
+    nb_blocked: int
+
+    for _ in range(nb_maps):
+        size, nb_blocked = MAP_HEADER.unpack_from(data, offset)
+        offset += MAP_HEADER.size
+        maps.append(WallMap(grid, size, data[offset:offset + nb_blocked]))
+        offset += nb_blocked
+
+    return maps
+
+
+def get_wall_maps(stage: StageData, text: str, sizes: List[int], map_dir: str = MAP_DIR) -> Dict[int, WallMap]:
+    """
+    Get the maps of the walls of the stage for every size of object,
+    loaded from the maps folder or built and written there
+
+    text: the content of the stage file
+    """
+    sizes = sorted(set(sizes))
+    map_file: str = get_map_file(text, sizes, map_dir)
+    maps: List[WallMap]
+
+    try:
+        maps = read_maps(map_file, stage.wall_grid)
+        if [a.size for a in maps] == sizes:
+            return {a.size: a for a in maps}
+    except (OSError, ValueError, StructError, ZlibError):
+        pass
+
+    maps = [WallMap(stage.wall_grid, size) for size in sizes]
+    try:
+        makedirs(map_dir, exist_ok=True)
+        write_maps(map_file, maps)
+    except OSError:
+        # Without the cache, the maps are only built again on the next run
+        pass
+
+    return {a.size: a for a in maps}
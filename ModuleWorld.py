@@ -0,0 +1,478 @@
+"""
+The module with the array engine of the game
+
+The state of the game is kept in numpy arrays instead of one object per
+wall, tank and bullet:
+    walls: centers and half sizes
+    tanks and bullets: one row each in the same arrays of positions and
+    half sizes, the player being the row 0, then the enemies, then the
+    bullets in rows reused when bullets are destroyed
+
+Moves and bullets are checked against every wall and tank at once. The
+bots and the player still get a StageView built from the arrays, and the
+games are the same as with ModuleGame, frame by frame: same order of the
+checks, same rules on ties (see ModuleGame.bullet_moves)
+
+numpy is only needed by this module, see ModuleGame.main
+"""
+
+
+from dataclasses import replace
+from typing import Dict, List, Any
+import numpy as np
+from numpy.typing import NDArray
+from TankLib import Bullet, TankAction, StageData, StageView, TankView, BulletView
+from ModuleReplay import ReplayWriter
+import ModuleGame
+import ModuleBot
+
+
+# Number of positions, (2, n) offsets of the positions and offset of the last position
+Path = tuple[int, NDArray, tuple[float, float]]
+# Number of steps, first step out or in a wall, first step in each target and last position
+Sweep = tuple[NDArray, NDArray, NDArray, List[tuple[float, float]]]
+VECTORS: Dict[str, tuple[int, int]] = {"UP": (0, -1), "DOWN": (0, 1), "LEFT": (-1, 0), "RIGHT": (1, 0)}
+WALL: int = -1
+
+
+def is_lower_equal(a: NDArray, b: NDArray) -> NDArray:
+    """
+    The function of TankLib.is_lower_equal for arrays
+    """
+    return (np.abs(a - b) < ModuleGame.PRECISION) | (a < b)
+
+
+def collide(xs: NDArray, ys: NDArray, size: int | NDArray, positions: NDArray, sizes: NDArray) -> NDArray:
+    """
+    Check every object against every position, like TankLib.check_collision
+
+    xs, ys: the positions (..., n) of objects of half size size,
+    an int or an array broadcast like positions
+    positions: the centers (..., k, 2) of the objects
+    sizes: the half sizes (..., k, 2) of the objects, or (..., k, 1) for squares
+
+    Return a (..., k, n) array, True where the object k collides with the position n
+    """
+    return is_lower_equal(np.abs(positions[..., :1] - xs[..., None, :]), sizes[..., :1] + size) & \
+        is_lower_equal(np.abs(positions[..., 1:] - ys[..., None, :]), sizes[..., -1:] + size)
+
+
+def get_sweep_steps(xs: NDArray, ys: NDArray, size: int, positions: NDArray, sizes: NDArray, default: int) -> NDArray:
+    """
+    Return the first position of each path in each object, or default
+
+    xs, ys: the paths (b, n) of objects of half size size, NaN after the end
+    positions and sizes: the objects, like in collide, the same (k, 2)
+    for every path or (b, k, 2) for the objects of each path
+
+    Only the pairs with the box of the path near the object are checked
+    """
+    positions = np.broadcast_to(positions, (len(xs),) + positions.shape[-2:])
+    sizes = np.broadcast_to(sizes, (len(xs),) + sizes.shape[-2:])
+    low_x: NDArray = np.nanmin(xs, axis=1)[:, None] - size - 1
+    high_x: NDArray = np.nanmax(xs, axis=1)[:, None] + size + 1
+    low_y: NDArray = np.nanmin(ys, axis=1)[:, None] - size - 1
+    high_y: NDArray = np.nanmax(ys, axis=1)[:, None] + size + 1
+    near: NDArray = (positions[..., 0] - sizes[..., 0] <= high_x) & (positions[..., 0] + sizes[..., 0] >= low_x) & \
+        (positions[..., 1] - sizes[..., -1] <= high_y) & (positions[..., 1] + sizes[..., -1] >= low_y)
+
+    steps: NDArray = np.full(near.shape, default)
+    paths: NDArray
+    objects: NDArray
+    paths, objects = np.nonzero(near)
+    if len(paths):
+        steps[paths, objects] = get_first_steps(
+            is_lower_equal(np.abs(positions[paths, objects, :1] - xs[paths]), sizes[paths, objects, :1] + size) &
+            is_lower_equal(np.abs(positions[paths, objects, 1:] - ys[paths]), sizes[paths, objects, -1:] + size), default)
+    return steps
+
+
+def stack_paths(paths: List[Path], positions: List[List[int]]) -> tuple[NDArray, NDArray, NDArray, List[tuple[float, float]]]:
+    """
+    Stack the paths of bullets at positions (see World.get_path)
+
+    Return the (b, n) positions of the paths, NaN after their end,
+    the number of positions of each path and its last position
+    """
+    nb_steps: NDArray = np.array([path[0] for path in paths])
+    xs: NDArray = np.full((len(paths), int(nb_steps.max())), np.nan)
+    ys: NDArray = np.full((len(paths), int(nb_steps.max())), np.nan)
+
+    for ind, path in enumerate(paths):
+        xs[ind, :path[0]] = positions[ind][0] + path[1][0]
+        ys[ind, :path[0]] = positions[ind][1] + path[1][1]
+
+    return xs, ys, nb_steps, [(position[0] + path[2][0], position[1] + path[2][1]) for position, path in zip(positions, paths)]
+
+
+def sweep_paths(xs: NDArray, ys: NDArray, nb_steps: NDArray, size: int, width: int | NDArray, height: int | NDArray,
+                walls: tuple[NDArray, NDArray], targets: tuple[NDArray, NDArray]) -> tuple[NDArray, NDArray]:
+    """
+    Sweep objects of half size size along their paths from stack_paths
+
+    width, height: the size of the map, or (b, 1) for the map of each path
+    walls and targets: positions and sizes, like in get_sweep_steps
+
+    Return for each path the first step out of the map or in a wall,
+    and the first step in each target (more than the number of steps if none)
+    """
+    # NaN after the last step never collides
+    out: NDArray = (xs - size < 0) | (xs + size > width) | (ys - size < 0) | (ys + size > height)
+    first: NDArray = np.where(out.any(axis=1), out.argmax(axis=1), nb_steps)
+    if walls[0].shape[-2]:
+        first = np.minimum(first, get_sweep_steps(xs, ys, size, walls[0], walls[1], xs.shape[1] + 1).min(axis=1))
+
+    return first, get_sweep_steps(xs, ys, size, targets[0], targets[1], xs.shape[1] + 1)
+
+
+def get_first_steps(hits: NDArray, default: int) -> NDArray:
+    """
+    Return the first position with a collision for each object from collide,
+    or default if there is none
+    """
+    return np.where(hits.any(axis=-1), hits.argmax(axis=-1), default)
+
+
+class World:
+    """
+    The class for the state of a game in arrays
+
+    pos, size: position and half size of the tanks then the bullets
+    alive: if the tank is alive, for the tanks only
+    enemies: rows of the enemies, in the order of stage.enemies
+    bullets: rows of the bullets of each tank, in the order they were shot
+    directions: direction of each bullet, as given by the bot or the player
+    """
+
+    def __init__(self: "World", stage: StageData) -> None:
+        """
+        Only the walls and the constants of stage are used during the game,
+        its tanks and bullets are never updated
+        """
+        tanks: List[Any] = [stage.player] + stage.enemies
+        nb_rows: int = len(tanks) + sum(tank.max_bullets for tank in tanks)
+
+        self.stage: StageData = stage
+        self.width: int = stage.width
+        self.height: int = stage.height
+        self.current_frame: int = stage.current_frame
+        self.max_frame: int = stage.max_frame
+        self.bullet_size: int = stage.bullet_size
+        self.tank_speed: int = stage.tank_speed
+
+        self.wall_pos: NDArray = np.array([(wall.pos_x, wall.pos_y) for wall in stage.walls], dtype=np.int64).reshape(-1, 2)
+        self.wall_size: NDArray = np.array([(wall.size_x, wall.size_y) for wall in stage.walls], dtype=np.int64).reshape(-1, 2)
+
+        self.names: List[str] = [tank.name for tank in tanks]
+        self.sizes: List[int] = [tank.size for tank in tanks]
+        self.max_bullets: List[int] = [tank.max_bullets for tank in tanks]
+        self.pos: NDArray = np.zeros((nb_rows, 2), dtype=np.int64)
+        self.size: NDArray = np.full((nb_rows, 1), stage.bullet_size, dtype=np.int64)
+        self.alive: NDArray = np.array([tank.is_alive for tank in tanks], dtype=bool)
+        self.enemies: List[int] = list(range(1, len(tanks)))
+        self.bullets: List[List[int]] = [[] for _ in tanks]
+        self.directions: List[Any] = [None] * nb_rows
+        self.free: List[int] = list(range(nb_rows - 1, len(tanks) - 1, -1))
+        self.paths: Dict[tuple, Path] = {}
+        self.steps: NDArray = np.arange(1, stage.tank_speed + 1)
+
+        for row, tank in enumerate(tanks):
+            self.pos[row] = (tank.pos_x, tank.pos_y)
+            self.size[row] = tank.size
+            for bullet in tank.bullets:
+                self.add_bullet(row, (bullet.pos_x, bullet.pos_y), bullet.direction)
+
+    def add_bullet(self: "World", tank: int, position: tuple[int, int], direction: tuple[int, int]) -> None:
+        """
+        Add a bullet at the end of the bullets of the tank
+        """
+        row: int = self.free.pop()
+        self.pos[row] = position
+        self.directions[row] = direction
+        self.bullets[tank].append(row)
+
+    def remove_bullet(self: "World", bullets: List[int], row: int) -> bool:
+        """
+        Remove the first bullet equal to the bullet row from bullets,
+        like list.remove on the bullets of a tank
+
+        Return False if there is no such bullet
+        """
+        position: List[int] = self.pos[row].tolist()
+
+        for ind, other in enumerate(bullets):
+            if other == row or (self.directions[other] == self.directions[row] and self.pos[other].tolist() == position):
+                del bullets[ind]
+                self.directions[other] = None
+                self.free.append(other)
+                return True
+        return False
+
+    def tank_view(self: "World", tank: int) -> TankView:
+        """
+        The function to get the read-only view of a tank
+        """
+        positions: List[List[int]] = self.pos[[tank] + self.bullets[tank]].tolist()
+        return TankView(bool(self.alive[tank]), self.names[tank], positions[0][0], positions[0][1],
+                        self.sizes[tank], self.max_bullets[tank],
+                        tuple(BulletView(position[0], position[1], self.directions[row], self.bullet_size)
+                              for row, position in zip(self.bullets[tank], positions[1:])))
+
+    def view(self: "World", previous: StageView) -> StageView:
+        """
+        The function to get the read-only view of the stage,
+        previous being a view of the same stage (for the walls)
+        """
+        return replace(previous, enemies=tuple(self.tank_view(tank) for tank in self.enemies),
+                       player=self.tank_view(0), current_frame=self.current_frame)
+
+    def remove_dead(self: "World") -> None:
+        """
+        Remove the dead enemies without bullets, like ModuleGame.Roster.remove_dead
+        """
+        self.enemies = [a for a in self.enemies if self.alive[a] or self.bullets[a]]
+
+    def check_move(self: "World", direction: str, tank: int) -> int:
+        """
+        Check how far the tank can move, like ModuleGame.check_move
+        """
+        if direction not in VECTORS:
+            return self.tank_speed
+
+        vector: tuple[int, int] = VECTORS[direction]
+        pos_x: int
+        pos_y: int
+        pos_x, pos_y = self.pos[tank].tolist()
+        size: int = self.sizes[tank]
+        xs: NDArray = pos_x + self.steps * vector[0]
+        ys: NDArray = pos_y + self.steps * vector[1]
+        others: List[int] = [a for a in self.enemies if a != tank and self.alive[a]] + ([0] if tank != 0 else [])
+
+        blocked: NDArray = (xs - size < 0) | (xs + size > self.width) | (ys - size < 0) | (ys + size > self.height)
+        blocked |= collide(xs, ys, size, self.wall_pos, self.wall_size).any(axis=0)
+        if others:
+            blocked |= collide(xs, ys, size, self.pos[others], self.size[others]).any(axis=0)
+
+        if blocked.any():
+            return int(blocked.argmax())
+        return self.tank_speed
+
+    def make_move(self: "World", direction: str, tank: int) -> None:
+        """
+        Make the move specified in args for tank
+        """
+        if direction in VECTORS:
+            distance: int = self.check_move(direction, tank)
+            self.pos[tank, 0] += distance * VECTORS[direction][0]
+            self.pos[tank, 1] += distance * VECTORS[direction][1]
+
+    def make_shoot(self: "World", shoot: bool, direction: tuple[int, int], tank: int) -> None:
+        """
+        Make the shoot specified in args for tank
+        """
+        if shoot and len(self.bullets[tank]) < self.max_bullets[tank] and direction != (0, 0):
+            self.add_bullet(tank, tuple(self.pos[tank].tolist()), direction)
+
+    def actualize_tanks(self: "World", previous: StageView, player_previous: StageView) -> None:
+        """
+        Actualize the tanks, like ModuleGame.actualize_tanks
+        """
+        action: TankAction
+        view: StageView = self.view(previous)
+
+        for ind, enemy in enumerate(self.enemies):
+            if self.alive[enemy]:
+                action = ModuleBot.bot_move(view, view.enemies[ind], ModuleGame.BOT)
+                self.make_move(action.direction, enemy)
+                self.make_shoot(action.shoot, action.shoot_direction, enemy)
+                view = view.with_enemy(ind, self.tank_view(enemy))
+
+        if self.alive[0]:
+            action = ModuleGame.timed_move(self.view(player_previous))
+            self.make_move(action.direction, 0)
+            self.make_shoot(action.shoot, action.shoot_direction, 0)
+
+    def get_path(self: "World", direction: tuple[int, int]) -> Path:
+        """
+        Return the number of positions taken by a bullet during the frame,
+        the (2, n) offsets of these positions and the offset of the last
+        position, like ModuleGame.get_steps (computed once per direction)
+        """
+        key: tuple = tuple(direction)
+        if key not in self.paths:
+            nb_steps: int
+            unit_vector: tuple[float, float]
+            last: tuple[float, float]
+            nb_steps, unit_vector, last = ModuleGame.get_steps(Bullet(0, 0, direction, self.bullet_size), self.stage)
+            self.paths[key] = (nb_steps, np.arange(nb_steps) * np.array(unit_vector).reshape(2, 1), last)
+        return self.paths[key]
+
+    def get_targets(self: "World", is_player: bool) -> List[int]:
+        """
+        Return the rows of the tanks and bullets a bullet can hit,
+        in the order of ModuleGame.bullet_moves
+        """
+        targets: List[int] = []
+
+        if is_player:
+            for enemy in self.enemies:
+                if self.alive[enemy]:
+                    targets.append(enemy)
+                targets += self.bullets[enemy]
+        else:
+            targets.append(0)
+            targets += self.bullets[0]
+
+        return targets
+
+    def sweep(self: "World", bullets: List[int], targets: List[int]) -> Sweep:
+        """
+        Sweep the bullets along their path of the frame, all at once,
+        against the walls and the targets
+        """
+        xs: NDArray
+        ys: NDArray
+        nb_steps: NDArray
+        last: List[tuple[float, float]]
+        xs, ys, nb_steps, last = stack_paths([self.get_path(self.directions[row]) for row in bullets], self.pos[bullets].tolist())
+        first: NDArray
+        steps: NDArray
+        first, steps = sweep_paths(xs, ys, nb_steps, self.bullet_size, self.width, self.height,
+                                   (self.wall_pos, self.wall_size), (self.pos[targets], self.size[targets]))
+        return nb_steps, first, steps, last
+
+    def bullet_destruct(self: "World", bullet: int, tank: int, collision: int, special: List[str]) -> None:
+        """
+        Destruct the bullet, like ModuleGame.bullet_destruct
+        """
+        self.remove_bullet(self.bullets[tank], bullet)
+
+        if collision >= len(self.names):
+            if not self.remove_bullet(self.bullets[0], collision):
+                for enemy in self.enemies:
+                    if self.remove_bullet(self.bullets[enemy], collision):
+                        break
+
+        elif collision != WALL:
+            self.alive[collision] = False
+            special.append(f"Death: {self.names[collision]}")
+
+    def get_phase(self: "World", is_player: bool) -> tuple[List[int], List[int], List[int]]:
+        """
+        Return the tanks whose bullets move in the phase, their bullets and
+        every target of these bullets
+
+        Targets don't move while the bullets of the player move, nor while
+        the bullets of the enemies move, so each phase can be swept at once
+        """
+        if is_player:
+            return [0], list(self.bullets[0]), [row for enemy in self.enemies for row in [enemy] + self.bullets[enemy]]
+        return list(self.enemies), [row for enemy in self.enemies for row in self.bullets[enemy]], [0] + self.bullets[0]
+
+    def move_phase(self: "World", is_player: bool, phase: tuple[List[int], List[int], List[int]], sweep: Sweep, special: List[str]) -> None:
+        """
+        Move or destruct the bullets of the phase from get_phase,
+        with the result of the sweep of its bullets against its targets
+        """
+        indexes: Dict[int, int] = {row: ind for ind, row in enumerate(phase[1])}
+        columns: Dict[int, int] = {row: ind for ind, row in enumerate(phase[2])}
+
+        for tank in phase[0]:
+            self.move_bullets(tank, is_player, special, sweep, indexes, columns)
+
+    def actualize_bullets(self: "World", special: List[str]) -> None:
+        """
+        Actualize the bullets, like ModuleGame.actualize_bullets
+        (a bullet right after a destroyed one only moves on the next frame)
+        """
+        phase: tuple[List[int], List[int], List[int]]
+
+        for is_player in (True, False):
+            phase = self.get_phase(is_player)
+            if phase[1]:
+                self.move_phase(is_player, phase, self.sweep(phase[1], phase[2]), special)
+
+    def move_bullets(self: "World", tank: int, is_player: bool, special: List[str], sweep: Sweep,
+                     indexes: Dict[int, int], columns: Dict[int, int]) -> None:
+        """
+        Move or destruct the bullets of the tank, like the loops of
+        ModuleGame.actualize_bullets, with the result of sweep
+
+        indexes and columns: the index of each bullet and target in sweep
+        """
+        bullets: List[int] = self.bullets[tank]
+        collision: int | None
+        targets: List[int]
+        steps: NDArray
+        first: int
+        row: int
+        target: int
+        ind: int = 0
+
+        while ind < len(bullets):
+            row = indexes[bullets[ind]]
+            first = int(sweep[1][row])
+            collision = WALL if first < sweep[0][row] else None
+
+            targets = self.get_targets(is_player)
+            if targets and first > 0:
+                steps = sweep[2][row, [columns[a] for a in targets]]
+                target = int(steps.argmin())
+                if steps[target] < first:
+                    collision = targets[target]
+
+            if collision is not None:
+                self.bullet_destruct(bullets[ind], tank, collision, special)
+            else:
+                self.pos[bullets[ind]] = (round(sweep[3][row][0]), round(sweep[3][row][1]))
+            ind += 1
+
+    def check_end(self: "World") -> bool:
+        """
+        Check if the game is finished
+        """
+        if not self.alive[0]:
+            return True
+        if not self.alive[1:].any():
+            return True
+        if self.current_frame > self.max_frame:
+            return True
+        return False
+
+
+def play(stage_data: StageData, log: ModuleGame.FrameLog, replay_log: ReplayWriter | None = None) -> str:
+    """
+    Play the stage until the end and return the result, like ModuleGame.play
+    """
+    world: World = World(stage_data)
+    special_action: List[str] = []
+    finished: bool = False
+    walls_view: StageView = stage_data.view()
+    player_view: StageView = stage_data.view()
+    view: StageView
+    result: str = "GAME OVER"
+
+    ModuleGame.print_header(stage_data, log)
+
+    while not finished:
+        if ModuleGame.BUDGET is not None:
+            ModuleGame.BUDGET.frame = world.current_frame
+        world.remove_dead()
+        world.actualize_tanks(walls_view, player_view)
+        world.actualize_bullets(special_action)
+        view = world.view(walls_view)
+        ModuleGame.print_log(view, log, special_action)
+        if ModuleGame.BUDGET is not None:
+            ModuleGame.BUDGET.check()
+        if replay_log is not None:
+            ModuleGame.print_replay(view, replay_log, special_action)
+        world.current_frame += 1
+        special_action.clear()
+        finished = world.check_end()
+
+    if world.current_frame > world.max_frame:
+        result = "TIE"
+    elif world.alive[0]:
+        result = "WINNER"
+
+    return result
@@ -3,8 +3,9 @@ The Library file of the game
 """
 
 
-from dataclasses import dataclass, field
-from typing import List, Literal
+from dataclasses import dataclass, field, replace
+from random import Random
+from typing import Dict, Iterable, List, Literal, Sequence
 
 
 def is_lower_equal(a: int | float, b: int | float) -> bool:
@@ -16,6 +17,15 @@ def is_lower_equal(a: int | float, b: int | float) -> bool:
     return abs(a - b) < 10e-6 or a < b
 
 
+def copy_random(rng: Random) -> Random:
+    """
+    The function to copy a random generator with its state
+    """
+    new_rng: Random = Random()
+    new_rng.setstate(rng.getstate())
+    return new_rng
+
+
 def check_collision(obj1: tuple[int | float, int | float, int, int], obj2: tuple[int | float, int | float, int, int]) -> bool:
     """
     The function to check if obj2 is in obj1
@@ -40,10 +50,13 @@ def check_collision(obj1: tuple[int | float, int | float, int, int], obj2: tuple
         is_lower_equal(distance_y, max_y)
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Wall:
     """
     The class for the wall
+
+    Walls never change during a game, so they are immutable
+    and shared by the copies of the stage
     """
     pos_x: int = 0
     pos_y: int = 0
@@ -62,12 +75,196 @@ class Wall:
 
     def copy(self: "Wall") -> "Wall":
         """
-        The function to copy the wall
+        The function to copy the wall, the wall itself as it is immutable
         """
-        return Wall(self.pos_x, self.pos_y, self.size_x, self.size_y)
+        return self
+
+    def view(self: "Wall") -> "WallView":
+        """
+        The function to get a read-only view of the wall
+        """
+        return WallView(self.pos_x, self.pos_y, self.size_x, self.size_y)
+
+
+@dataclass(slots=True)
+class WallGrid:
+    """
+    The class for the spatial index of the walls
+
+    Walls never move during a game, so they are bucketed once in a uniform
+    grid of square cells and a query only tests the walls registered in the
+    cells overlapping the probe box
+
+    walls: the walls of the stage or their read-only views
+    """
+    walls: "Sequence[Wall | WallView]" = field(default_factory=list)
+    width: int = 0
+    height: int = 0
+    cell_size: int = 32
+    cols: int = field(init=False, default=0)
+    rows: int = field(init=False, default=0)
+    cells: "List[List[Wall | WallView]]" = field(init=False, default_factory=list, repr=False)
+    order: Dict[int, int] = field(init=False, default_factory=dict, repr=False)
+
+    def __post_init__(self: "WallGrid") -> None:
+        self.cols = max(1, -(-self.width // self.cell_size))
+        self.rows = max(1, -(-self.height // self.cell_size))
+        self.cells = [[] for _ in range(self.cols * self.rows)]
+
+        for ind, wall in enumerate(self.walls):
+            self.order[id(wall)] = ind
+            # One pixel of margin covers the precision of is_lower_equal
+            for cell in self.get_cells(wall.pos_x - wall.size_x - 1, wall.pos_y - wall.size_y - 1,
+                                       wall.pos_x + wall.size_x + 1, wall.pos_y + wall.size_y + 1):
+                self.cells[cell].append(wall)
+
+    def get_cells(self: "WallGrid", left: int | float, top: int | float, right: int | float, bottom: int | float) -> List[int]:
+        """
+        The function to get the index of every cell overlapping the box
+
+        Boxes going out of the map are clamped to the border cells
+        """
+        col_min: int = min(max(int(left // self.cell_size), 0), self.cols - 1)
+        col_max: int = min(max(int(right // self.cell_size), 0), self.cols - 1)
+        row_min: int = min(max(int(top // self.cell_size), 0), self.rows - 1)
+        row_max: int = min(max(int(bottom // self.cell_size), 0), self.rows - 1)
+
+        return [row * self.cols + col for row in range(row_min, row_max + 1) for col in range(col_min, col_max + 1)]
+
+    def get_walls(self: "WallGrid", left: int | float, top: int | float, right: int | float, bottom: int | float) -> "List[Wall | WallView]":
+        """
+        The function to get every wall registered in the cells
+        overlapping the box, without duplicates and in the order
+        of the walls list
+        """
+        return self.get_cell_walls(self.get_cells(left, top, right, bottom))
+
+    def get_cell_walls(self: "WallGrid", cells: Iterable[int]) -> "List[Wall | WallView]":
+        """
+        The function to get every wall registered in the cells,
+        without duplicates and in the order of the walls list
+        """
+        found: "Dict[int, Wall | WallView]" = {}
+
+        for cell in cells:
+            for wall in self.cells[cell]:
+                found[self.order[id(wall)]] = wall
+
+        return [found[ind] for ind in sorted(found)]
+
+    def collide(self: "WallGrid", pos_x: int | float, pos_y: int | float, width: int, height: int) -> "Wall | WallView | None":
+        """
+        The function to get a wall colliding with the object, if any
+
+        Same test as Wall.is_in_wall, only done on the walls
+        of the cells overlapping the object
+        """
+        for cell in self.get_cells(pos_x - width, pos_y - height, pos_x + width, pos_y + height):
+            for wall in self.cells[cell]:
+                if wall.is_in_wall(pos_x, pos_y, width, height):
+                    return wall
+        return None
+
+
+@dataclass(slots=True, eq=False, weakref_slot=True)
+class WallMap:
+    """
+    The class for the occupancy map of the walls, for objects of a given size
+
+    blocked: one bit per pixel of the map, set if an object of this size
+    centered on the pixel is in a wall (the walls dilated by the size)
 
+    A map is only equal to itself, so that caches of other modules can be
+    kept by map (see ModuleSight)
 
-@dataclass
+    Walls never move during a game, so the map is built once per stage
+    (see ModuleWallMap for the cache on disk) and the walls are only
+    tested for positions next to a blocked pixel
+    """
+    grid: WallGrid = field(default_factory=WallGrid)
+    size: int = 0
+    blocked: bytes = field(default=b"", repr=False)
+    width: int = field(init=False, default=0)
+    height: int = field(init=False, default=0)
+    stride: int = field(init=False, default=0)
+
+    def __post_init__(self: "WallMap") -> None:
+        self.width = self.grid.width
+        self.height = self.grid.height
+        self.stride = self.width // 8 + 1
+
+        if not self.blocked:
+            self.build()
+        if len(self.blocked) != self.stride * (self.height + 1):
+            raise ValueError("The occupancy map does not match the size of the stage")
+
+    def build(self: "WallMap") -> None:
+        """
+        The function to build the blocked pixels
+        """
+        lines: List[int] = [0] * (self.height + 1)
+        left: int
+        right: int
+        top: int
+        bottom: int
+        mask: int
+
+        for wall in self.grid.walls:
+            left = max(wall.pos_x - wall.size_x - self.size, 0)
+            right = min(wall.pos_x + wall.size_x + self.size, self.width)
+            top = max(wall.pos_y - wall.size_y - self.size, 0)
+            bottom = min(wall.pos_y + wall.size_y + self.size, self.height)
+            if left > right or top > bottom:
+                continue
+
+            mask = ((1 << (right - left + 1)) - 1) << left
+            for line in range(top, bottom + 1):
+                lines[line] |= mask
+
+        self.blocked = b"".join(line.to_bytes(self.stride, "little") for line in lines)
+
+    def collide(self: "WallMap", pos_x: int | float, pos_y: int | float) -> bool:
+        """
+        The function to check if an object of the size of the map is in a wall,
+        same result as Wall.is_in_wall on every wall
+
+        A position is only in a wall if a pixel next to it is blocked,
+        the walls are only tested in this case
+        """
+        if pos_x < 0 or pos_y < 0 or pos_x > self.width or pos_y > self.height:
+            return self.grid.collide(pos_x, pos_y, self.size, self.size) is not None
+
+        left: int = int(pos_x)
+        top: int = int(pos_y)
+
+        for line in {top, top + (pos_y != top)}:
+            for col in {left, left + (pos_x != left)}:
+                if self.blocked[line * self.stride + (col >> 3)] >> (col & 7) & 1:
+                    return self.grid.collide(pos_x, pos_y, self.size, self.size) is not None
+        return False
+
+
+def get_wall_map(stage: "StageData | StageView", size: int) -> WallMap:
+    """
+    The function to get the occupancy map of the walls of the stage
+    for objects of this size, built if the stage has none yet
+    """
+    wall_map: WallMap | None = stage.wall_maps.get(size)
+
+    if wall_map is None:
+        wall_map = stage.wall_maps[size] = WallMap(stage.wall_grid, size)
+    return wall_map
+
+
+def copy_wall_maps(wall_maps: Dict[int, WallMap], grid: WallGrid) -> Dict[int, WallMap]:
+    """
+    The function to get the occupancy maps of the same walls over another
+    grid, the blocked pixels being shared
+    """
+    return {size: WallMap(grid, size, wall_map.blocked) for size, wall_map in wall_maps.items()}
+
+
+@dataclass(slots=True)
 class Bullet:
     """
     The class for the bullet
@@ -92,8 +289,14 @@ class Bullet:
         """
         return Bullet(self.pos_x, self.pos_y, self.direction, self.size)
 
+    def view(self: "Bullet") -> "BulletView":
+        """
+        The function to get a read-only view of the bullet
+        """
+        return BulletView(self.pos_x, self.pos_y, self.direction, self.size)
+
 
-@dataclass
+@dataclass(slots=True)
 class Tank:
     """
     The class for the tank
@@ -122,8 +325,15 @@ class Tank:
         new_bullets: List[Bullet] = [a.copy() for a in self.bullets]
         return Tank(self.is_alive, self.name, self.pos_x, self.pos_y, self.size, self.max_bullets, new_bullets)
 
+    def view(self: "Tank") -> "TankView":
+        """
+        The function to get a read-only view of the tank
+        """
+        return TankView(self.is_alive, self.name, self.pos_x, self.pos_y, self.size, self.max_bullets,
+                        tuple(a.view() for a in self.bullets))
+
 
-@dataclass
+@dataclass(slots=True)
 class TankAction:
     """
     The class for the tank action
@@ -133,10 +343,15 @@ class TankAction:
     shoot_direction: tuple[int, int] = (0, 0)
 
 
-@dataclass
+@dataclass(slots=True)
 class StageData:
     """
     The class for the stage data
+
+    rng: the random generator of the stage, seeded with seed, every view
+    of the stage gets its own copy for the random choices of the bots or
+    of the player (see view)
+    wall_maps: the occupancy maps of the walls by size of object (see get_wall_map)
     """
     walls: List[Wall] = field(default_factory=list)
     enemies: List[Tank] = field(default_factory=list)
@@ -151,16 +366,178 @@ class StageData:
     tank_speed: int = 3
     player_max_bullet: int = 5
     enemy_max_bullet: int = 3
+    wall_grid: WallGrid = field(default_factory=WallGrid)
+    seed: int = 0
+    rng: Random = field(default_factory=Random, repr=False, compare=False)
+    wall_maps: Dict[int, WallMap] = field(default_factory=dict, repr=False, compare=False)
 
     def copy(self: "StageData") -> "StageData":
         """
         The function to copy the stage data
         """
-        new_walls: List[Wall] = [a.copy() for a in self.walls]
         new_enemies: List[Tank] = [a.copy() for a in self.enemies]
         new_player: Tank = self.player.copy()
-        return StageData(new_walls, new_enemies, new_player, self.width,
+        return StageData(list(self.walls), new_enemies, new_player, self.width,
+                         self.height, self.current_frame, self.max_frame,
+                         self.bullet_size, self.tank_size, self.bullet_speed,
+                         self.tank_speed, self.player_max_bullet,
+                         self.enemy_max_bullet, self.wall_grid,
+                         self.seed, copy_random(self.rng), self.wall_maps)
+
+    def view(self: "StageData", previous: "StageView | None" = None) -> "StageView":
+        """
+        The function to get a read-only view of the stage data
+
+        A new view has its own walls, occupancy maps of the walls and copy
+        of the random generator, so that what is given a view never changes
+        the ones of the stage or of other views. Walls never change during
+        a game, so these are reused from a previous view of the same stage
+        instead of being rebuilt, and its random generator goes on
+        """
+        walls: tuple[WallView, ...]
+        wall_grid: WallGrid
+        wall_maps: Dict[int, WallMap]
+        rng: Random
+
+        if previous is None:
+            walls = tuple(a.view() for a in self.walls)
+            wall_grid = WallGrid(walls, self.width, self.height)
+            wall_maps = copy_wall_maps(self.wall_maps, wall_grid)
+            rng = copy_random(self.rng)
+        else:
+            walls = previous.walls
+            wall_grid = previous.wall_grid
+            wall_maps = previous.wall_maps
+            rng = previous.rng
+
+        return StageView(walls, tuple(a.view() for a in self.enemies), self.player.view(),
+                         self.width, self.height, self.current_frame, self.max_frame,
+                         self.bullet_size, self.tank_size, self.bullet_speed,
+                         self.tank_speed, self.player_max_bullet,
+                         self.enemy_max_bullet, wall_grid,
+                         self.seed, rng, wall_maps)
+
+
+@dataclass(frozen=True, slots=True)
+class WallView:
+    """
+    The class for the read-only view of a wall
+    """
+    pos_x: int = 0
+    pos_y: int = 0
+    size_x: int = 0
+    size_y: int = 0
+
+    def is_in_wall(self: "WallView", pos_x: int | float, pos_y: int | float, width: int, height: int) -> bool:
+        """
+        The function to check if the position is valid
+        for this wall
+        """
+        return check_collision((self.pos_x, self.pos_y, self.size_x, self.size_y), (pos_x, pos_y, width, height))
+
+    def copy(self: "WallView") -> Wall:
+        """
+        The function to get a modifiable copy of the wall
+        """
+        return Wall(self.pos_x, self.pos_y, self.size_x, self.size_y)
+
+
+@dataclass(frozen=True, slots=True)
+class BulletView:
+    """
+    The class for the read-only view of a bullet
+    """
+    pos_x: int = 0
+    pos_y: int = 0
+    direction: tuple[int, int] = (0, 0)
+    size: int = 0
+
+    def is_in_bullet(self: "BulletView", pos_x: int | float, pos_y: int | float, size_x: int, size_y: int) -> bool:
+        """
+        The function to check if the position is valid
+        for this bullet
+        """
+        return check_collision((self.pos_x, self.pos_y, self.size, self.size), (pos_x, pos_y, size_x, size_y))
+
+    def copy(self: "BulletView") -> Bullet:
+        """
+        The function to get a modifiable copy of the bullet
+        """
+        return Bullet(self.pos_x, self.pos_y, self.direction, self.size)
+
+
+@dataclass(frozen=True, slots=True)
+class TankView:
+    """
+    The class for the read-only view of a tank
+    """
+    is_alive: bool = True
+    name: str = "Name"
+    pos_x: int = 0
+    pos_y: int = 0
+    size: int = 0
+    max_bullets: int = 0
+    bullets: tuple[BulletView, ...] = ()
+
+    def is_in_tank(self: "TankView", pos_x: int | float, pos_y: int | float, size_x: int, size_y: int) -> bool:
+        """
+        The function to check if the position is valid
+        for this tank
+        """
+        return check_collision((self.pos_x, self.pos_y, self.size, self.size), (pos_x, pos_y, size_x, size_y))
+
+    def copy(self: "TankView") -> Tank:
+        """
+        The function to get a modifiable copy of the tank
+        """
+        return Tank(self.is_alive, self.name, self.pos_x, self.pos_y, self.size, self.max_bullets,
+                    [a.copy() for a in self.bullets])
+
+
+@dataclass(frozen=True, slots=True)
+class StageView:
+    """
+    The class for the read-only view of the stage data
+
+    Given to the bots and to the player instead of a copy of the stage,
+    with the same attributes (tuples instead of lists). The bots and the
+    player get views of their own (see StageData.view): the player never
+    draws from the random generator of the bots or fills their caches
+    """
+    walls: tuple[WallView, ...] = ()
+    enemies: tuple[TankView, ...] = ()
+    player: TankView = TankView()
+    width: int = 0
+    height: int = 0
+    current_frame: int = 0
+    max_frame: int = 0
+    bullet_size: int = 2
+    tank_size: int = 9
+    bullet_speed: int = 7
+    tank_speed: int = 3
+    player_max_bullet: int = 5
+    enemy_max_bullet: int = 3
+    wall_grid: WallGrid = field(default_factory=WallGrid)
+    seed: int = 0
+    rng: Random = field(default_factory=Random, repr=False, compare=False)
+    wall_maps: Dict[int, WallMap] = field(default_factory=dict, repr=False, compare=False)
+
+    def with_enemy(self: "StageView", index: int, enemy: TankView) -> "StageView":
+        """
+        The function to get the view with the enemy at index replaced,
+        everything else is shared
+        """
+        return replace(self, enemies=self.enemies[:index] + (enemy,) + self.enemies[index + 1:])
+
+    def copy(self: "StageView") -> StageData:
+        """
+        The function to get a modifiable copy of the stage data
+        """
+        new_walls: List[Wall] = [a.copy() for a in self.walls]
+        new_grid: WallGrid = WallGrid(new_walls, self.width, self.height)
+        return StageData(new_walls, [a.copy() for a in self.enemies], self.player.copy(), self.width,
                          self.height, self.current_frame, self.max_frame,
                          self.bullet_size, self.tank_size, self.bullet_speed,
                          self.tank_speed, self.player_max_bullet,
-                         self.enemy_max_bullet)
+                         self.enemy_max_bullet, new_grid,
+                         self.seed, copy_random(self.rng), copy_wall_maps(self.wall_maps, new_grid))
@@ -0,0 +1,291 @@
+"""
+The benchmark of the engine of the game
+"""
+
+
+import tracemalloc
+from os import path, makedirs
+from sys import version, getallocatedblocks
+from time import perf_counter_ns
+from random import Random
+from random import seed as random_seed
+from importlib import import_module, reload
+from tempfile import TemporaryDirectory
+from argparse import ArgumentParser, Namespace
+from dataclasses import dataclass, field
+from types import ModuleType
+from typing import List, Dict, Any, Callable
+from json import dumps
+from TankLib import Wall, Bullet, Tank, TankAction, StageData
+from ModuleGenerator import check_wall_in_walls, LIST_NAME
+import ModuleGame
+import ModuleBot
+
+
+PATH: str = path.dirname(path.abspath(__file__))
+SEED: int = 2024
+ORIGINAL_STAGES: List[int] = [1, 12, 23, 34, 45, 56, 67, 78, 89, 100]
+PHASES: List[str] = ["actualize_tanks", "actualize_bullets", "print_log", "check_end"]
+ENTITIES: int = 10000
+
+
+@dataclass
+class Scenario:
+    """
+    The class for a stage of the benchmark
+
+    constants: values of the constants of ModuleGame for this stage
+    """
+    name: str = ""
+    stage: str = ""
+    constants: Dict[str, int] = field(default_factory=dict)
+
+
+def make_stress_stage(seed: int, nb_walls: int, nb_enemies: int, bot: int) -> str:
+    """
+    Make the text of a 800x650 stage with nb_walls small walls
+    and the tanks far from each other
+    """
+    rng: Random = Random(seed)
+    width: int = 800
+    height: int = 650
+    tank_size: int = ModuleGame.TANK_SIZE
+    walls: List[Wall] = []
+    tanks: List[Tank] = []
+    x: int
+    y: int
+    size_x: int
+    size_y: int
+
+    while len(walls) < nb_walls:
+        size_x = rng.randint(4, 15)
+        size_y = rng.randint(4, 15)
+        x = rng.randint(size_x, width - size_x)
+        y = rng.randint(size_y, height - size_y)
+        if not check_wall_in_walls(x, y, size_x + 2, size_y + 2, walls):
+            walls.append(Wall(x, y, size_x, size_y))
+
+    while len(tanks) < nb_enemies + 1:
+        x = rng.randint(tank_size + 1, width - tank_size - 1)
+        y = rng.randint(tank_size + 1, height - tank_size - 1)
+        if not check_wall_in_walls(x, y, tank_size, tank_size, walls) and \
+           not any(tank.is_in_tank(x, y, tank_size * 5, tank_size * 5) for tank in tanks):
+            tanks.append(Tank(True, LIST_NAME[len(tanks) % len(LIST_NAME)], x, y, tank_size))
+
+    lines: List[str] = [f"Dimension: {width} {height}", f"Bot: {bot}"]
+    lines += [f"Wall: {wall.pos_x} {wall.pos_y} {wall.size_x} {wall.size_y}" for wall in walls]
+    lines.append(f"Player: {tanks[0].pos_x} {tanks[0].pos_y}")
+    lines += [f"Enemy: {tank.name} {tank.pos_x} {tank.pos_y}" for tank in tanks[1:]]
+    return "\n".join(lines) + "\n"
+
+
+def get_scenarios() -> List[Scenario]:
+    """
+    Get every stage of the benchmark
+    """
+    scenarios: List[Scenario] = []
+
+    for index in ORIGINAL_STAGES:
+        with open(f"{PATH}/original_stages.bak/stage_{index}.in", "r", encoding="iso8859") as file:
+            scenarios.append(Scenario(f"original_{index}", file.read()))
+
+    scenarios.append(Scenario("stress_walls", make_stress_stage(SEED, 200, 7, 3), {"NB_FRAME": 100}))
+    scenarios.append(Scenario("stress_bullets", make_stress_stage(SEED + 1, 15, 7, 1),
+                              {"NB_FRAME": 300, "PLAYER_MAX_BULLET": 20, "ENEMY_MAX_BULLET": 10}))
+    scenarios.append(Scenario("stress_interception", make_stress_stage(SEED + 2, 15, 15, 1),
+                              {"NB_FRAME": 300, "PLAYER_MAX_BULLET": 80, "ENEMY_MAX_BULLET": 40}))
+    return scenarios
+
+
+def timed(function: Callable, times: Dict[str, int], name: str) -> Callable:
+    """
+    Wrap function to add its time to times[name], in nanoseconds
+    """
+    def wrapper(*args: Any) -> Any:
+        start: int = perf_counter_ns()
+        try:
+            return function(*args)
+        finally:
+            times[name] += perf_counter_ns() - start
+    return wrapper
+
+
+def get_entities(map_dir: str) -> Dict[str, Callable[[], Any]]:
+    """
+    Get the functions building the entities of TankLib, as the engine and the bots do
+
+    map_dir: the folder of the cache of the maps of the walls
+    """
+    tank: Tank = Tank(True, "Name", 100, 100, ModuleGame.TANK_SIZE, ModuleGame.ENEMY_MAX_BULLET,
+                      [Bullet(100, 100, (3, 4), ModuleGame.BULLET_SIZE) for _ in range(ModuleGame.ENEMY_MAX_BULLET)])
+    stage: StageData = ModuleGame.get_stage_data(f"{PATH}/original_stages.bak/stage_{ORIGINAL_STAGES[-1]}.in", map_dir)
+
+    return {
+        "Wall": lambda: Wall(100, 100, 10, 10),
+        "Bullet": lambda: Bullet(100, 100, (3, 4), ModuleGame.BULLET_SIZE),
+        "Tank": lambda: Tank(True, "Name", 100, 100, ModuleGame.TANK_SIZE, ModuleGame.ENEMY_MAX_BULLET),
+        "TankAction": TankAction,
+        "Tank.copy": tank.copy,
+        "StageData.copy": stage.copy,
+    }
+
+
+def measure_entities(map_dir: str, count: int = ENTITIES) -> Dict[str, Dict[str, float]]:
+    """
+    Measure the time, the memory and the allocated blocks to build
+    each entity of TankLib, count of them being kept alive
+
+    map_dir: the folder of the cache of the maps of the walls
+    """
+    stats: Dict[str, Dict[str, float]] = {}
+    kept: List[Any]
+    start: int
+    seconds: float
+    blocks: int
+
+    for name, make in get_entities(map_dir).items():
+        kept = [None] * count
+        start = perf_counter_ns()
+        for ind in range(count):
+            kept[ind] = make()
+        seconds = (perf_counter_ns() - start) * 10**-9
+
+        kept = [None] * count
+        tracemalloc.start()
+        blocks = getallocatedblocks()
+        try:
+            for ind in range(count):
+                kept[ind] = make()
+            stats[name] = {"bytes": round(tracemalloc.get_traced_memory()[0] / count, 1),
+                           "blocks": round((getallocatedblocks() - blocks) / count, 2),
+                           "microseconds": round(seconds / count * 10**6, 3)}
+        finally:
+            tracemalloc.stop()
+        del kept
+
+    return stats
+
+
+def get_phase_owner(name: str, world: bool) -> Any:
+    """
+    Get the module or the class with the function of the phase name
+    """
+    if world:
+        import ModuleWorld
+        if hasattr(ModuleWorld.World, name):
+            return ModuleWorld.World
+    return ModuleGame
+
+
+def run_scenario(scenario: Scenario, folder: str, player: ModuleType, memory: bool, world: bool = False) -> Dict[str, Any]:
+    """
+    Run a stage of the benchmark
+
+    With memory, the peak of traced memory and of allocated blocks is
+    measured instead of the time (tracemalloc slows everything down)
+    With world, the stage is played by the array engine of ModuleWorld
+    """
+    stage_dir: str = f"{folder}/stages"
+    makedirs(stage_dir, exist_ok=True)
+    with open(f"{stage_dir}/stage_1.in", "w", encoding="iso8859") as file:
+        file.write(scenario.stage)
+
+    times: Dict[str, int] = {name: 0 for name in PHASES}
+    owners: Dict[str, Any] = {name: get_phase_owner(name, world) for name in PHASES}
+    originals: Dict[str, Any] = {name: getattr(ModuleGame, name) for name in scenario.constants}
+    phases: Dict[str, Any] = {name: getattr(owners[name], name) for name in PHASES}
+    frames: List[int] = [0]
+    peak_blocks: List[int] = [0]
+    base_blocks: int = getallocatedblocks()
+    print_log: Callable = ModuleGame.print_log
+
+    def count_frame(*args: Any) -> None:
+        print_log(*args)
+        frames[0] += 1
+        if memory:
+            peak_blocks[0] = max(peak_blocks[0], getallocatedblocks() - base_blocks)
+
+    # Same state for every run: new bots and player, same random numbers
+    reload(ModuleBot)
+    ModuleGame.ModulePlayer = reload(player)
+    random_seed(SEED)
+
+    for name, value in scenario.constants.items():
+        setattr(ModuleGame, name, value)
+    setattr(ModuleGame, "print_log", count_frame)
+    if not memory:
+        for name in PHASES:
+            setattr(owners[name], name, timed(getattr(owners[name], name), times, name))
+
+    peak_memory: int = 0
+    start: int = perf_counter_ns()
+    if memory:
+        tracemalloc.start()
+    try:
+        result: str = ModuleGame.main(1, stage_dir=stage_dir, log_dir=f"{folder}/logs", world=world, map_dir=f"{folder}/maps")
+        if memory:
+            peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+        for name, value in phases.items():
+            setattr(owners[name], name, value)
+        for name, value in originals.items():
+            setattr(ModuleGame, name, value)
+    total: int = perf_counter_ns() - start
+
+    if memory:
+        return {"peak_memory": peak_memory, "peak_blocks": peak_blocks[0]}
+
+    return {
+        "result": result,
+        "frames": frames[0],
+        "seconds": round(total * 10**-9, 4),
+        "fps": round(frames[0] / (total * 10**-9), 1),
+        "phases": {name: round(value * 10**-9, 4) for name, value in times.items()},
+    }
+
+
+def main(player_name: str = "ModuleTest", memory: bool = True, world: bool = False) -> Dict[str, Any]:
+    """
+    Run the benchmark and return the report
+    """
+    player: ModuleType = import_module(player_name)
+    report: Dict[str, Any] = {"python": version.split()[0], "player": player_name, "seed": SEED,
+                              "engine": "world" if world else "objects", "stages": {}}
+    frames: int = 0
+    seconds: float = 0
+    stats: Dict[str, Any]
+    entities: Dict[str, Dict[str, float]] = {}
+
+    with TemporaryDirectory() as folder:
+        for scenario in get_scenarios():
+            stats = run_scenario(scenario, folder, player, False, world)
+            if memory:
+                stats.update(run_scenario(scenario, folder, player, True, world))
+            report["stages"][scenario.name] = stats
+            frames += stats["frames"]
+            seconds += stats["seconds"]
+        if memory:
+            entities = measure_entities(f"{folder}/maps")
+
+    report["total"] = {"frames": frames, "seconds": round(seconds, 4), "fps": round(frames / seconds, 1)}
+    if memory:
+        report["entities"] = entities
+    return report
+
+
+if __name__ == "__main__":
+    PARSER: ArgumentParser = ArgumentParser(description="Benchmark of the engine, the report is in JSON")
+    PARSER.add_argument("--player", type=str, default="ModuleTest", help="The module of the player (default: the sample player)")
+    PARSER.add_argument("--fast", type=bool, default=False, help="If True, skip the measures of the memory (second run of every stage and entities)")
+    PARSER.add_argument("--world", type=bool, default=False, help="If True, benchmark the array engine of ModuleWorld (needs numpy)")
+    PARSER.add_argument("--output", type=str, default="", help="The file of the report (default: standard output)")
+    ARGS: Namespace = PARSER.parse_known_args()[0]
+
+    REPORT: str = dumps(main(ARGS.player, not ARGS.fast, ARGS.world), indent=4)
+
+    if ARGS.output:
+        with open(ARGS.output, "w", encoding="utf-8") as FILE:
+            FILE.write(REPORT + "\n")
+    else:
+        print(REPORT)
@@ -3,57 +3,154 @@ The main file of the game
 """
 
 
-from os import path
-from subprocess import Popen, PIPE, STDOUT, TimeoutExpired
+from os import path, kill
+import signal
+from concurrent.futures import ProcessPoolExecutor, Future, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context, get_all_start_methods
+from multiprocessing.context import BaseContext
+from multiprocessing.queues import SimpleQueue
 from argparse import ArgumentParser, Namespace
-from typing import Dict
+from typing import Dict, List, Set
 from collections import OrderedDict
-from time import perf_counter_ns
+from time import perf_counter, perf_counter_ns
+from ModuleCache import ResultCache, get_code_hash, get_stage_key
 import ModuleGenerator
-import ModuleDisplay
+import ModuleGame
 
 
 PATH: str = path.dirname(path.abspath(__file__))
+# Seconds between two checks of the wall clock time of the running stages
+POLL_TIME: float = 1
 
 
-def main() -> None:
+def run_pool(stages: List[int], results: Dict[int, str], context: BaseContext, replay: bool = False,
+             workers: int | None = None, world: bool = False) -> List[int]:
+    """
+    Run the stages in a pool of worker processes, one stage per worker,
+    put their results in results and return the stages to run again
+
+    The CPU budget of a stage (see ModuleGame.TimeBudget) doesn't count
+    the time a player sleeps or waits: a stage still running after
+    ModuleGame.WALL_LIMIT seconds of wall clock time gets its worker
+    killed and a TIME OUT. A pool can't be used after one of its workers
+    is killed, the other stages it was running are to run again
+    """
+    started: SimpleQueue = context.SimpleQueue()
+    starts: Dict[int, tuple[int, float]] = {}
+    retry: List[int] = []
+    index: int
+    pid: int
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, max_tasks_per_child=1,
+                             initializer=ModuleGame.set_started, initargs=(started,)) as executor:
+        futures: Dict[Future, int] = {executor.submit(ModuleGame.run_stage, index, replay, world=world): index for index in stages}
+        pending: Set[Future] = set(futures)
+
+        while pending:
+            done, pending = wait(pending, timeout=POLL_TIME, return_when=FIRST_COMPLETED)
+            while not started.empty():
+                index, pid = started.get()
+                starts[index] = (pid, perf_counter())
+
+            for future in done:
+                index = futures[future]
+                if index in results:
+                    continue
+                try:
+                    results[index] = future.result()[1]
+                except BrokenProcessPool:
+                    retry.append(index)
+                except Exception as e:
+                    results[index] = f"Error: {e}"
+
+            for future in pending:
+                index = futures[future]
+                if index in starts and index not in results and perf_counter() - starts[index][1] > ModuleGame.WALL_LIMIT:
+                    kill(starts[index][0], getattr(signal, "SIGKILL", signal.SIGTERM))
+                    results[index] = f"TIME OUT (stage took more than {ModuleGame.WALL_LIMIT:g} s of wall clock time)"
+
+    return retry
+
+
+def main(replay: bool = False, workers: int | None = None, force: bool = False, world: bool = False) -> None:
     """
     The main function for executing all stages of the game
+
+    Stages run in a pool of worker processes (one per core by default),
+    each stage in a new worker so that no state is shared between stages.
+    Workers are forked from a server that has already imported the
+    modules of the game when the system allows it
+
+    Each stage has a budget of CPU time and each move of the player too
+    (see ModuleGame.TimeBudget), a stage over its budget gives
+    "TIME OUT (frame <n>: <stage or move> took <time>, limit <limit>)".
+    A stage over ModuleGame.WALL_LIMIT seconds of wall clock time is
+    killed and gives a TIME OUT too (see run_pool)
+
+    Stages whose file, bots and player did not change since their last
+    run are not run again, their logs are kept (see ModuleCache)
+
+    replay: if True, binary replays are written alongside the logs
+    force: if True, every stage is run again
+    world: if True, stages are played by the array engine of ModuleWorld
+    (same games, needs numpy)
     """
-    command: str = f"python3 {PATH}/ModuleGame.py -stage "
     all_logs_file: str = f"{PATH}/logs/all.log"
 
-    processes: Dict[int, Popen] = {}
     results: OrderedDict[int, str] = OrderedDict()
     start: int = perf_counter_ns()
+    cache: ResultCache = ResultCache()
+    code_hash: bytes = get_code_hash(world)
+    keys: Dict[int, str] = {}
+    cached: str | None
+    stage_file: str
+    context: BaseContext = get_context()
 
-    for index in range(1, 101):
-        process = Popen(command + str(index), shell=True, stdout=PIPE, stderr=STDOUT, encoding="iso8859", errors="ignore")
-        processes[index] = process
+    if "forkserver" in get_all_start_methods():
+        context = get_context("forkserver")
+        context.set_forkserver_preload(["ModuleGame"])
 
-    for key, process in processes.items():
-        try:
-            process.wait(timeout=45)
-            if process.stdout is not None:
-                results[key] = process.stdout.read().strip()
-        except TimeoutExpired:
-            process.kill()
-            results[key] = "TIME OUT"
+    stages: List[int] = []
+
+    for index in range(1, 101):
+        stage_file = f"{PATH}/stages/stage_{index}.in"
+        if path.isfile(stage_file):
+            keys[index] = get_stage_key(stage_file, code_hash)
+            cached = None if force else cache.get(index, keys[index], replay)
+            if cached is not None:
+                results[index] = cached
+                continue
+        stages.append(index)
+
+    # Every new pool is for the stages of a pool with a killed worker
+    remaining: List[int] = stages
+    while remaining:
+        remaining = run_pool(remaining, results, context, replay, workers, world)
+
+    for index in stages:
+        if index in keys:
+            cache.put(index, keys[index], results[index], replay)
+
+    cache.save()
 
     results = OrderedDict(sorted(results.items(), key=lambda x: x[0]))
 
     result: str
-    res_dict: Dict[str, int] = {"WINNER": 0, "TIE": 0, "GAME OVER": 0, "ERROR": 0}
+    res_dict: Dict[str, int] = {"WINNER": 0, "TIE": 0, "GAME OVER": 0, "TIME OUT": 0, "ERROR": 0}
 
     for key, result in results.items():
         with open(all_logs_file, "a", encoding="iso8859") as file:
             file.write(f"Stage {key}: {result}\n")
+        if result.startswith("TIME OUT"):
+            res_dict["TIME OUT"] += 1
+            continue
         try:
             res_dict[result] += 1
         except KeyError:
             res_dict["ERROR"] += 1
 
-    print(f"Time: {round((perf_counter_ns() - start) * 10**-9, 3)} seconds")
+    print(f"Time: {round((perf_counter_ns() - start) * 10**-9, 3)} seconds ({100 - len(stages)} stages from the cache)")
 
     with open(all_logs_file, "a", encoding="iso8859") as file:
         for a, b in res_dict.items():
@@ -77,15 +174,22 @@ if __name__ == "__main__":
     PARSER.add_argument("--original", type=bool, default=False, help="If True, get original stages")
     PARSER.add_argument("--generate", type=bool, default=False, help="If True, generate new stages")
     PARSER.add_argument("--display", type=bool, default=False, help="If True, display games after completion")
+    PARSER.add_argument("--replay", type=bool, default=False, help="If True, write binary replays alongside the logs")
+    PARSER.add_argument("--seed", type=int, default=None, help="With --generate, the seed of the first stage, the next stages get the next seeds (default: random seeds)")
+    PARSER.add_argument("--force", type=bool, default=False, help="If True, run every stage again even if its result is in the cache")
+    PARSER.add_argument("--world", type=bool, default=False, help="If True, play with the array engine of ModuleWorld (needs numpy)")
+    PARSER.add_argument("--workers", type=int, default=0, help="Number of stages running at the same time (default: number of cores)")
     ARGS: Namespace = PARSER.parse_known_args()[0]
 
     if ARGS.original:
         backup_original_stages()
     elif ARGS.generate:
         for i in range(1, 101):
-            ModuleGenerator.generate_stage(i)
+            ModuleGenerator.generate_stage(i, None if ARGS.seed is None else ARGS.seed + i - 1)
 
-    main()
+    main(ARGS.replay, ARGS.workers or None, ARGS.force, ARGS.world)
 
     if ARGS.display:
+        # Imported only here, it opens a window as soon as it is imported
+        import ModuleDisplay
         ModuleDisplay.main()
@@ -0,0 +1,110 @@
+"""
+The parity of the swept bullets of ModuleGame with the per-pixel sampler
+of the first engine: every stage of 'stages' and 'original_stages.bak' is
+played with both, with the same seed, and must give the same log and the
+same result
+"""
+
+
+import sys
+import random
+from os import path
+from math import sqrt
+from pathlib import Path
+from typing import List
+import pytest
+
+sys.path.insert(0, path.dirname(path.dirname(path.abspath(__file__))))
+
+from TankLib import Bullet, Tank, Wall, StageData  # noqa: E402
+import ModuleGame  # noqa: E402
+import ModuleTest  # noqa: E402
+
+
+PATH: str = path.dirname(path.dirname(path.abspath(__file__)))
+STAGE_DIRS: List[str] = ["stages", "original_stages.bak"]
+STAGES: List[tuple[str, int]] = [(a, b) for a in STAGE_DIRS for b in range(1, 101)]
+
+
+def bullet_collision(is_player: bool, bullet: Bullet, coord: tuple[float, float], stage: StageData) -> Bullet | Tank | Wall | None:
+    """
+    Return what the bullet collide with at coord, like the first engine
+    """
+    for wall in stage.walls:
+        if wall.is_in_wall(coord[0], coord[1], bullet.size, bullet.size):
+            return wall
+
+    if is_player:
+        for enemy in stage.enemies:
+            if enemy.is_in_tank(coord[0], coord[1], bullet.size, bullet.size) and enemy.is_alive:
+                return enemy
+            for enemy_bullet in enemy.bullets:
+                if enemy_bullet.is_in_bullet(coord[0], coord[1], bullet.size, bullet.size):
+                    return enemy_bullet
+    else:
+        if stage.player.is_in_tank(coord[0], coord[1], bullet.size, bullet.size):
+            return stage.player
+        for player_bullet in stage.player.bullets:
+            if player_bullet.is_in_bullet(coord[0], coord[1], bullet.size, bullet.size):
+                return player_bullet
+
+    return None
+
+
+def sample_bullet(bullet: Bullet, targets: List[Bullet | Tank], stage: StageData) -> Bullet | Tank | Wall | None:
+    """
+    The bullet_moves of the first engine: the bullet is moved pixel by
+    pixel and every object of the stage is tested at every pixel
+
+    targets: ignored, the broad phase is not used
+    """
+    is_player: bool = any(a is bullet for a in stage.player.bullets)
+    coords: List[tuple[float, float]] = []
+    x: float = 0
+    y: float = 0
+
+    divider: float = sqrt(bullet.direction[0]**2 + bullet.direction[1]**2)
+    unit_vector: tuple[float, float] = (bullet.direction[0] / divider, bullet.direction[1] / divider)
+
+    while x**2 + y**2 < stage.bullet_speed**2:
+        coords.append((bullet.pos_x + x, bullet.pos_y + y))
+        x += unit_vector[0]
+        y += unit_vector[1]
+
+    collision: Bullet | Tank | Wall | None
+    for coord in coords:
+        if coord[0] - bullet.size < 0 or coord[0] + bullet.size > stage.width or \
+           coord[1] - bullet.size < 0 or coord[1] + bullet.size > stage.height:
+            return Wall()
+
+        collision = bullet_collision(is_player, bullet, coord, stage)
+        if collision is not None:
+            return collision
+
+    bullet.pos_x = round(coords[-1][0])
+    bullet.pos_y = round(coords[-1][1])
+    return None
+
+
+def play(stage_dir: str, stage_nb: int, folder: str) -> tuple[str, bytes]:
+    """
+    Play the stage of stage_dir with the sample player and a fixed seed,
+    and return its result and its log
+    """
+    random.seed(stage_nb)
+    result: str = ModuleGame.main(stage_nb, False, f"{PATH}/{stage_dir}", folder, False, f"{folder}/maps")
+
+    with open(f"{folder}/stage_{stage_nb}.log", "rb") as file:
+        return result, file.read()
+
+
+@pytest.mark.parametrize("stage_dir, stage_nb", STAGES)
+def test_parity(stage_dir: str, stage_nb: int, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(ModuleGame, "ModulePlayer", ModuleTest)
+    swept: tuple[str, bytes] = play(stage_dir, stage_nb, f"{tmp_path}/swept")
+
+    monkeypatch.setattr(ModuleGame, "bullet_moves", sample_bullet)
+    sampled: tuple[str, bytes] = play(stage_dir, stage_nb, f"{tmp_path}/sampled")
+
+    assert swept[0] == sampled[0]
+    assert swept[1] == sampled[1]